@@ -1,15 +1,10 @@
-
-import os
 import streamlit as st
-from sklearn.metrics import accuracy_score, mean_absolute_error
-from consts import GLOSSARY
-from loaders import load_feature_store
+from loaders import load_feature_store, load_player_data
 from streamlit_controller import STYLE
-import pandas as pd
-import nbformat
-from nbconvert import HTMLExporter
+from consts import NOTEBOOK_FOLDER
 from nfl_data_loader.utils.utils import find_year_for_season
-# Import tab modules
+# Import tab modules. Heavy dependencies (nbconvert, folium, espn_api_orm, sklearn, altair) are
+# imported inside the tab functions that use them so startup only pays for streamlit + pandas.
 from tabs.players.players_tab import display_event_player_tab, display_player_tab
 from tabs.reports.reports_tab import display_reports_tab
 from tabs.venues.venues_tab import display_venues_tab
@@ -19,9 +14,7 @@ from tabs.evaluation.evaluation_tab import display_evaulation_tab
 from tabs.experiments.experiments_tab import display_experiments_tab
 from tabs.glossary.glossary_tab import display_glossary_tab
 
-# Path to the folder containing your Jupyter Notebooks
 SEASONS = list(range(2019, find_year_for_season() + 1))
-NOTEBOOK_FOLDER = './experiments/'  # Change this to the correct path
 st.set_page_config(layout='wide')
 
 # Function to read and convert Jupyter Notebook to markdown
@@ -29,8 +22,6 @@ st.set_page_config(layout='wide')
 
 def main():
     st.title('The Edge Predictor NFL Statistics', anchor=False)
-    # Load data
-    dataset_df, folded_df, player_df = load_feature_store(SEASONS)
 
     ### Define tabs for Team, Event
     event_tab, team_tab,player_tab,event_player_tab, reports_tab, evaluations_tab, experiments_tab, glossary_tab, venues_tab = st.tabs([
@@ -45,8 +36,18 @@ def main():
         "Venues"
     ])
 
+    # Tabs that need none of the frames render before any data is loaded
+    with experiments_tab:
+        display_experiments_tab(NOTEBOOK_FOLDER)
+
+    with glossary_tab:
+        st.markdown(STYLE, unsafe_allow_html=True)
+        display_glossary_tab()
+
+    # Each tab asks for the frames it needs; loaders are cached so later tabs reuse them
     with event_tab:
         st.markdown(STYLE, unsafe_allow_html=True)
+        dataset_df, folded_df = load_feature_store(SEASONS)
         display_event_tab(dataset_df, folded_df)
 
     with team_tab:
@@ -55,6 +56,7 @@ def main():
 
     with event_player_tab:
         st.markdown(STYLE, unsafe_allow_html=True)
+        player_df = load_player_data(SEASONS)
         display_event_player_tab(dataset_df, player_df)
 
     with player_tab:
@@ -66,13 +68,7 @@ def main():
     with evaluations_tab:
         display_evaulation_tab(dataset_df, SEASONS)
 
-    with experiments_tab:
-        display_experiments_tab(NOTEBOOK_FOLDER)
-
-    with glossary_tab:
-        st.markdown(STYLE, unsafe_allow_html=True)
-        display_glossary_tab()
-
+    # Venues waits on ESPN and the geocoding file, so it renders after the data tabs
     with venues_tab:
         display_venues_tab()
 
@@ -0,0 +1,80 @@
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import loaders
+import utils
+from consts import META, VEGAS, TARGETS, POINT_FEATURES, JUST_SIMPLE_FEATURES
+from tests.synthetic import event_season
+
+# The positional exavg join of loaders.build_event_frames (check_aligned + concat) against the three
+# left merges on (team, season, week) it replaced, on synthetic seasons (no network).
+#
+#   python -m benchmarks.join [--seasons 8] [--number 10]
+
+COLUMNS_FOR_SHIFT = ['team', 'season', 'week', 'is_home'] + POINT_FEATURES + JUST_SIMPLE_FEATURES
+
+
+def join_inputs(seasons, seed=0):
+    """base_dataset_df, folded base and expected_features_df as build_event_frames has them at the join"""
+    rng = np.random.default_rng(seed)
+    events = pd.concat([event_season(season, rng) for season in seasons], ignore_index=True)
+    events = events[events['away_elo_pre'].notnull()]
+    base = events[META + ['home_elo_pre', 'away_elo_pre'] + VEGAS + TARGETS + loaders.RANK_COLUMNS].copy()
+    shifted = utils.df_rename_shift(events)[COLUMNS_FOR_SHIFT]
+    t1_cols = [i for i in shifted.columns if '_offense' in i and (i not in TARGETS + META) and i.replace('home_', '') in COLUMNS_FOR_SHIFT]
+    t2_cols = [i for i in shifted.columns if '_defense' in i and (i not in TARGETS + META) and i.replace('away_', '') in COLUMNS_FOR_SHIFT]
+    expected = utils.df_rename_exavg(shifted, '_offense', '_defense', t1_cols=t1_cols, t2_cols=t2_cols)
+    folded = utils.df_rename_fold(base.rename(columns={'spread_line': 'away_spread_line'}), 'away_', 'home_')
+    return base, folded, expected
+
+
+def merged(base, folded, expected):
+    home = expected[expected['is_home'] == 1].drop(columns='is_home')
+    away = expected[expected['is_home'] == 0].drop(columns='is_home')
+    home.columns = ["home_" + col if 'exavg_' in col or col == 'team' else col for col in home.columns]
+    away.columns = ["away_" + col if 'exavg_' in col or col == 'team' else col for col in away.columns]
+    dataset_df = pd.merge(base, home, on=['home_team', 'season', 'week'], how='left')
+    dataset_df = pd.merge(dataset_df, away, on=['away_team', 'season', 'week'], how='left')
+    return dataset_df, pd.merge(folded, expected, on=['team', 'season', 'week'], how='left')
+
+
+def positional(base, folded, expected):
+    n_games = len(base)
+    away, home = expected.iloc[:n_games], expected.iloc[n_games:]
+    loaders.check_aligned(base, away, ['away_team', 'season', 'week'], 'away exavg')
+    loaders.check_aligned(base, home, ['home_team', 'season', 'week'], 'home exavg')
+    feature_cols = [col for col in expected.columns if col not in ['team', 'season', 'week', 'is_home']]
+    dataset_df = pd.concat([
+        base.reset_index(drop=True),
+        home[feature_cols].set_axis(["home_" + col if 'exavg_' in col else col for col in feature_cols], axis=1).reset_index(drop=True),
+        away[feature_cols].set_axis(["away_" + col if 'exavg_' in col else col for col in feature_cols], axis=1).reset_index(drop=True),
+    ], axis=1)
+    loaders.check_aligned(folded, expected, ['team', 'season', 'week'], 'folded exavg')
+    folded_df = pd.concat([folded, expected.drop(columns=['team', 'season', 'week']).reset_index(drop=True)], axis=1)
+    return dataset_df, folded_df
+
+
+def best_ms(f, number):
+    return min(timeit.repeat(f, number=number, repeat=3)) / number * 1000
+
+
+def main(argv=None):
+    """Time the positional exavg join against the hash merges it replaced"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--seasons', type=int, default=8, help='synthetic seasons ending in 2024 (default: %(default)s)')
+    parser.add_argument('--number', type=int, default=10, help='joins timed per method (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    inputs = join_inputs(list(range(2025 - args.seasons, 2025)))
+    for new, old in zip(positional(*inputs), merged(*inputs)):
+        pd.testing.assert_frame_equal(new, old, check_exact=True)
+    new_ms = best_ms(lambda: positional(*inputs), args.number)
+    old_ms = best_ms(lambda: merged(*inputs), args.number)
+    print(f"--join-- {args.seasons} seasons, {len(inputs[0])} games: merge {old_ms:.1f}ms -> positional {new_ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import itertools
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from loaders import (
+    DATASET_DTYPES, FOLDED_DTYPES, PLAYER_DTYPES, build_event_frames, _transform_player_frame, _compact,
+)
+from tests.synthetic import event_season, player_season
+from utils import concat_compacted, sort_partitions, get_partition
+
+# utils.get_partition against the boolean scans it replaced, on the loader frames built from the synthetic
+# feature store of tests/synthetic.py (no network). Every lookup is a week filter plus the .copy() the tabs make.
+#
+#   python -m benchmarks.partitions [--seasons 8] [--number 200]
+
+
+def loader_frames(seasons, seed=0):
+    """dataset_df, folded_df and player_df the way the loaders build them, compacted and sorted by (season, week)"""
+    rng = np.random.default_rng(seed)
+    dataset_parts, folded_parts, player_parts = [], [], []
+    for season in seasons:
+        dataset_df, folded_df = build_event_frames(event_season(season, rng))
+        dataset_parts.append(_compact('dataset_df', season, dataset_df, DATASET_DTYPES))
+        folded_parts.append(_compact('folded_df', season, folded_df, FOLDED_DTYPES))
+        player_parts.append(_compact('player_df', season, _transform_player_frame(player_season(season, rng)), PLAYER_DTYPES))
+    return {
+        'dataset': sort_partitions(concat_compacted(dataset_parts), reset_index=False),
+        'folded': sort_partitions(concat_compacted(folded_parts, ignore_index=True)),
+        'player': sort_partitions(concat_compacted(player_parts, ignore_index=True)),
+    }
+
+
+def scan(df, season, week):
+    return df[(df['season'] == season) & (df['week'] == week)].copy()
+
+
+def sliced(df, season, week):
+    return get_partition(df, season, week).copy()
+
+
+def main(argv=None):
+    """Time a season / week lookup on the loader frames: boolean scan vs PartitionIndex slice"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--seasons', type=int, default=8, help='synthetic seasons ending in 2024 (default: %(default)s)')
+    parser.add_argument('--number', type=int, default=200, help='lookups timed per method (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    frames = loader_frames(list(range(2025 - args.seasons, 2025)))
+    for name, df in frames.items():
+        keys = list(df.attrs['partitions'].weeks)
+        for season, week in keys:
+            pd.testing.assert_frame_equal(sliced(df, season, week), scan(df, season, week))
+        timings = {}
+        for method in (scan, sliced):
+            lookups = itertools.cycle(keys)
+            timings[method.__name__] = min(timeit.repeat(lambda: method(df, *next(lookups)), number=args.number, repeat=3)) / args.number
+        print(f"--partitions-- {name}: {len(df)} rows, {len(keys)} weeks, "
+              f"scan {timings['scan'] * 1e6:.0f}us -> slice {timings['sliced'] * 1e6:.0f}us per week")
+
+
+if __name__ == '__main__':
+    main()
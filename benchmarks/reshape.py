@@ -0,0 +1,71 @@
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import loaders
+import utils
+from consts import META, TARGETS, POINT_FEATURES, JUST_SIMPLE_FEATURES
+from tests import reference
+from tests.synthetic import event_season
+
+# df_rename_shift / df_rename_exavg / df_rename_fold against the column-by-column versions they replaced
+# (tests/reference.py), with the inputs build_event_frames gives them, on synthetic seasons (no network).
+#
+#   python -m benchmarks.reshape [--seasons 10] [--number 10]
+
+COLUMNS_FOR_SHIFT = ['team', 'season', 'week', 'is_home'] + POINT_FEATURES + JUST_SIMPLE_FEATURES
+
+
+def reshape_inputs(seasons, seed=0):
+    """(label, new, old, make_args) per reshape; make_args gives fresh arguments, exavg adds columns to its input"""
+    rng = np.random.default_rng(seed)
+    events = pd.concat([event_season(season, rng) for season in seasons], ignore_index=True)
+    events = events[events['away_elo_pre'].notnull()]
+    shifted = utils.df_rename_shift(events)[COLUMNS_FOR_SHIFT]
+    t1_cols = [i for i in shifted.columns if '_offense' in i and (i not in TARGETS + META) and i.replace('home_', '') in COLUMNS_FOR_SHIFT]
+    t2_cols = [i for i in shifted.columns if '_defense' in i and (i not in TARGETS + META) and i.replace('away_', '') in COLUMNS_FOR_SHIFT]
+    base = events[META + ['home_elo_pre', 'away_elo_pre', 'spread_line', 'total_line'] + TARGETS + loaders.RANK_COLUMNS].copy()
+    base['game_id'] = utils.make_game_id(base).values
+    base = base.rename(columns={'spread_line': 'away_spread_line'})
+    return events, [
+        ('df_rename_shift', utils.df_rename_shift, reference.df_rename_shift, lambda: (events,)),
+        ('df_rename_exavg', utils.df_rename_exavg, reference.df_rename_exavg,
+         lambda: (shifted.copy(), '_offense', '_defense', t1_cols, t2_cols)),
+        ('df_rename_fold', utils.df_rename_fold, reference.df_rename_fold, lambda: (base, 'away_', 'home_')),
+    ]
+
+
+def best_ms(f, number):
+    return min(timeit.repeat(f, number=number, repeat=3)) / number * 1000
+
+
+def main(argv=None):
+    """Time the vectorized reshapes against the column-by-column ones they replaced"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--seasons', type=int, default=10, help='synthetic seasons ending in 2024 (default: %(default)s)')
+    parser.add_argument('--number', type=int, default=10, help='calls timed per reshape (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    events, reshapes = reshape_inputs(list(range(2025 - args.seasons, 2025)))
+    print(f"--reshape-- {args.seasons} seasons, {len(events)} games, {events.shape[1]} columns")
+    for label, new, old, make_args in reshapes:
+        pd.testing.assert_frame_equal(new(*make_args()), old(*make_args()), check_exact=True)
+        new_ms = best_ms(lambda: new(*make_args()), args.number)
+        old_ms = best_ms(lambda: old(*make_args()), args.number)
+        print(f"--reshape-- {label}: {old_ms:.1f}ms -> {new_ms:.1f}ms")
+
+    # The loader end to end, with the old reshapes swapped in for the second timing
+    new_ms = best_ms(lambda: loaders.build_event_frames(events), args.number)
+    swapped = loaders.df_rename_shift, loaders.df_rename_exavg, loaders.df_rename_fold
+    loaders.df_rename_shift, loaders.df_rename_exavg, loaders.df_rename_fold = reference.df_rename_shift, reference.df_rename_exavg, reference.df_rename_fold
+    try:
+        old_ms = best_ms(lambda: loaders.build_event_frames(events), args.number)
+    finally:
+        loaders.df_rename_shift, loaders.df_rename_exavg, loaders.df_rename_fold = swapped
+    print(f"--reshape-- build_event_frames: {old_ms:.1f}ms -> {new_ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
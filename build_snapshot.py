@@ -0,0 +1,29 @@
+import argparse
+import time
+
+from nfl_data_loader.utils.utils import find_year_for_season
+
+from consts import SNAPSHOT_DIR
+from loaders import build_feature_store, build_player_data
+from snapshot import write_snapshot
+
+
+def main(argv=None):
+    """Run the load_feature_store pipeline offline and write the serving snapshot the app loads at startup"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--first-season', type=int, default=2019)
+    parser.add_argument('--last-season', type=int, default=find_year_for_season())
+    parser.add_argument('--out', default=SNAPSHOT_DIR, help='snapshot root (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    seasons = list(range(args.first_season, args.last_season + 1))
+    start = time.time()
+    dataset_df, folded_df = build_feature_store(seasons)
+    player_df = build_player_data(seasons)
+    manifest = write_snapshot({'dataset': dataset_df, 'folded': folded_df, 'player': player_df}, seasons, args.out)
+    rows = ', '.join(f"{name} {entry['rows']}" for name, entry in manifest['frames'].items())
+    print(f"--build_snapshot-- {manifest['version']} for {seasons[0]}-{seasons[-1]} ({rows}) in {time.time() - start:.1f}s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,34 @@
+import os
+
+# Upstream feature store and the local on-disk mirror of it. Every path can be
+# overridden from the environment so CI / air-gapped boxes can point the app at a
+# pre-seeded directory (NFL_STREAMLIT_OFFLINE=1 never touches the network).
+FEATURE_STORE_URL = os.environ.get('NFL_FEATURE_STORE_URL', 'https://github.com/theedgepredictor/nfl-feature-store/raw/main/data/feature_store')
+CACHE_DIR = os.environ.get('NFL_STREAMLIT_CACHE_DIR', './.cache')
+OFFLINE = os.environ.get('NFL_STREAMLIT_OFFLINE', '0') == '1'
+CURRENT_SEASON_REVALIDATE_SECONDS = int(os.environ.get('NFL_STREAMLIT_REVALIDATE_SECONDS', 3600))
+# Prebuilt frames written by build_snapshot.py, loaded instead of rebuilding at startup when present
+SNAPSHOT_DIR = os.environ.get('NFL_STREAMLIT_SNAPSHOT_DIR', os.path.join(CACHE_DIR, 'snapshot'))
+# Experiment notebooks and their rendered HTML, filled on first view or by prewarm_notebooks.py
+NOTEBOOK_FOLDER = os.environ.get('NFL_STREAMLIT_NOTEBOOK_FOLDER', './experiments/')
+NOTEBOOK_CACHE_DIR = os.environ.get('NFL_STREAMLIT_NOTEBOOK_CACHE_DIR', os.path.join(CACHE_DIR, 'notebooks'))
+# Background notebook renders: pool size and how often the folder is polled for edited notebooks
+NOTEBOOK_RENDER_WORKERS = int(os.environ.get('NFL_STREAMLIT_NOTEBOOK_WORKERS', 2))
+NOTEBOOK_WATCH_SECONDS = float(os.environ.get('NFL_STREAMLIT_NOTEBOOK_WATCH_SECONDS', 5))
+# Shared HTTP session (http_client.py): read timeout, retries on 429 / 5xx and the conditional JSON cache
+HTTP_TIMEOUT_SECONDS = float(os.environ.get('NFL_STREAMLIT_HTTP_TIMEOUT_SECONDS', 10))
+HTTP_RETRIES = int(os.environ.get('NFL_STREAMLIT_HTTP_RETRIES', 3))
+HTTP_CACHE_DIR = os.environ.get('NFL_STREAMLIT_HTTP_CACHE_DIR', os.path.join(CACHE_DIR, 'http'))
+# ESPN season lists per league (season_catalog.py), refetched once they are older than this
+SEASON_CATALOG_TTL_SECONDS = int(os.environ.get('NFL_STREAMLIT_SEASON_CATALOG_TTL_SECONDS', 7 * 24 * 3600))
+# Venue / team data pumps read by the Venues tab
+DATA_PUMP_URL = os.environ.get('NFL_STREAMLIT_DATA_PUMP_URL', 'https://raw.githubusercontent.com/theedgepredictor')
+
+FEATURE_STORE_KINDS = {
+    'event': 'event/regular_season_game',
+    'player': 'player/fantasy',
+}
+
 TARGETS = [
     'actual_home_score',
     'actual_away_score',
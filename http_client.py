@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from consts import HTTP_CACHE_DIR, HTTP_TIMEOUT_SECONDS, HTTP_RETRIES, OFFLINE
+from utils import atomic_write
+
+# One pooled requests.Session for every upstream call of the app, plus an on-disk cache of JSON responses.
+#
+# Layout (one file per url):
+#   {HTTP_CACHE_DIR}/{sha256(url)[:16]}.json   -> url, etag, last_modified, checked_at, body
+#
+# get_json serves the cached body while it is younger than max_age, then revalidates it with
+# If-None-Match / If-Modified-Since so an unchanged resource costs a 304 instead of a full download.
+# When upstream is unreachable the last cached body is served; NFL_STREAMLIT_OFFLINE=1 never touches the network.
+
+# Connections kept alive per host: the Venues tab fetches from raw.githubusercontent.com from several threads
+POOL_SIZE = 16
+# (connect, read) seconds
+TIMEOUT = (min(HTTP_TIMEOUT_SECONDS, 5), HTTP_TIMEOUT_SECONDS)
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _new_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET', 'HEAD'),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def session():
+    """The process wide session: keep-alive connections, retries with exponential backoff on 429 / 5xx"""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = _new_session()
+    return _SESSION
+
+
+def _cache_path(url, cache_dir):
+    return os.path.join(cache_dir, f"{hashlib.sha256(url.encode()).hexdigest()[:16]}.json")
+
+
+def read_cached(url, cache_dir=HTTP_CACHE_DIR):
+    path = _cache_path(url, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"--read_cached-- ignoring unreadable cache entry for {url}: {e}")
+        return None
+    # Hash prefix collision: treat as a miss
+    return entry if entry.get('url') == url else None
+
+
+def _write_cached(url, entry, cache_dir):
+    path = _cache_path(url, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    atomic_write(path, json.dumps(entry))
+
+
+def get_json(url, max_age=3600, cache_dir=HTTP_CACHE_DIR, timeout=TIMEOUT):
+    """
+    Decoded JSON body of url through the shared session and the on-disk cache.
+    Cached bodies younger than max_age seconds are served without a request, older ones are revalidated.
+    Raises requests.HTTPError for an error status and requests.RequestException when upstream is unreachable
+    and nothing is cached.
+    """
+    entry = read_cached(url, cache_dir)
+    now = time.time()
+    if entry is not None and (OFFLINE or now - entry['checked_at'] < max_age):
+        return entry['body']
+    if OFFLINE:
+        raise requests.ConnectionError(f"Offline and no cached copy of {url} in {cache_dir}")
+
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    try:
+        response = session().get(url, headers=headers, timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.HTTPError:
+        raise
+    except requests.RequestException as e:
+        if entry is None:
+            raise
+        # Upstream unreachable, serve the last cached body
+        print(f"--get_json-- revalidation of {url} failed, using cached copy: {e}")
+        return entry['body']
+
+    if response.status_code == 304:
+        entry['checked_at'] = now
+    else:
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': now,
+            'body': response.json(),
+        }
+    try:
+        _write_cached(url, entry, cache_dir)
+    except OSError as e:
+        print(f"--get_json-- could not cache {url}: {e}")
+    return entry['body']
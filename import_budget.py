@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Startup import budget for app.py, measured with `python -X importtime`.
+#
+#   python import_budget.py                      # exit 1 when `import app` is over budget
+#   python import_budget.py --budget-ms 800 --top 20
+#
+# Heavy dependencies are imported inside the tabs that use them; any of DEFERRED_MODULES showing up
+# while importing app.py is a regression regardless of the timing.
+
+DEFAULT_BUDGET_MS = 1500
+DEFERRED_MODULES = [
+    'sklearn',
+    'nbformat',
+    'nbconvert',
+    'folium',
+    'streamlit_folium',
+    'espn_api_orm',
+    'altair',
+]
+
+
+def measure_imports(module='app'):
+    """Return [(depth, self_us, cumulative_us, name)] for one cold `import module`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fail when the cold import of app.py exceeds the startup budget')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('NFL_STREAMLIT_IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=3, help='best of N cold imports (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=10, help='slowest direct imports to list (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    runs = [measure_imports(args.module) for _ in range(args.runs)]
+    totals = [next(cumulative for depth, _, cumulative, name in rows if depth == 0 and name == args.module) for rows in runs]
+    best = min(range(len(runs)), key=lambda i: totals[i])
+    rows, total_ms = runs[best], totals[best] / 1000
+
+    print(f"--import_budget-- import {args.module}: {total_ms:.0f}ms (best of {args.runs}), budget {args.budget_ms:.0f}ms")
+    for depth, _, cumulative, name in sorted((row for row in rows if row[0] == 1), key=lambda row: -row[2])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    failed = False
+    deferred = sorted({name.split('.')[0] for _, _, _, name in rows} & set(DEFERRED_MODULES))
+    if deferred:
+        print(f"--import_budget-- deferred modules imported at startup: {deferred}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"--import_budget-- over budget by {total_ms - args.budget_ms:.0f}ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,41 +1,219 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-from nfl_data_loader.api.sources.players.adv.fantasy.projections import get_player_fantasy_projections
+import pyarrow.parquet as pq
 
 from consts import META, VEGAS, TARGETS, POINT_FEATURES, RANKING_FEATURES, JUST_SIMPLE_FEATURES
-from utils import df_rename_shift, df_rename_exavg, df_rename_fold
+from utils import df_rename_shift, df_rename_exavg, df_rename_fold, make_game_id, apply_dtype_schema, concat_compacted, sort_partitions, attach_team_context, PartitionIndex, get_partition, TO_DATE_COLUMNS
+from mirror import fetch_feature_store_file
+from snapshot import read_snapshot
 
 import streamlit as st
 
-def get_event_feature_store(season):
+# The loaded frames are cached with st.cache_resource: one process wide copy shared by every session
+# and rerun, handed out by reference (no pickling or copying on cache hits). They are read only,
+# tabs must .copy() anything they modify. Each frame carries attrs['data_version'] (a hash of the
+# upstream file versions it was built from) so derived caches can key on it.
+DATA_TTL_SECONDS = 3600
+
+FETCH_WORKERS = 8
+
+# (kind, season) -> seconds spent on the most recent fetch, including retries
+FETCH_TIMINGS = {}
+
+def _timed_fetch(kind, season):
+    # Retries with backoff live in the shared http_client session (per request, so per season file);
+    # a second retry loop here would multiply the worst case wait
+    start = time.perf_counter()
+    path, version = fetch_feature_store_file(kind, season)
+    return path, version, time.perf_counter() - start
+
+def fetch_seasons(seasons, kinds=('event', 'player'), max_workers=FETCH_WORKERS):
+    '''
+    Fetch every (kind, season) feature store file concurrently into the local mirror.
+    Each season retries on its own (http_client.session); the first one to exhaust its retries raises.
+    Returns {(kind, season): (local_path, version)}, callers iterate seasons to keep concat order.
+    '''
+    keys = [(kind, season) for kind in kinds for season in seasons]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        futures = {key: pool.submit(_timed_fetch, *key) for key in keys}
+        results = {key: future.result() for key, future in futures.items()}
+
+    files = {}
+    for key, (path, version, elapsed) in results.items():
+        FETCH_TIMINGS[key] = elapsed
+        files[key] = (path, version)
+    print("--fetch_seasons-- " + ", ".join(f"{kind} {season}: {FETCH_TIMINGS[(kind, season)]:.2f}s" for kind, season in keys))
+    return files
+
+RANK_COLUMNS = ['away_offensive_rank', 'away_defensive_rank', 'home_offensive_rank', 'home_defensive_rank']
+
+# Compact dtypes for the long lived frames, applied to each season before it is frozen (see _frozen_season_frames)
+# and kept through the concat by utils.concat_compacted. Every float64 column not listed here is stored as float32.
+TARGET_FLAGS = ['actual_away_team_win', 'actual_away_team_covered_spread', 'actual_under_covered', 'actual_team_win', 'actual_team_covered_spread']
+DATASET_DTYPES = {
+    'category': ['home_team', 'away_team'],
+    'int16': ['season', 'week', 'home_rating', 'away_rating'],
+    'Int8': RANK_COLUMNS + TARGET_FLAGS,
+}
+FOLDED_DTYPES = {
+    'category': ['team'],
+    'int16': ['season', 'week', 'rating'],
+    'int8': ['is_home'],
+    'Int8': ['offensive_rank', 'defensive_rank'] + TARGET_FLAGS,
+}
+PLAYER_DTYPES = {
+    'category': ['team', 'position'],
+    'int16': ['season', 'week'],
+}
+
+# False serves pandas' default float64 / object dtypes, e.g. to check the tabs render the same values either way
+COMPACT_DTYPES = True
+
+# (frame name, season) -> (bytes before, bytes after) from the apply_dtype_schema of that season's frame
+DTYPE_REPORT = {}
+
+def data_version(files, kind, seasons):
+    digest = hashlib.sha256()
+    for season in seasons:
+        digest.update(f"{kind}:{season}:{files[(kind, season)][1]};".encode())
+    return digest.hexdigest()[:16]
+
+def _publish(df, version):
+    df.attrs['data_version'] = version
+    df.attrs['loaded_at'] = time.time()
+    return df
+
+def _compact(name, season, df, schema):
+    if COMPACT_DTYPES:
+        df, bytes_before, bytes_after = apply_dtype_schema(df, schema)
+    else:
+        bytes_before = bytes_after = int(df.memory_usage(deep=True).sum())
+    DTYPE_REPORT[(name, season)] = (bytes_before, bytes_after)
+    return df
+
+def _report_dtypes(name, seasons):
+    bytes_before = sum(DTYPE_REPORT[(name, season)][0] for season in seasons)
+    bytes_after = sum(DTYPE_REPORT[(name, season)][1] for season in seasons)
+    print(f"--apply_dtype_schema-- {name}: {bytes_before / 1e6:.2f}MB -> {bytes_after / 1e6:.2f}MB, saved {(bytes_before - bytes_after) / 1e6:.2f}MB")
+
+def event_feature_store_columns():
+    '''
+    The only event feature store columns build_event_frames touches: the base/target columns plus
+    the away_ and home_ prefixed point and simple features that get shifted into team rows.
+    '''
+    columns_for_base = META + ['home_elo_pre', 'away_elo_pre'] + VEGAS + TARGETS + RANK_COLUMNS
+    columns_for_shift = [f"{side}_{col}" for side in ['away', 'home'] for col in POINT_FEATURES + JUST_SIMPLE_FEATURES]
+    return list(dict.fromkeys(columns_for_base + columns_for_shift))
+
+def read_feature_store_parquet(path, columns=None):
+    '''Read only the requested columns from a feature store parquet, failing loudly when the schema lacks any'''
+    if columns is None:
+        return pd.read_parquet(path)
+    available = set(pq.read_schema(path).names)
+    missing = [col for col in columns if col not in available]
+    if missing:
+        raise ValueError(f"{path} is missing feature store columns: {missing}")
+    return pd.read_parquet(path, columns=columns)
+
+def get_event_feature_store(season, columns=None):
     #return pd.read_parquet(f'../nfl-feature-store/data/feature_store/event/regular_season_game/{season}.parquet')
-    return pd.read_parquet(f'https://github.com/theedgepredictor/nfl-feature-store/raw/main/data/feature_store/event/regular_season_game/{season}.parquet')
+    path, _ = fetch_feature_store_file('event', season)
+    return read_feature_store_parquet(path, columns)
 
 def get_player_fantasy_feature_store(season):
     #return pd.read_parquet(f'../nfl-feature-store/data/feature_store/event/regular_season_game/{season}.parquet')
-    return pd.read_parquet(f'https://github.com/theedgepredictor/nfl-feature-store/raw/main/data/feature_store/player/fantasy/{season}.parquet')
+    path, _ = fetch_feature_store_file('player', season)
+    return pd.read_parquet(path)
 
-@st.cache_data(ttl=3600)
-def load_player_data(seasons):
-    """Load player data for all position groups"""
-    all_player_data = []
+# Incremental refresh: fully transformed frames per (kind, season), keyed on the upstream file version.
+# A TTL refresh only rebuilds the seasons whose file changed (in practice just the current one)
+# and splices them back together with the frozen finished seasons. Frames are frozen compacted, so the
+# frozen seasons cost about what the served frames do rather than their float64 / object size.
+# A snapshot startup seeds them from the snapshot frames, and seasons no longer requested are dropped.
+INCREMENTAL = True
+_SEASON_FRAMES = {}
+
+def _frozen_season_frames(kind, season, version, build):
+    cached = _SEASON_FRAMES.get((kind, season))
+    if INCREMENTAL and cached is not None and cached[0] == version:
+        return cached[1]
+    frames = build()
+    _SEASON_FRAMES[(kind, season)] = (version, frames)
+    return frames
+
+def _prune_season_frames(kind, seasons):
+    for key in [key for key in _SEASON_FRAMES if key[0] == kind and key[1] not in seasons]:
+        del _SEASON_FRAMES[key]
+
+def _seed_season_frames(kind, seasons, files, split):
+    '''Freeze a snapshot's per-season frames, so the first refresh after a snapshot startup only rebuilds the changed seasons'''
+    if not INCREMENTAL:
+        return
+    _prune_season_frames(kind, seasons)
     for season in seasons:
-        # Load data for each season
-        season_data = get_player_fantasy_feature_store(season)
-        all_player_data.append(season_data)
+        _SEASON_FRAMES[(kind, season)] = (files[(kind, season)][1], split(season))
 
-    # Combine all seasons
-    df = pd.concat(all_player_data, ignore_index=True)
+def _transform_player_frame(df):
+    df = df.copy()
     df['projected_points_ppr'] = df['projected_points'].copy()
     df['projected_points_half_ppr'] = df['projected_points_ppr'] - (df['projected_receiving_targets'].fillna(0) * 0.5)
     df['projected_points_standard'] = df['projected_points_ppr'] - (df['projected_receiving_targets'].fillna(0) * 1.0)
     return df
 
-@st.cache_data(ttl=3600) # Invalidate cache after an hour
-def load_feature_store(seasons):
-    event_fs = pd.concat([get_event_feature_store(season) for season in seasons], ignore_index=True)
+def build_player_data(seasons, files=None):
+    """Load player data for all position groups"""
+    if files is None:
+        files = fetch_seasons(seasons, kinds=('player',))
+    _prune_season_frames('player', seasons)
+    all_player_data = []
+    for season in seasons:
+        # Load data for each season, reusing the transformed frame if the file did not change
+        path, version = files[('player', season)]
+        all_player_data.append(_frozen_season_frames('player', season, version, lambda: _compact('player_df', season, _transform_player_frame(pd.read_parquet(path)), PLAYER_DTYPES)))
+
+    # Combine all seasons
+    _report_dtypes('player_df', seasons)
+    df = sort_partitions(concat_compacted(all_player_data, ignore_index=True))
+    return _publish(df, data_version(files, 'player', seasons))
+
+@st.cache_resource(ttl=DATA_TTL_SECONDS)
+def load_player_data(seasons):
+    # Only a snapshot built from the files the mirror holds now, an upstream update means a live build
+    files = fetch_seasons(seasons, kinds=('player',))
+    snapshot = read_snapshot('player', seasons, data_version=data_version(files, 'player', seasons))
+    if snapshot is not None:
+        player_df = _publish(*snapshot)
+        _seed_season_frames('player', seasons, files, lambda season: get_partition(player_df, season).reset_index(drop=True))
+        return player_df
+    return build_player_data(seasons, files)
+
+def check_aligned(df, features_df, keys, label):
+    """
+    Positional joins take row i of features_df as the features for row i of df.
+    Raise if any row's (team, season, week) disagrees, instead of attaching another game's features.
+    features_df keys are always team, season, week; keys name the matching columns of df.
+    """
+    if len(df) != len(features_df):
+        raise ValueError(f"--build_event_frames-- {label}: {len(df)} rows but {len(features_df)} feature rows")
+    mismatched = np.zeros(len(df), dtype=bool)
+    for key, feature_key in zip(keys, ['team', 'season', 'week']):
+        mismatched |= df[key].to_numpy() != features_df[feature_key].to_numpy()
+    if mismatched.any():
+        first = np.flatnonzero(mismatched)[:5]
+        raise ValueError(
+            f"--build_event_frames-- {label}: {int(mismatched.sum())} rows out of alignment, first at positions {first.tolist()}: "
+            f"{df[keys].iloc[first].values.tolist()} vs {features_df[['team', 'season', 'week']].iloc[first].values.tolist()}"
+        )
+
+def build_event_frames(event_fs):
+    """Event feature store rows -> (dataset_df, folded_dataset_df). Rows are independent across seasons."""
     event_fs = event_fs[event_fs.away_elo_pre.notnull()].copy()
 
-    columns_for_base = META + ['home_elo_pre', 'away_elo_pre'] + VEGAS + TARGETS + ['away_offensive_rank','away_defensive_rank','home_offensive_rank','home_defensive_rank',]
+    columns_for_base = META + ['home_elo_pre', 'away_elo_pre'] + VEGAS + TARGETS + RANK_COLUMNS
     columns_for_shift = ['team', 'season', 'week', 'is_home'] + POINT_FEATURES + JUST_SIMPLE_FEATURES
     shifted_df = event_fs.copy()
     base_dataset_df = event_fs[columns_for_base].copy()
@@ -52,28 +230,40 @@ def load_feature_store(seasons):
     #### Apply Expected Average
     expected_features_df = df_rename_exavg(shifted_df, '_offense', '_defense', t1_cols=t1_cols, t2_cols=t2_cols)
 
-    #### Rename back into home and away features
-    home_exavg_features_df = expected_features_df[expected_features_df['is_home'] == 1].copy().drop(columns='is_home')
-    away_exavg_features_df = expected_features_df[expected_features_df['is_home'] == 0].copy().drop(columns='is_home')
-    home_exavg_features_df.columns = ["home_" + col if 'exavg_' in col or col == 'team' else col for col in home_exavg_features_df.columns]
-    away_exavg_features_df.columns = ["away_" + col if 'exavg_' in col or col == 'team' else col for col in away_exavg_features_df.columns]
+    #### Align home and away Expected Average features with base by position
+    # df_rename_shift stacks every away row then every home row in event order, so row i of each half is game i
+    n_games = len(base_dataset_df)
+    away_exavg_features_df = expected_features_df.iloc[:n_games]
+    home_exavg_features_df = expected_features_df.iloc[n_games:]
+    check_aligned(base_dataset_df, away_exavg_features_df, ['away_team', 'season', 'week'], 'away exavg')
+    check_aligned(base_dataset_df, home_exavg_features_df, ['home_team', 'season', 'week'], 'home exavg')
+    feature_cols = [col for col in expected_features_df.columns if col not in ['team', 'season', 'week', 'is_home']]
 
-    #### Merge home and away Expected Average features into base as dataset_df
-    dataset_df = pd.merge(base_dataset_df, home_exavg_features_df, on=['home_team', 'season', 'week'], how='left')
-    dataset_df = pd.merge(dataset_df, away_exavg_features_df, on=['away_team', 'season', 'week'], how='left')
-    dataset_df['game_id'] = dataset_df.apply(lambda x: f"{x['season']}_{x['week']}_{x['away_team']}_{x['home_team']}", axis=1)
+    #### Join home and away Expected Average features onto base as dataset_df
+    dataset_df = pd.concat([
+        base_dataset_df.reset_index(drop=True),
+        home_exavg_features_df[feature_cols].set_axis(["home_" + col if 'exavg_' in col else col for col in feature_cols], axis=1).reset_index(drop=True),
+        away_exavg_features_df[feature_cols].set_axis(["away_" + col if 'exavg_' in col else col for col in feature_cols], axis=1).reset_index(drop=True),
+    ], axis=1)
+    game_id = make_game_id(base_dataset_df).values
+    dataset_df['game_id'] = game_id
 
     #### Fold base from away and home into team
     folded_dataset_df = base_dataset_df.copy()
-    folded_dataset_df['game_id'] = folded_dataset_df.apply(lambda x: f"{x['season']}_{x['week']}_{x['away_team']}_{x['home_team']}", axis=1)
+    folded_dataset_df['game_id'] = game_id
     folded_dataset_df = folded_dataset_df.rename(columns={'spread_line': 'away_spread_line'})
     folded_dataset_df['home_spread_line'] = - folded_dataset_df['away_spread_line']
     folded_dataset_df['actual_home_spread'] = -folded_dataset_df['actual_away_spread']
     folded_dataset_df['actual_home_team_win'] = folded_dataset_df['actual_away_team_win'] == 0
     folded_dataset_df['actual_home_team_covered_spread'] = folded_dataset_df['actual_away_team_covered_spread'] == 0
     folded_dataset_df = df_rename_fold(folded_dataset_df, 'away_', 'home_')
-    folded_dataset_df = pd.merge(folded_dataset_df, expected_features_df, on=['team', 'season', 'week'], how='left')
-    dataset_df.index = dataset_df.game_id
+    # Folded rows are away then home in event order as well
+    check_aligned(folded_dataset_df, expected_features_df, ['team', 'season', 'week'], 'folded exavg')
+    folded_dataset_df = pd.concat([
+        folded_dataset_df,
+        expected_features_df.drop(columns=['team', 'season', 'week']).reset_index(drop=True),
+    ], axis=1)
+    dataset_df.index = pd.Index(game_id, name='game_id')
 
     # Customize Column names from feature store into friendly_names
     dataset_df['expected_spread'] = dataset_df['home_exavg_avg_points'] - dataset_df['away_exavg_avg_points']
@@ -133,8 +323,54 @@ def load_feature_store(seasons):
     })
     folded_dataset_df['rating'] = folded_dataset_df['rating'].astype(int)
     folded_dataset_df['expected_time_of_possession'] = folded_dataset_df['expected_time_of_possession'].apply(lambda x: f"{int(x // 60)}:{int(x % 60):02}")
-    # Load player data
-    player_df = load_player_data(seasons)
+    return dataset_df, folded_dataset_df
 
-    return dataset_df, folded_dataset_df, player_df
+def _compact_event_frames(season, frames):
+    dataset_df, folded_dataset_df = frames
+    return _compact('dataset_df', season, dataset_df, DATASET_DTYPES), _compact('folded_df', season, folded_dataset_df, FOLDED_DTYPES)
 
+def build_feature_store(seasons, files=None):
+    """Live build of (dataset_df, folded_df) from the mirrored event feature store"""
+    # Event files for every season are fetched together up front; player files only when a tab asks for them
+    if files is None:
+        files = fetch_seasons(seasons, kinds=('event',))
+    columns = event_feature_store_columns()
+    _prune_season_frames('event', seasons)
+    dataset_parts, folded_parts = [], []
+    for season in seasons:
+        path, version = files[('event', season)]
+        dataset_part, folded_part = _frozen_season_frames('event', season, version, lambda: _compact_event_frames(season, build_event_frames(read_feature_store_parquet(path, columns))))
+        dataset_parts.append(dataset_part)
+        folded_parts.append(folded_part)
+    _report_dtypes('dataset_df', seasons)
+    _report_dtypes('folded_df', seasons)
+    # Sorted by (season, week) with a PartitionIndex so tabs can slice a week with utils.get_partition
+    dataset_df = sort_partitions(concat_compacted(dataset_parts), reset_index=False)
+    folded_dataset_df = sort_partitions(concat_compacted(folded_parts, ignore_index=True))
+    # Season-to-date team context for every week, spans seasons for the week 1 fallback
+    folded_dataset_df = attach_team_context(folded_dataset_df)
+    # attach_team_context returns a copy (same rows, new index object), index it again
+    folded_dataset_df.attrs['partitions'] = PartitionIndex(folded_dataset_df)
+    version = data_version(files, 'event', seasons)
+    _publish(dataset_df, version)
+    _publish(folded_dataset_df, version)
+    return dataset_df, folded_dataset_df
+
+@st.cache_resource(ttl=DATA_TTL_SECONDS) # Invalidate cache after an hour
+def load_feature_store(seasons):
+    # A snapshot from build_snapshot.py makes startup three parquet reads; otherwise build live.
+    # The mirror versions decide: past seasons are local, the current one costs a conditional request when stale
+    files = fetch_seasons(seasons, kinds=('event',))
+    version = data_version(files, 'event', seasons)
+    dataset_snapshot = read_snapshot('dataset', seasons, data_version=version)
+    folded_snapshot = read_snapshot('folded', seasons, data_version=version)
+    if dataset_snapshot is not None and folded_snapshot is not None:
+        dataset_df, folded_dataset_df = _publish(*dataset_snapshot), _publish(*folded_snapshot)
+        # The frozen folded parts are the pre attach_team_context frames, the splice recomputes the context
+        _seed_season_frames('event', seasons, files, lambda season: (
+            get_partition(dataset_df, season).copy(),
+            get_partition(folded_dataset_df, season).drop(columns=TO_DATE_COLUMNS).reset_index(drop=True),
+        ))
+    else:
+        dataset_df, folded_dataset_df = build_feature_store(seasons, files)
+    return dataset_df, folded_dataset_df
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import time
+
+import requests
+from nfl_data_loader.utils.utils import find_year_for_season
+
+from consts import FEATURE_STORE_URL, FEATURE_STORE_KINDS, CACHE_DIR, OFFLINE, CURRENT_SEASON_REVALIDATE_SECONDS
+from http_client import session, TIMEOUT
+from utils import atomic_write
+
+# Local mirror of the upstream feature store parquet files.
+#
+# Layout (content addressed, one directory per kind/season):
+#   {CACHE_DIR}/feature_store/{kind}/{season}/{sha256}.parquet
+#   {CACHE_DIR}/feature_store/{kind}/{season}/manifest.json   -> etag, last_modified, sha256, checked_at
+#
+# A directory can also be seeded by hand with {CACHE_DIR}/feature_store/{kind}/{season}.parquet,
+# which is adopted into the layout above the first time it is requested (read in place when offline,
+# so a read-only seed directory works).
+#
+# A new blob replaces the old one in two steps: the manifest is swapped first, then blobs older than the
+# one it replaced are dropped, so a session that just read the previous manifest can still open its file.
+
+
+def remote_url(kind, season):
+    return f"{FEATURE_STORE_URL}/{FEATURE_STORE_KINDS[kind]}/{season}.parquet"
+
+
+def _season_dir(kind, season):
+    return os.path.join(CACHE_DIR, 'feature_store', kind, str(season))
+
+
+def _seed_path(kind, season):
+    return os.path.join(CACHE_DIR, 'feature_store', kind, f"{season}.parquet")
+
+
+def _manifest_path(kind, season):
+    return os.path.join(_season_dir(kind, season), 'manifest.json')
+
+
+def read_manifest(kind, season):
+    path = _manifest_path(kind, season)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not os.path.exists(os.path.join(_season_dir(kind, season), manifest['file'])):
+        return None
+    return manifest
+
+
+def _write_manifest(kind, season, manifest):
+    atomic_write(_manifest_path(kind, season), json.dumps(manifest, indent=2))
+
+
+def _store_blob(kind, season, content):
+    """Write the bytes under their sha256, older blobs stay until _prune_blobs"""
+    season_dir = _season_dir(kind, season)
+    os.makedirs(season_dir, exist_ok=True)
+    sha256 = hashlib.sha256(content).hexdigest()
+    file_name = f"{sha256}.parquet"
+    path = os.path.join(season_dir, file_name)
+    if not os.path.exists(path):
+        atomic_write(path, content)
+    return sha256, file_name
+
+
+def _prune_blobs(kind, season, keep):
+    """Drop the season's blobs not in keep, called after the manifest swap"""
+    season_dir = _season_dir(kind, season)
+    for old in os.listdir(season_dir):
+        if old.endswith('.parquet') and old not in keep:
+            try:
+                os.remove(os.path.join(season_dir, old))
+            except FileNotFoundError:
+                # Pruned by another session
+                pass
+
+
+def _adopt_seed(kind, season):
+    seed = _seed_path(kind, season)
+    if not os.path.exists(seed):
+        return None
+    with open(seed, 'rb') as f:
+        content = f.read()
+    if OFFLINE:
+        # Served from the seed itself, nothing is written
+        return {
+            'kind': kind,
+            'season': season,
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'path': seed,
+            'fetched_at': os.path.getmtime(seed),
+            'checked_at': 0,
+        }
+    sha256, file_name = _store_blob(kind, season, content)
+    manifest = {
+        'kind': kind,
+        'season': season,
+        'url': remote_url(kind, season),
+        'etag': None,
+        'last_modified': None,
+        'sha256': sha256,
+        'file': file_name,
+        'fetched_at': os.path.getmtime(seed),
+        'checked_at': 0,
+    }
+    _write_manifest(kind, season, manifest)
+    _prune_blobs(kind, season, {file_name})
+    return manifest
+
+
+def is_stale(kind, season, manifest, now=None):
+    """
+    Past seasons are frozen once mirrored and never refetch.
+    The current season (and anything after it) revalidates every CURRENT_SEASON_REVALIDATE_SECONDS.
+    """
+    if manifest is None:
+        return True
+    if season < find_year_for_season():
+        return False
+    now = time.time() if now is None else now
+    return now - manifest.get('checked_at', 0) >= CURRENT_SEASON_REVALIDATE_SECONDS
+
+
+def local_path(kind, season, manifest):
+    # An offline seed is read in place
+    if 'path' in manifest:
+        return manifest['path']
+    return os.path.join(_season_dir(kind, season), manifest['file'])
+
+
+def fetch_feature_store_file(kind, season):
+    """
+    Return (local_path, version) for a feature store parquet, reading from the mirror first.
+    version is the sha256 of the file contents so callers can tell when a season changed upstream.
+    """
+    manifest = read_manifest(kind, season) or _adopt_seed(kind, season)
+    if manifest is not None and (OFFLINE or not is_stale(kind, season, manifest)):
+        return local_path(kind, season, manifest), manifest['sha256']
+    if OFFLINE:
+        raise FileNotFoundError(f"Offline and no mirrored {kind} feature store for {season} in {_season_dir(kind, season)}")
+
+    url = remote_url(kind, season)
+    headers = {}
+    if manifest is not None:
+        if manifest.get('etag'):
+            headers['If-None-Match'] = manifest['etag']
+        if manifest.get('last_modified'):
+            headers['If-Modified-Since'] = manifest['last_modified']
+    try:
+        response = session().get(url, headers=headers, timeout=TIMEOUT)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException as e:
+        if manifest is None:
+            raise
+        # Upstream unreachable, serve the last mirrored copy
+        print(f"--fetch_feature_store_file-- {kind} {season} revalidation failed, using mirror: {e}")
+        return local_path(kind, season, manifest), manifest['sha256']
+
+    now = time.time()
+    if response.status_code == 304:
+        manifest['checked_at'] = now
+        _write_manifest(kind, season, manifest)
+        return local_path(kind, season, manifest), manifest['sha256']
+
+    previous = manifest['file'] if manifest is not None and 'file' in manifest else None
+    sha256, file_name = _store_blob(kind, season, response.content)
+    manifest = {
+        'kind': kind,
+        'season': season,
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'sha256': sha256,
+        'file': file_name,
+        'fetched_at': now,
+        'checked_at': now,
+    }
+    _write_manifest(kind, season, manifest)
+    # The blob just replaced stays for readers of the previous manifest, anything older goes
+    _prune_blobs(kind, season, {file_name, previous})
+    return local_path(kind, season, manifest), sha256
+
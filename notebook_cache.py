@@ -0,0 +1,399 @@
+import base64
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from importlib.metadata import version, PackageNotFoundError
+
+from consts import NOTEBOOK_CACHE_DIR, NOTEBOOK_RENDER_WORKERS, NOTEBOOK_WATCH_SECONDS
+from utils import atomic_write
+
+# Rendered HTML of the experiment notebooks so the Experiments tab reads a file instead of running nbconvert.
+#
+# Layout (one directory per notebook path):
+#   {NOTEBOOK_CACHE_DIR}/{notebook name}-{sha256(realpath)[:12]}/{sha256(content)[:16]}-nbconvert-{version}-{template}[-{options}].html
+#
+# Editing the notebook, upgrading nbconvert or changing TEMPLATE changes the file name, so a stale render is never
+# served; renders of older contents / nbconvert versions / templates are dropped whenever a new one is written.
+# Renders hold the cells only (nbconvert's 'basic' template); the tab adds one shared stylesheet (styled()).
+# Bounded renders (a page of cells, capped outputs, downsampled images, no code; see render_options)
+# add a hash of their options to the name and live next to the full render.
+#
+# NotebookRenderer fills the cache in the background: a process pool converts every notebook of the folder
+# and a polling watcher (mtime / size) resubmits only the notebooks that changed since the last scan.
+
+# (realpath, mtime_ns, size) -> content sha256, so an unchanged notebook is not re-hashed on every rerun
+_CONTENT_HASHES = {}
+_CONTENT_HASHES_LOCK = threading.Lock()
+# content sha256 -> number of cells
+_CELL_COUNTS = {}
+
+# The Experiments tab shows a page of cells at a time with capped outputs, so a long notebook never ships
+# its full HTML (every DataFrame row, full size images) to the browser in one go. A page is a handful of
+# cells: the repo's notebooks have 3 and 18, their DataFrame outputs run to ~30,000 characters of HTML
+CELLS_PER_PAGE = 6
+BOUNDED_RENDER = {'max_output_chars': 5_000, 'max_image_width': 900}
+
+# The default 'lab' template inlines the whole JupyterLab theme (~280KB of CSS) into every render,
+# 'basic' is the cells alone and NOTEBOOK_STYLE covers what they use
+TEMPLATE = 'basic'
+NOTEBOOK_STYLE = """
+    body { margin: 0; padding: 8px; font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif; font-size: 14px; line-height: 1.4; color: #212121; }
+    .cell { display: flex; flex-direction: column; margin-bottom: 12px; }
+    .input, .output_area { display: flex; }
+    .prompt { flex: 0 0 70px; padding: 4px 8px 0 0; text-align: right; font-family: monospace; font-size: 12px; color: #303f9f; }
+    .output_prompt { color: #d84315; }
+    .inner_cell, .output_subarea { flex: 1; min-width: 0; overflow-x: auto; }
+    .input_area { background: #f5f5f5; border: 1px solid #e0e0e0; border-radius: 2px; }
+    pre { margin: 0; padding: 6px 8px; font-family: SFMono-Regular, Menlo, Consolas, monospace; font-size: 12.5px; white-space: pre-wrap; word-break: break-word; }
+    .output_stderr pre { background: #fdd; }
+    .rendered_html img { max-width: 100%; }
+    .rendered_html code { background: #f5f5f5; padding: 0 3px; }
+    .anchor-link { display: none; }
+    table.dataframe { border-collapse: collapse; border: none; font-size: 12px; margin: 4px 0; }
+    table.dataframe th, table.dataframe td { padding: 4px 8px; text-align: right; border: none; white-space: nowrap; }
+    table.dataframe thead th { border-bottom: 1px solid #bdbdbd; font-weight: bold; }
+    table.dataframe tbody tr:nth-child(odd) { background: #f5f5f5; }
+    table.dataframe tbody tr:hover { background: rgba(66, 165, 245, 0.2); }
+"""
+
+
+@lru_cache(maxsize=None)
+def nbconvert_version():
+    # Read from the package metadata: importing nbconvert itself is what the cache is avoiding
+    try:
+        return version('nbconvert')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def content_hash(notebook_path):
+    path = os.path.realpath(notebook_path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _CONTENT_HASHES_LOCK:
+        sha256 = _CONTENT_HASHES.get(key)
+    if sha256 is None:
+        with open(path, 'rb') as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+        with _CONTENT_HASHES_LOCK:
+            _CONTENT_HASHES[key] = sha256
+    return sha256
+
+
+def _notebook_dir(notebook_path, cache_dir):
+    path = os.path.realpath(notebook_path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}-{hashlib.sha256(path.encode()).hexdigest()[:12]}")
+
+
+def cell_count(notebook_path):
+    sha256 = content_hash(notebook_path)
+    if sha256 not in _CELL_COUNTS:
+        with open(notebook_path, 'r', encoding='utf-8') as f:
+            _CELL_COUNTS[sha256] = len(json.load(f).get('cells', []))
+    return _CELL_COUNTS[sha256]
+
+
+def render_options(cells=None, exclude_input=False, max_output_chars=None, max_image_width=None):
+    """
+    Options of a bounded render, normalized so equal options share one cache file ({} is the full render).
+    cells: (start, stop) slice of the notebook's cells. exclude_input: drop the code of every cell.
+    max_output_chars: cap on each text / html output, tables keep their leading rows.
+    max_image_width: downsample wider png / jpeg outputs (dropped instead when Pillow is missing).
+    """
+    options = {
+        'cells': [int(cells[0]), int(cells[1])] if cells is not None else None,
+        'exclude_input': bool(exclude_input),
+        'max_output_chars': int(max_output_chars) if max_output_chars else None,
+        'max_image_width': int(max_image_width) if max_image_width else None,
+    }
+    return {name: value for name, value in options.items() if value}
+
+
+def page_options(start=0, exclude_input=False):
+    """Bounded render of the page of cells starting at start, as shown by the Experiments tab"""
+    return render_options(cells=(start, start + CELLS_PER_PAGE), exclude_input=exclude_input, **BOUNDED_RENDER)
+
+
+def _options_tag(options):
+    if not options:
+        return ''
+    return '-' + hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def _render_prefix(notebook_path):
+    return f"{content_hash(notebook_path)[:16]}-nbconvert-{nbconvert_version()}-{TEMPLATE}"
+
+
+def render_path(notebook_path, cache_dir=NOTEBOOK_CACHE_DIR, options=None):
+    """Where the render of the notebook's current contents with the installed nbconvert (and options) lives"""
+    file_name = f"{_render_prefix(notebook_path)}{_options_tag(options)}.html"
+    return os.path.join(_notebook_dir(notebook_path, cache_dir), file_name)
+
+
+def _truncate_text(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}\n... {len(text) - max_chars} more characters not shown"
+
+
+def _truncate_table(html, max_chars):
+    """Keep the rows of an html table (DataFrame output) that fit in max_chars, None when it is not a table"""
+    rows = list(re.finditer(r'<tr\b.*?</tr>', html, re.S))
+    if not rows:
+        return None
+    kept = max(1, sum(row.end() <= max_chars for row in rows))
+    if kept == len(rows):
+        return html
+    note = f'<tr><td colspan="1000">... {len(rows) - kept} more rows not shown</td></tr>'
+    return html[:rows[kept - 1].end()] + note + html[rows[-1].end():]
+
+
+def _downsample_image(data, image_format, max_width):
+    """Base64 image no wider than max_width, None when it cannot be resized"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    image = Image.open(io.BytesIO(base64.b64decode(data)))
+    if image.width <= max_width:
+        return data
+    image = image.resize((max_width, max(1, round(image.height * max_width / image.width))))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def _bound_output(output, max_chars, max_width):
+    if output.get('output_type') == 'stream' and max_chars:
+        output['text'] = _truncate_text(output['text'], max_chars)
+    data = output.get('data')
+    if not data:
+        return
+    if max_chars:
+        html = data.get('text/html')
+        if html is not None and len(html) > max_chars:
+            table = _truncate_table(html, max_chars)
+            if table is not None:
+                data['text/html'] = table
+            else:
+                # Fall back to the (truncated) plain text of the same output
+                del data['text/html']
+        if 'text/plain' in data:
+            data['text/plain'] = _truncate_text(data['text/plain'], max_chars)
+    if max_width:
+        for mime, image_format in [('image/png', 'PNG'), ('image/jpeg', 'JPEG')]:
+            if mime not in data:
+                continue
+            image = _downsample_image(data[mime], image_format, max_width)
+            if image is None:
+                del data[mime]
+                data.setdefault('text/plain', '[image not shown]')
+            else:
+                data[mime] = image
+
+
+def render_notebook(notebook_path, options=None):
+    import nbformat
+    from nbconvert import HTMLExporter
+
+    options = options or {}
+    # Read the notebook
+    with open(notebook_path, 'r', encoding='utf-8') as f:
+        notebook = nbformat.read(f, as_version=4)
+
+    if 'cells' in options:
+        start, stop = options['cells']
+        notebook.cells = notebook.cells[start:stop]
+    max_chars, max_width = options.get('max_output_chars'), options.get('max_image_width')
+    if max_chars or max_width:
+        for cell in notebook.cells:
+            for output in cell.get('outputs', []):
+                _bound_output(output, max_chars, max_width)
+
+    # Convert the notebook to html using nbconvert
+    exporter = HTMLExporter(template_name=TEMPLATE, exclude_input=options.get('exclude_input', False))
+    html_body, _ = exporter.from_notebook_node(notebook)
+    return html_body
+
+
+@lru_cache(maxsize=None)
+def notebook_stylesheet():
+    """NOTEBOOK_STYLE plus the syntax highlighting rules of code cells, built once per process"""
+    from pygments.formatters import HtmlFormatter
+
+    return NOTEBOOK_STYLE + HtmlFormatter(style='default').get_style_defs('.highlight')
+
+
+def styled(html_body):
+    """A rendered page ready for the Experiments tab: the shared stylesheet, then the cells"""
+    return f"<style>{notebook_stylesheet()}</style>\n{html_body}"
+
+
+def _store_render(path, html_body, prefix):
+    notebook_dir = os.path.dirname(path)
+    os.makedirs(notebook_dir, exist_ok=True)
+    atomic_write(path, html_body)
+    # Drop renders of older contents / nbconvert versions, keep the other options of the current one
+    for old in os.listdir(notebook_dir):
+        if old.endswith('.html') and not (old.startswith(f"{prefix}.") or old.startswith(f"{prefix}-")):
+            os.remove(os.path.join(notebook_dir, old))
+
+
+def is_rendered(notebook_path, cache_dir=NOTEBOOK_CACHE_DIR, options=None):
+    return os.path.exists(render_path(notebook_path, cache_dir, options))
+
+
+def load_rendered(notebook_path, cache_dir=NOTEBOOK_CACHE_DIR, options=None):
+    """HTML of the notebook, converted with nbconvert only when no render of its current contents is on disk"""
+    path = render_path(notebook_path, cache_dir, options)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    html_body = render_notebook(notebook_path, options)
+    try:
+        _store_render(path, html_body, _render_prefix(notebook_path))
+    except OSError as e:
+        print(f"--load_rendered-- could not cache {notebook_path}: {e}")
+    return html_body
+
+
+def list_notebooks(notebook_folder):
+    return [f for f in os.listdir(notebook_folder) if f.endswith('.ipynb')]
+
+
+def prewarm(notebook_folder, cache_dir=NOTEBOOK_CACHE_DIR, options=None):
+    """Render every notebook in the folder that has no cached render yet, returns the paths that were converted"""
+    rendered = []
+    for name in list_notebooks(notebook_folder):
+        notebook_path = os.path.join(notebook_folder, name)
+        if not is_rendered(notebook_path, cache_dir, options):
+            load_rendered(notebook_path, cache_dir, options)
+            rendered.append(notebook_path)
+    return rendered
+
+
+def _signature(notebook_path):
+    # What the watcher compares: an edit changes the mtime (and usually the size) of the file
+    stat = os.stat(notebook_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _render_to_cache(notebook_path, cache_dir, options):
+    # Runs in a pool worker, the render lands in the cache where the app reads it
+    load_rendered(notebook_path, cache_dir, options)
+    return notebook_path
+
+
+class NotebookRenderer:
+    '''
+    Background renders of every notebook in a folder.
+    sync() scans the folder and submits the new or changed notebooks without a cached render to a process pool;
+    watch() runs sync() every NOTEBOOK_WATCH_SECONDS on a daemon thread. status() never blocks on nbconvert.
+    options (render_options) is what the folder is pre-rendered with; status() can ask for any other render.
+    A failed render stays failed until the notebook's (mtime, size) changes or retry() is called.
+    '''
+    def __init__(self, notebook_folder, cache_dir=NOTEBOOK_CACHE_DIR, max_workers=NOTEBOOK_RENDER_WORKERS, options=None):
+        self.notebook_folder = notebook_folder
+        self.cache_dir = cache_dir
+        self.options = options or {}
+        self.max_workers = max_workers
+        self._pool = self._new_pool()
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._signatures = {}
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def _new_pool(self):
+        # spawn rather than fork: the app process runs server threads that a forked child must not inherit
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _submit(self, notebook_path, options):
+        key = (notebook_path, _options_tag(options))
+        with self._lock:
+            future, _ = self._futures.get(key, (None, None))
+            if future is not None and not future.done():
+                return
+            # The contents the render is of, so a failure is only reported until the notebook is edited
+            try:
+                signature = _signature(notebook_path)
+            except FileNotFoundError:
+                signature = None
+            try:
+                future = self._pool.submit(_render_to_cache, notebook_path, self.cache_dir, options)
+            except BrokenProcessPool:
+                # A worker died (killed, out of memory): start a fresh pool rather than failing every later render
+                self._pool = self._new_pool()
+                future = self._pool.submit(_render_to_cache, notebook_path, self.cache_dir, options)
+            self._futures[key] = (future, signature)
+
+    def sync(self):
+        """Submit every notebook whose (mtime, size) changed since the last scan and has no render yet"""
+        seen = {}
+        for name in list_notebooks(self.notebook_folder):
+            notebook_path = os.path.join(self.notebook_folder, name)
+            try:
+                seen[notebook_path] = _signature(notebook_path)
+            except FileNotFoundError:
+                continue
+            if self._signatures.get(notebook_path) != seen[notebook_path] and not is_rendered(notebook_path, self.cache_dir, self.options):
+                self._submit(notebook_path, self.options)
+        self._signatures = seen
+
+    def watch(self, interval=NOTEBOOK_WATCH_SECONDS):
+        if self._watcher is not None:
+            return
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"--NotebookRenderer.watch-- {self.notebook_folder}: {e}")
+        self._watcher = threading.Thread(target=poll, name='notebook-renderer', daemon=True)
+        self._watcher.start()
+
+    def status(self, notebook_path, options=None):
+        """'rendered', 'rendering' or 'failed' for a notebook of the folder, queueing it when nothing is in flight"""
+        options = self.options if options is None else options
+        if is_rendered(notebook_path, self.cache_dir, options):
+            return 'rendered'
+        if self.error(notebook_path, options) is not None:
+            return 'failed'
+        # Nothing in flight (first look, an older render finished or failed before an edit): queue the current contents
+        self._submit(notebook_path, options)
+        return 'rendering'
+
+    def error(self, notebook_path, options=None):
+        """The exception of the last render of the notebook's current contents, None when it did not fail"""
+        options = self.options if options is None else options
+        with self._lock:
+            future, signature = self._futures.get((notebook_path, _options_tag(options)), (None, None))
+        if future is None or not future.done() or future.exception() is None:
+            return None
+        try:
+            changed = _signature(notebook_path) != signature
+        except FileNotFoundError:
+            changed = False
+        return None if changed else future.exception()
+
+    def retry(self, notebook_path, options=None):
+        """Render the notebook again after a failure, e.g. one caused by a worker that was killed"""
+        # A finished render is replaced, one still in flight is left to finish
+        self._submit(notebook_path, self.options if options is None else options)
+
+    def progress(self):
+        """(rendered, total) notebooks of the folder"""
+        paths = [os.path.join(self.notebook_folder, name) for name in list_notebooks(self.notebook_folder)]
+        return sum(is_rendered(path, self.cache_dir, self.options) for path in paths), len(paths)
+
+    def close(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
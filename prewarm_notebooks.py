@@ -0,0 +1,23 @@
+import argparse
+import time
+
+from consts import NOTEBOOK_FOLDER, NOTEBOOK_CACHE_DIR
+from notebook_cache import prewarm, list_notebooks, page_options
+
+
+def main(argv=None):
+    """Render every experiment notebook into the on-disk HTML cache the Experiments tab reads"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--folder', default=NOTEBOOK_FOLDER, help='notebook folder (default: %(default)s)')
+    parser.add_argument('--out', default=NOTEBOOK_CACHE_DIR, help='render cache root (default: %(default)s)')
+    parser.add_argument('--full', action='store_true', help='render whole notebooks instead of the first page the tab opens on')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    rendered = prewarm(args.folder, args.out, None if args.full else page_options())
+    total = len(list_notebooks(args.folder))
+    print(f"--prewarm_notebooks-- rendered {len(rendered)} of {total} notebooks in {time.time() - start:.1f}s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
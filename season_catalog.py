@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from consts import CACHE_DIR, OFFLINE, SEASON_CATALOG_TTL_SECONDS
+from utils import atomic_write
+
+# Season lists of the ESPN leagues, so the Venues tab does not ask ESPN on every rerun.
+#
+# Layout (one file per league):
+#   {CACHE_DIR}/espn/seasons/{sport}-{league}.json   -> sport, league, seasons, fetched_at
+#
+# A league's seasons change once a year: lists are served from memory / disk for SEASON_CATALOG_TTL_SECONDS,
+# then refetched. When ESPN fails (or NFL_STREAMLIT_OFFLINE=1) the last known list is served at any age;
+# a failed fetch is not retried for FAILED_REFRESH_RETRY_SECONDS, and without a stored list every call in that
+# window raises the failure again. Failures always surface as requests.RequestException.
+#
+# Every ESPN call is counted per (sport, league) for the process (upstream_calls()) and, when the caller
+# passes one, in a per session Counter, and logged with both counts so an uncached code path shows up.
+
+# (sport, league) -> persisted entry
+_CATALOG = {}
+# One fetch per league at a time, concurrent sessions wait for it instead of asking ESPN again
+_LEAGUE_LOCKS = defaultdict(threading.Lock)
+_LOCK = threading.Lock()
+# (sport, league) -> ESPN season list calls since the process started
+_UPSTREAM_CALLS = Counter()
+# (sport, league) -> time before which a failed refresh is not retried (espn_api_orm sleeps between its own retries)
+_RETRY_AT = {}
+# (sport, league) -> the RequestException of the last failed fetch, raised again during the backoff
+_LAST_ERRORS = {}
+FAILED_REFRESH_RETRY_SECONDS = 600
+
+
+def _catalog_path(sport, league):
+    return os.path.join(CACHE_DIR, 'espn', 'seasons', f"{sport}-{league}.json")
+
+
+def _read_entry(sport, league):
+    path = _catalog_path(sport, league)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"--get_seasons-- ignoring unreadable catalog {path}: {e}")
+        return None
+
+
+def _write_entry(sport, league, entry):
+    path = _catalog_path(sport, league)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, json.dumps(entry, indent=2))
+
+
+def _fetch_seasons(sport, league):
+    from espn_api_orm.league.api import ESPNLeagueAPI
+    from espn_api_orm.consts import ESPNSportTypes
+
+    return ESPNLeagueAPI(ESPNSportTypes(sport), league).get_seasons()
+
+
+def _count_call(sport, league, calls):
+    with _LOCK:
+        _UPSTREAM_CALLS[(sport, league)] += 1
+        total = _UPSTREAM_CALLS[(sport, league)]
+        if calls is not None:
+            calls[(sport, league)] += 1
+    session_count = calls[(sport, league)] if calls is not None else '-'
+    print(f"--get_seasons-- ESPN call for {sport}/{league}: #{total} in this process, #{session_count} in this session")
+
+
+def upstream_calls():
+    """ESPN season list calls per (sport, league) since the process started"""
+    with _LOCK:
+        return Counter(_UPSTREAM_CALLS)
+
+
+def get_seasons(sport, league, max_age=SEASON_CATALOG_TTL_SECONDS, calls=None):
+    """
+    Seasons of an ESPN league (in ESPN's order), from memory or {CACHE_DIR}/espn/seasons while younger than max_age seconds.
+    calls: optional Counter (e.g. kept in st.session_state) incremented for every ESPN call made on its behalf.
+    Raises requests.RequestException when ESPN cannot be reached (or failed less than FAILED_REFRESH_RETRY_SECONDS
+    ago) and no list of the league was ever stored.
+    """
+    key = (sport, league)
+    with _LOCK:
+        league_lock = _LEAGUE_LOCKS[key]
+    with league_lock:
+        entry = _CATALOG.get(key) or _read_entry(sport, league)
+        now = time.time()
+        retry_at = _RETRY_AT.get(key, 0)
+        if entry is not None and (OFFLINE or now - entry['fetched_at'] < max_age or now < retry_at):
+            _CATALOG[key] = entry
+            return list(entry['seasons'])
+        if OFFLINE:
+            raise requests.ConnectionError(f"Offline and no stored seasons for {sport}/{league} in {_catalog_path(sport, league)}")
+        if now < retry_at:
+            # Nothing stored and ESPN just failed: fail fast instead of every rerun waiting on ESPN again
+            raise requests.RequestException(f"{_LAST_ERRORS[key]} (not retried before {time.ctime(retry_at)})")
+
+        _count_call(sport, league, calls)
+        try:
+            seasons = _fetch_seasons(sport, league)
+            if not seasons:
+                raise requests.RequestException(f"ESPN returned no seasons for {sport}/{league}")
+        except Exception as e:
+            # espn_api_orm surfaces failures as bare Exception / None responses
+            error = e if isinstance(e, requests.RequestException) else requests.RequestException(f"ESPN seasons of {sport}/{league} failed: {e}")
+            _RETRY_AT[key] = now + FAILED_REFRESH_RETRY_SECONDS
+            _LAST_ERRORS[key] = error
+            if entry is None:
+                if error is e:
+                    raise
+                raise error from e
+            print(f"--get_seasons-- {sport}/{league} refresh failed, using the list from {time.ctime(entry['fetched_at'])}: {error}")
+            _CATALOG[key] = entry
+            return list(entry['seasons'])
+
+        entry = {'sport': sport, 'league': league, 'seasons': seasons, 'fetched_at': time.time()}
+        _RETRY_AT.pop(key, None)
+        _LAST_ERRORS.pop(key, None)
+        _CATALOG[key] = entry
+        try:
+            _write_entry(sport, league, entry)
+        except OSError as e:
+            print(f"--get_seasons-- could not store seasons of {sport}/{league}: {e}")
+        return list(seasons)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from consts import SNAPSHOT_DIR
+from utils import sort_partitions, atomic_write
+
+# Serving snapshot of the frames load_feature_store builds, written offline by build_snapshot.py.
+#
+# Layout (one directory per snapshot version):
+#   {SNAPSHOT_DIR}/{version}/{dataset,folded,player}.parquet
+#   {SNAPSHOT_DIR}/{version}/manifest.json   -> seasons, created_at, per frame file / rows / data_version
+#   {SNAPSHOT_DIR}/current.json              -> the version the app loads
+#
+# attrs['partitions'] (utils.PartitionIndex) is not JSON serializable, so attrs are stripped before
+# writing and rebuilt on read; data_version comes back from the manifest.
+
+
+def _write_json(path, payload):
+    atomic_write(path, json.dumps(payload, indent=2))
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def snapshot_version(frames):
+    digest = hashlib.sha256()
+    for name in sorted(frames):
+        digest.update(f"{name}:{frames[name].attrs.get('data_version')};".encode())
+    return digest.hexdigest()[:16]
+
+
+def write_snapshot(frames, seasons, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Write {name: frame} as parquet under a new version directory and point current.json at it.
+    Frames keep their dtypes and index; data_version is carried in the manifest.
+    """
+    version = snapshot_version(frames)
+    version_dir = os.path.join(snapshot_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    manifest = {
+        'version': version,
+        'seasons': list(seasons),
+        'created_at': time.time(),
+        'frames': {},
+    }
+    for name, df in frames.items():
+        file_name = f"{name}.parquet"
+        path = os.path.join(version_dir, file_name)
+        out = df.copy(deep=False)
+        out.attrs = {}
+        atomic_write(path, write=out.to_parquet)
+        manifest['frames'][name] = {
+            'file': file_name,
+            'rows': len(df),
+            'data_version': df.attrs.get('data_version'),
+        }
+    _write_json(os.path.join(version_dir, 'manifest.json'), manifest)
+    _write_json(os.path.join(snapshot_dir, 'current.json'), {'version': version})
+    # Older versions are no longer referenced by current.json
+    for old in os.listdir(snapshot_dir):
+        if old != version and os.path.isdir(os.path.join(snapshot_dir, old)):
+            shutil.rmtree(os.path.join(snapshot_dir, old), ignore_errors=True)
+    return manifest
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    current = _read_json(os.path.join(snapshot_dir, 'current.json'))
+    if current is None:
+        return None
+    return _read_json(os.path.join(snapshot_dir, current['version'], 'manifest.json'))
+
+
+def read_snapshot(name, seasons, snapshot_dir=SNAPSHOT_DIR, data_version=None):
+    """
+    Return (frame, data_version) for a snapshot frame built for exactly these seasons (and, when given, from
+    the upstream files of data_version), or None so the caller builds it live.
+    The frame comes back sorted with its PartitionIndex rebuilt.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None or manifest['seasons'] != list(seasons) or name not in manifest['frames']:
+        return None
+    entry = manifest['frames'][name]
+    if data_version is not None and entry['data_version'] != data_version:
+        print(f"--read_snapshot-- {name} {manifest['version']} was built from {entry['data_version']}, the mirror has {data_version}, building live")
+        return None
+    path = os.path.join(snapshot_dir, manifest['version'], entry['file'])
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as e:
+        print(f"--read_snapshot-- {name} {manifest['version']} unreadable, building live: {e}")
+        return None
+    if len(df) != entry['rows']:
+        print(f"--read_snapshot-- {name} {manifest['version']} has {len(df)} rows, manifest says {entry['rows']}, building live")
+        return None
+    return sort_partitions(df, reset_index=False), entry['data_version']
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from tabs.evaluation.metrics import memoize_per_version, played_games
+
+# Week by week replay of flat betting on the expected points system.
+#
+# Lines follow the feature store: spread_line, expected_spread and actual_away_spread are all home minus away
+# points (negative means the away team is favoured / won), so the away side covers when
+# actual_away_spread < spread_line and equal numbers push. Totals go over when actual_point_total > total_line.
+#
+# Every game is a column and every edge threshold a row of one (thresholds x games) matrix: a bet is placed
+# when |edge| >= threshold, profit is +100/110 units for a win at -110, -1 for a loss, 0 for a push.
+# The expected_* inputs are pre-game averages of earlier weeks only, and games are settled in (season, week)
+# order, so the running bankroll is what the strategy would have seen at the time.
+
+DEFAULT_THRESHOLDS = np.round(np.arange(0, 10.05, 0.1), 1)
+WIN_PAYOUT = 100 / 110
+
+# market -> (line column, expected column, actual column)
+MARKETS = {
+    'spread': ('spread_line', 'expected_spread', 'actual_away_spread'),
+    'total': ('total_line', 'expected_total', 'actual_point_total'),
+}
+
+BACKTEST_COLUMNS = ['bets', 'wins', 'losses', 'pushes', 'units', 'roi', 'hit_rate', 'max_drawdown']
+
+
+def _values(df, col):
+    return df[col].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def bet_outcomes(eval_df, market):
+    """
+    Per game (edge, result) for a market: edge > 0 backs the away side / the over, edge < 0 the home side / the under.
+    result is +1 when the backed side wins, -1 when it loses, 0 for a push or a game without a bet (missing inputs).
+    """
+    line_col, expected_col, actual_col = MARKETS[market]
+    line, expected, actual = _values(eval_df, line_col), _values(eval_df, expected_col), _values(eval_df, actual_col)
+    if market == 'spread':
+        # Away covers below the line (home minus away), so the away edge is how far the model sits below it
+        edge = line - expected
+        margin = line - actual
+    else:
+        edge = expected - line
+        margin = actual - line
+    usable = np.isfinite(edge) & np.isfinite(margin)
+    edge = np.where(usable, edge, 0.0)
+    result = np.sign(edge) * np.sign(np.where(usable, margin, 0.0))
+    return edge, result
+
+
+def _max_drawdown(cumulative, starts):
+    """Largest peak-to-trough fall of each row's running units inside every segment starting at starts"""
+    n_rows, n_games = cumulative.shape
+    segment = np.searchsorted(starts, np.arange(n_games), side='right') - 1
+    # Running units restart at every segment: subtract the total carried in from the segments before
+    carried = np.concatenate([np.zeros((n_rows, 1)), cumulative[:, starts[1:] - 1]], axis=1)
+    running = cumulative - carried[:, segment]
+    # Offset each segment above everything before it so maximum.accumulate never reaches back across segments
+    span = np.abs(running).max() * 2 + 1 if running.size else 1
+    offset = segment * span
+    peak = np.maximum.accumulate(running + offset, axis=1) - offset
+    # The bankroll starts every segment at 0 units, which counts as a peak
+    drawdown = np.maximum(peak, 0) - running
+    return np.maximum.reduceat(drawdown, starts, axis=1)
+
+
+def _summarise(bets, wins, losses, pushes, units, max_drawdown):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(bets > 0, units / bets, np.nan)
+        decided = wins + losses
+        hit_rate = np.where(decided > 0, wins / decided, np.nan)
+    return {
+        'bets': bets,
+        'wins': wins,
+        'losses': losses,
+        'pushes': pushes,
+        'units': np.round(units, 4),
+        'roi': np.round(roi, 4),
+        'hit_rate': np.round(hit_rate, 4),
+        'max_drawdown': np.round(max_drawdown, 4),
+    }
+
+
+def _market_backtest(eval_df, market, thresholds, seasons, starts):
+    edge, result = bet_outcomes(eval_df, market)
+    placed = (np.abs(edge)[None, :] >= thresholds[:, None]) & (edge != 0)[None, :]
+    win = placed & (result > 0)[None, :]
+    loss = placed & (result < 0)[None, :]
+    profit = np.where(win, WIN_PAYOUT, 0.0) - loss
+    cumulative = np.cumsum(profit, axis=1)
+
+    push = placed & ~win & ~loss
+    if not len(starts):
+        overall = _summarise(*[np.zeros(len(thresholds))] * 6)
+        by_season = {name: np.zeros((len(thresholds), 0)) for name in BACKTEST_COLUMNS}
+    else:
+        # Whole replay as a single segment, then every season as its own segment of the same running units
+        overall = _summarise(
+            placed.sum(axis=1), win.sum(axis=1), loss.sum(axis=1), push.sum(axis=1),
+            cumulative[:, -1], _max_drawdown(cumulative, np.array([0]))[:, 0],
+        )
+        count = lambda m: np.add.reduceat(m.astype('int64'), starts, axis=1)
+        by_season = _summarise(
+            count(placed), count(win), count(loss), count(push),
+            np.add.reduceat(profit, starts, axis=1), _max_drawdown(cumulative, starts),
+        )
+    overall = pd.DataFrame(overall, index=pd.MultiIndex.from_product([[market], thresholds], names=['market', 'threshold']))
+    # Season major rows: transpose so the flattened (seasons x thresholds) order matches the index
+    by_season = pd.DataFrame(
+        {name: values.T.ravel() for name, values in by_season.items()},
+        index=pd.MultiIndex.from_product([[market], seasons, thresholds], names=['market', 'season', 'threshold']),
+    )
+    return overall, by_season
+
+
+def _backtest(dataset_df, thresholds):
+    eval_df = played_games(dataset_df)
+    # Settle games in the order they were played; loader frames already are, filtered frames may not be
+    eval_df = eval_df.iloc[np.lexsort([eval_df['week'].to_numpy(), eval_df['season'].to_numpy()])]
+    season = eval_df['season'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, season[1:] != season[:-1]]) if len(season) else np.array([], dtype='int64')
+    seasons = season[starts]
+
+    results = [_market_backtest(eval_df, market, thresholds, seasons, starts) for market in MARKETS]
+    return {
+        'overall': pd.concat([overall for overall, _ in results])[BACKTEST_COLUMNS],
+        'seasons': pd.concat([by_season for _, by_season in results])[BACKTEST_COLUMNS],
+    }
+
+
+def backtest(dataset_df, thresholds=None):
+    """
+    Flat -110 betting on the expected points system for every market and edge threshold in one vectorized pass.
+    Returns {'overall': frame indexed by (market, threshold), 'seasons': frame indexed by (market, season, threshold)}
+    with BACKTEST_COLUMNS (units are profit in stakes, max_drawdown in stakes). Memoized per data_version and thresholds.
+    """
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else np.asarray(thresholds, dtype='float64')
+    key = ('backtest', tuple(thresholds.tolist()))
+    results = memoize_per_version(dataset_df, key, lambda: _backtest(dataset_df, thresholds))
+    return {name: frame.copy() for name, frame in results.items()}
@@ -1,101 +1,59 @@
 import streamlit as st
 import pandas as pd
 
-from utils import transform_teams_for_current_week
-from sklearn.metrics import accuracy_score, mean_absolute_error
+from tabs.evaluation.metrics import season_evaluation_report, season_bootstrap_report, evaluation_cube
+from tabs.evaluation.backtest import backtest, MARKETS
 
 
-def make_evaluation_report(eval_df):
-    try:
-        # Actual values
-        actual_wp = eval_df['actual_away_team_win'].values
-        actual_spread = eval_df['actual_away_spread'].values
-        actual_total = eval_df['actual_point_total'].values
-
-        # --- Vegas Baseline ---
-        vegas_wp = eval_df['spread_line'].apply(lambda x: 1 if x < 0 else 0).values
-        vegas_spread = eval_df['spread_line'].values
-        vegas_total = eval_df['total_line'].values
-
-        # --- Expected Points Averages ---
-        exp_avg_wp = eval_df['expected_spread'].apply(lambda x: 1 if x < 0 else 0).values
-        exp_avg_spread = eval_df['expected_spread'].values
-        exp_avg_total = eval_df['away_expected_points'].values + eval_df['home_expected_points'].values
-
-        # --- Spread and Total Coverage ---
-        eval_df['expected_system_covered_spread'] = (eval_df['away_expected_points'] + eval_df['spread_line'] >= eval_df['home_expected_points'])
-        eval_df['expected_system_covered_spread'] = eval_df['expected_system_covered_spread'] == eval_df['actual_away_team_covered_spread']
-
-        eval_df['expected_system_under_covered_total'] = (eval_df['home_expected_points'] + eval_df['away_expected_points'] <= eval_df['total_line'])
-        eval_df['expected_system_under_covered_total'] = eval_df['expected_system_under_covered_total'] == eval_df['actual_under_covered']
-
-        return {
-            'games': eval_df.shape[0],
-            'vegas_wp_accuracy': round(accuracy_score(actual_wp, vegas_wp),4),
-            'vegas_spread_mae': round(mean_absolute_error(actual_spread, vegas_spread),4),
-            'vegas_total_mae': round(mean_absolute_error(actual_total, vegas_total),4),
-            'expected_wp_accuracy': round(accuracy_score(actual_wp, exp_avg_wp),4),
-            'expected_spread_mae': round(mean_absolute_error(actual_spread, exp_avg_spread),4),
-            'expected_total_mae': round(mean_absolute_error(actual_total, exp_avg_total),4),
-            'expected_away_points_mae': round(mean_absolute_error(eval_df['actual_away_points'], eval_df['away_expected_points']),4),
-            'expected_home_points_mae': round(mean_absolute_error(eval_df['actual_home_points'], eval_df['home_expected_points']),4),
-            'expected_system_correct_spread_percent': round(eval_df['expected_system_covered_spread'].sum() / len(eval_df),4),
-            'expected_system_correct_total_percent': round(eval_df['expected_system_under_covered_total'].sum() / len(eval_df), 4)
-        }
-    except Exception as e:
-        return {
-            'games': eval_df.shape[0],
-            'vegas_wp_accuracy': 0,
-            'vegas_spread_mae': 0,
-            'vegas_total_mae': 0,
-            'expected_wp_accuracy': 0,
-            'expected_spread_mae': 0,
-            'expected_total_mae': 0,
-            'expected_away_points_mae': 0,
-            'expected_home_points_mae':0,
-            'expected_system_correct_spread_percent':0,
-            'expected_system_correct_total_percent': 0,
-        }
-
-def display_evaulation_tab(dataset_df, SEASONS):
-    st.subheader("Evaluations", anchor=False)
-    # Load data for the 2024 season
-    # Select season to evaluate
-
-    evals = []
-
-    for season in SEASONS:
-        eval_df = dataset_df[(dataset_df['season'] == season) & (dataset_df['actual_away_points'].notnull())].copy()
-        if eval_df.shape[0] == 0:
-            continue
-        eval_report = make_evaluation_report(eval_df)
-        eval_report['season'] = str(season)
-        evals.append(eval_report)
-    full = make_evaluation_report(dataset_df[(dataset_df['actual_away_points'].notnull())].copy())
-    full['season'] = 'Full'
-    evals.append(full)
-
-    evals = pd.DataFrame(evals)
-    evals.index = evals.season
-    evals = evals.drop(columns='season')
-    st.dataframe(evals)
-
+# Rolling chart metric -> (Vegas baseline column, expected points system column)
+ROLLING_METRICS = {
+    'Spread MAE': ('vegas_spread_mae', 'expected_spread_mae'),
+    'Total MAE': ('vegas_total_mae', 'expected_total_mae'),
+    'WP Accuracy': ('vegas_wp_accuracy', 'expected_wp_accuracy'),
+    'Spread Cover %': ('away_cover_percent', 'expected_system_correct_spread_percent'),
+    'Total Cover %': ('under_percent', 'expected_system_correct_total_percent'),
+}
 
+BREAKDOWNS = {
+    'Favourite': 'favourites',
+    'Team': 'teams',
+    'Team as Favourite / Underdog': 'team_favourites',
+}
 
 def display_evaulation_tab(dataset_df, SEASONS):
     st.subheader("Evaluations", anchor=False)
-    evals = []
-    for season in SEASONS:
-        eval_df = dataset_df[(dataset_df['season'] == season) & (dataset_df['actual_away_points'].notnull())].copy()
-        if eval_df.shape[0] == 0:
-            continue
-        eval_report = make_evaluation_report(eval_df)
-        eval_report['season'] = str(season)
-        evals.append(eval_report)
-    full = make_evaluation_report(dataset_df[(dataset_df['actual_away_points'].notnull())].copy())
-    full['season'] = 'Full'
-    evals.append(full)
-    evals = pd.DataFrame(evals)
-    evals.index = evals.season
-    evals = evals.drop(columns='season')
-    st.dataframe(evals)
+    # One grouped pass over every season (plus Full), memoized per data version
+    st.dataframe(season_evaluation_report(dataset_df, SEASONS))
+    if st.toggle('Show 95% bootstrap intervals', key='evaluation_bootstrap'):
+        st.dataframe(season_bootstrap_report(dataset_df, SEASONS))
+
+    cube = evaluation_cube(dataset_df)
+    if cube.weeks.empty:
+        return
+    st.write("Rolling Evaluation")
+    season_options = sorted(cube.weeks.index.get_level_values('season').unique())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        season = st.selectbox('Select Season:', season_options, index=len(season_options) - 1, key='evaluation_season')
+    with col2:
+        metric = st.selectbox('Metric:', list(ROLLING_METRICS), key='evaluation_metric')
+    with col3:
+        window = st.slider('Rolling Window (weeks):', 1, 18, 4, key='evaluation_window')
+    vegas_col, expected_col = ROLLING_METRICS[metric]
+    rolling = cube.rolling(window).loc[season]
+    st.line_chart(rolling[[vegas_col, expected_col]].rename(columns={vegas_col: 'vegas', expected_col: 'expected_points'}))
+
+    breakdown = st.selectbox('Break Down By:', list(BREAKDOWNS), key='evaluation_breakdown')
+    st.dataframe(getattr(cube, BREAKDOWNS[breakdown]))
+
+    st.write("Backtest (flat bets at -110 when |expected - line| clears the edge threshold)")
+    results = backtest(dataset_df)
+    market = st.selectbox('Market:', list(MARKETS), key='backtest_market')
+    overall = results['overall'].loc[market]
+    st.line_chart(overall[['roi', 'hit_rate']])
+    threshold = st.select_slider('Edge Threshold:', options=list(overall.index), value=overall.index[len(overall) // 2], key='backtest_threshold')
+    by_season = results['seasons'].loc[market].xs(threshold, level='threshold')
+    by_season.index = by_season.index.astype(str)
+    summary = overall.loc[[threshold]]
+    summary.index = ['Full']
+    st.dataframe(pd.concat([by_season, summary]))
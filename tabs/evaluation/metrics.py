@@ -0,0 +1,385 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils import frame_version
+
+# Grouped version of make_evaluation_report.
+#
+# The row level inputs (hits and absolute errors) are built once per frame, rows are ordered by group
+# and every metric is one np.add.reduceat over the group boundaries. Sums run in the same dtype sklearn
+# uses (float32 errors stay float32) so the rounded numbers are identical to the per-season reports,
+# including the all-zeros row make_evaluation_report returns when sklearn rejects a group (missing or
+# non-finite values, non-integral win labels).
+
+REPORT_COLUMNS = [
+    'games',
+    'vegas_wp_accuracy',
+    'vegas_spread_mae',
+    'vegas_total_mae',
+    'expected_wp_accuracy',
+    'expected_spread_mae',
+    'expected_total_mae',
+    'expected_away_points_mae',
+    'expected_home_points_mae',
+    'expected_system_correct_spread_percent',
+    'expected_system_correct_total_percent',
+]
+
+ACCURACY_COLUMNS = ['vegas_wp_accuracy', 'expected_wp_accuracy']
+MAE_COLUMNS = [
+    'vegas_spread_mae',
+    'vegas_total_mae',
+    'expected_spread_mae',
+    'expected_total_mae',
+    'expected_away_points_mae',
+    'expected_home_points_mae',
+]
+PERCENT_COLUMNS = ['expected_system_correct_spread_percent', 'expected_system_correct_total_percent']
+# Market base rates the system cover picks are measured against, only carried by the cube
+RATE_COLUMNS = ['away_cover_percent', 'under_percent']
+CUBE_COLUMNS = REPORT_COLUMNS + RATE_COLUMNS
+
+GROUPINGS = {
+    None: [],
+    'season': ['season'],
+    'week': ['season', 'week'],
+    'team': ['team'],
+    'favourite': ['favourite'],
+    'team_favourite': ['team', 'favourite'],
+}
+
+# Resampled row indices drawn per batch (batch = BOOTSTRAP_CHUNK_SIZE // games). The peak is two int64 arrays of
+# that many elements, the indices and their bincount: 2M x 8 bytes x 2 = 32MB whatever the resample count
+BOOTSTRAP_CHUNK_SIZE = 2_000_000
+BOOTSTRAP_METRICS = ACCURACY_COLUMNS + MAE_COLUMNS + PERCENT_COLUMNS
+
+EVALUATION_CACHE_SIZE = 32
+_EVALUATION_CACHE = OrderedDict()
+_EVALUATION_LOCK = threading.Lock()
+
+
+def _float_values(series):
+    if series.dtype == np.float32 or series.dtype == np.float64:
+        return series.to_numpy()
+    return series.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _abs_error(actual, predicted):
+    """|predicted - actual| in sklearn's dtype (float32 only when both sides are float32) and the rows it rejects"""
+    if actual.dtype != predicted.dtype:
+        actual, predicted = actual.astype('float64'), predicted.astype('float64')
+    error = np.abs(predicted - actual)
+    return error, ~(np.isfinite(actual) & np.isfinite(predicted))
+
+
+def evaluation_rows(eval_df):
+    """
+    Row level inputs of make_evaluation_report for already filtered (actual_away_points not null) games.
+    Returns {name: array} with hit counts, absolute errors and an 'invalid' flag for rows sklearn would reject.
+    """
+    actual_wp = _float_values(eval_df['actual_away_team_win'])
+    spread_line = _float_values(eval_df['spread_line'])
+    expected_spread = _float_values(eval_df['expected_spread'])
+    away_expected = _float_values(eval_df['away_expected_points'])
+    home_expected = _float_values(eval_df['home_expected_points'])
+    total_line = _float_values(eval_df['total_line'])
+
+    # accuracy_score refuses missing / non-finite / continuous labels
+    invalid = ~np.isfinite(actual_wp)
+    invalid |= np.where(invalid, False, actual_wp != np.round(actual_wp))
+    rows = {
+        'vegas_wp_accuracy': (actual_wp == (spread_line < 0)).astype('int64'),
+        'expected_wp_accuracy': (actual_wp == (expected_spread < 0)).astype('int64'),
+    }
+
+    pairs = {
+        'vegas_spread_mae': ('actual_away_spread', spread_line),
+        'vegas_total_mae': ('actual_point_total', total_line),
+        'expected_spread_mae': ('actual_away_spread', expected_spread),
+        'expected_total_mae': ('actual_point_total', away_expected + home_expected),
+        'expected_away_points_mae': ('actual_away_points', away_expected),
+        'expected_home_points_mae': ('actual_home_points', home_expected),
+    }
+    for name, (actual_col, predicted) in pairs.items():
+        error, rejected = _abs_error(_float_values(eval_df[actual_col]), predicted)
+        rows[name] = error
+        invalid |= rejected
+
+    covered = _float_values(eval_df['actual_away_team_covered_spread'])
+    under = _float_values(eval_df['actual_under_covered'])
+    rows['expected_system_correct_spread_percent'] = ((away_expected + spread_line >= home_expected) == covered).astype('int64')
+    rows['expected_system_correct_total_percent'] = ((home_expected + away_expected <= total_line) == under).astype('int64')
+    rows['away_cover_percent'] = (covered == 1).astype('int64')
+    rows['under_percent'] = (under == 1).astype('int64')
+    rows['invalid'] = invalid.astype('int64')
+    return rows
+
+
+def _favourite_labels(spread_line, favourite, underdog):
+    # spread_line is from the away side: negative means the away team is favoured
+    return np.select([spread_line < 0, spread_line > 0, spread_line == 0], [favourite, underdog, "pick'em"], 'no line')
+
+
+def _group_keys(eval_df, by, rows):
+    """
+    Per-row group labels (a list of arrays) for a grouping.
+    Team groupings stack every game once per team, the favourite bucket is then from that team's side.
+    """
+    spread_line = _float_values(eval_df['spread_line'])
+    if by in ('team', 'team_favourite'):
+        n = len(eval_df)
+        keys = [np.concatenate([eval_df['away_team'].astype(str).to_numpy(), eval_df['home_team'].astype(str).to_numpy()])]
+        if by == 'team_favourite':
+            keys.append(np.concatenate([
+                _favourite_labels(spread_line, 'favourite', 'underdog'),
+                _favourite_labels(spread_line, 'underdog', 'favourite'),
+            ]))
+        rows = {name: np.concatenate([values, values]) for name, values in rows.items()}
+        # Games keep their original order inside each team
+        position = np.concatenate([np.arange(n), np.arange(n)])
+        return keys, rows, position
+    if by == 'favourite':
+        return [_favourite_labels(spread_line, 'away favourite', 'home favourite')], rows, np.arange(len(eval_df))
+    return [eval_df[col].to_numpy() for col in GROUPINGS[by]], rows, np.arange(len(eval_df))
+
+
+def _group_order(keys, position):
+    """Row order that keeps every group together (original order inside it), group start offsets and group labels"""
+    if not keys:
+        # A single group, reported even when empty like make_evaluation_report on no games
+        return np.arange(len(position)), np.array([0]), []
+    order = np.lexsort([position] + keys[::-1])
+    sorted_keys = [k[order] for k in keys]
+    changed = np.zeros(len(order), dtype=bool)
+    changed[:1] = True
+    for k in sorted_keys:
+        changed[1:] |= k[1:] != k[:-1]
+    starts = np.flatnonzero(changed)
+    return order, starts, [k[starts] for k in sorted_keys]
+
+
+def _reduce_groups(keys, rows, position):
+    """np.add.reduceat of every row input over the groups in keys, returns (group labels, sums, counts)"""
+    order, starts, labels = _group_order(keys, position)
+    counts = np.diff(np.r_[starts, len(order)])
+    if not keys:
+        return labels, {name: np.add.reduce(values, keepdims=True) for name, values in rows.items()}, counts
+    if not len(starts):
+        return labels, {name: values[:0] for name, values in rows.items()}, counts
+    # reduceat seeds each group with its first value and pairwise sums the rest, while np.add.reduce (and so
+    # sklearn) pairwise sums the whole group from zero: a leading zero per group makes float32 sums bit-identical
+    padded = starts + np.arange(len(starts))
+    sums = {name: np.add.reduceat(np.insert(values[order], starts, 0), padded) for name, values in rows.items()}
+    return labels, sums, counts
+
+
+def _report_frame(labels, sums, counts, by, columns=REPORT_COLUMNS):
+    report = pd.DataFrame({'games': counts.astype('int64')})
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name in ACCURACY_COLUMNS:
+            # accuracy_score returns a python float, rounded with round() rather than numpy's rounding
+            report[name] = [round(float(s / n), 4) if n else 0.0 for s, n in zip(sums[name], counts)]
+        for name in MAE_COLUMNS:
+            report[name] = np.round(sums[name] / counts.astype(sums[name].dtype), 4)
+        for name in PERCENT_COLUMNS + RATE_COLUMNS:
+            report[name] = np.round(sums[name] / counts, 4)
+    report = report[columns]
+    report.loc[(sums['invalid'] > 0) | (counts == 0), columns[1:]] = 0
+    if labels:
+        index = pd.MultiIndex.from_arrays(labels, names=GROUPINGS[by]) if len(labels) > 1 else pd.Index(labels[0], name=GROUPINGS[by][0])
+        report.index = index
+    return report
+
+
+def memoize_per_version(dataset_df, key, build):
+    """build() memoized under (data_version,) + key for loader frames, called directly for anything else"""
+    # Only full loader frames are memoized
+    version = frame_version(dataset_df)
+    if version is None:
+        return build()
+    key = (version,) + key
+    with _EVALUATION_LOCK:
+        cached = _EVALUATION_CACHE.get(key)
+        if cached is not None:
+            _EVALUATION_CACHE.move_to_end(key)
+    if cached is None:
+        cached = build()
+        with _EVALUATION_LOCK:
+            _EVALUATION_CACHE[key] = cached
+            while len(_EVALUATION_CACHE) > EVALUATION_CACHE_SIZE:
+                _EVALUATION_CACHE.popitem(last=False)
+    return cached
+
+
+def played_games(dataset_df):
+    """Games with a final score, the rows every evaluation runs on"""
+    return dataset_df[dataset_df['actual_away_points'].notnull()]
+
+
+def _evaluation_metrics(dataset_df, by):
+    eval_df = played_games(dataset_df)
+    labels, sums, counts = _reduce_groups(*_group_keys(eval_df, by, evaluation_rows(eval_df)))
+    return _report_frame(labels, sums, counts, by)
+
+
+def evaluation_metrics(dataset_df, by='season'):
+    """
+    make_evaluation_report for every group of played games in one pass.
+    by: None (all games), 'season', 'week' (season, week), 'team' (every game counts for both teams),
+    'favourite' (away favourite / home favourite / pick'em) or 'team_favourite' (team as favourite / underdog).
+    Returns a frame of REPORT_COLUMNS indexed by the group, memoized per data_version for loader frames.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown evaluation grouping {by!r}, expected one of {list(GROUPINGS)}")
+    return memoize_per_version(dataset_df, (by,), lambda: _evaluation_metrics(dataset_df, by)).copy()
+
+
+class EvaluationCube:
+    '''
+    Evaluation metrics (CUBE_COLUMNS) of one frame for every slice the Evaluation tab offers, from one set of row inputs.
+    weeks, teams, favourites and team_favourites are per group frames; rolling() and window() read N-week windows
+    off running totals over the chronological (season, week) axis, so any window is a single subtraction.
+    Window sums run in float64, so a one-week window can differ from weeks in the last rounded digit.
+    '''
+    def __init__(self, dataset_df):
+        eval_df = played_games(dataset_df)
+        rows = evaluation_rows(eval_df)
+        labels, sums, counts = _reduce_groups(*_group_keys(eval_df, 'week', rows))
+        self.weeks = _report_frame(labels, sums, counts, 'week', CUBE_COLUMNS)
+        self.teams = self._grouped(eval_df, rows, 'team')
+        self.favourites = self._grouped(eval_df, rows, 'favourite')
+        self.team_favourites = self._grouped(eval_df, rows, 'team_favourite')
+
+        self._labels = labels
+        # Leading zero row: weeks [a, b) of the chronological order sum to total[b] - total[a]
+        self._counts = np.r_[0, np.cumsum(counts)]
+        self._totals = {
+            name: np.r_[0, np.cumsum(values, dtype='float64' if values.dtype.kind == 'f' else 'int64')]
+            for name, values in sums.items()
+        }
+        seasons = labels[0] if labels else np.array([], dtype='int64')
+        self._season_start = np.r_[0, np.flatnonzero(np.diff(seasons)) + 1].astype('int64') if len(seasons) else seasons
+
+    @staticmethod
+    def _grouped(eval_df, rows, by):
+        labels, sums, counts = _reduce_groups(*_group_keys(eval_df, by, rows))
+        return _report_frame(labels, sums, counts, by, CUBE_COLUMNS)
+
+    def _window_starts(self, end, weeks, within_season):
+        start = np.maximum(end - weeks, 0)
+        if within_season and len(end):
+            first = self._season_start[np.searchsorted(self._season_start, end - 1, side='right') - 1]
+            start = np.maximum(start, first)
+        return start
+
+    def _windows(self, end, weeks, within_season):
+        start = self._window_starts(end, weeks, within_season)
+        sums = {name: total[end] - total[start] for name, total in self._totals.items()}
+        labels = [label[end - 1] for label in self._labels]
+        return _report_frame(labels, sums, self._counts[end] - self._counts[start], 'week', CUBE_COLUMNS)
+
+    def rolling(self, weeks, within_season=True):
+        """Metrics over the `weeks` weeks ending at every (season, week), clipped to the season unless within_season=False"""
+        if weeks < 1:
+            raise ValueError(f"Rolling window needs at least one week, got {weeks}")
+        return self._windows(np.arange(1, len(self.weeks) + 1), weeks, within_season)
+
+    def window(self, season, week, weeks, within_season=True):
+        """Metrics over the `weeks` weeks ending at (season, week) as a Series"""
+        if weeks < 1:
+            raise ValueError(f"Rolling window needs at least one week, got {weeks}")
+        end = self.weeks.index.get_loc((season, week)) + 1
+        return self._windows(np.array([end]), weeks, within_season).iloc[0]
+
+
+def evaluation_cube(dataset_df):
+    """EvaluationCube of the played games, built once per data_version for loader frames"""
+    return memoize_per_version(dataset_df, ('cube',), lambda: EvaluationCube(dataset_df))
+
+
+def season_evaluation_report(dataset_df, seasons):
+    """The Evaluation tab table: one row per season in seasons with played games, then 'Full'"""
+    by_season = evaluation_metrics(dataset_df, 'season')
+    full = evaluation_metrics(dataset_df, None)
+    report = by_season.loc[[s for s in seasons if s in by_season.index]]
+    report.index = report.index.astype(str)
+    full.index = ['Full']
+    report = pd.concat([report, full])
+    report.index.name = 'season'
+    return report
+
+
+def _bootstrap_means(matrix, n_resamples, rng):
+    """Means of matrix columns over n_resamples resamples of its rows, one index matrix per batch"""
+    n = len(matrix)
+    batch = max(1, BOOTSTRAP_CHUNK_SIZE // n)
+    means = []
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        index = rng.integers(0, n, size=(size, n))
+        # How often each row was drawn per resample, so every metric of the batch is a single matmul
+        # Offsets added in place, a sum would be a third array of the batch size
+        index += (np.arange(size) * n)[:, None]
+        draws = np.bincount(index.ravel(), minlength=size * n).reshape(size, n)
+        means.append(draws @ matrix / n)
+    return np.concatenate(means)
+
+
+def _bootstrap(dataset_df, by, n_resamples, confidence, seed):
+    eval_df = played_games(dataset_df)
+    keys, rows, position = _group_keys(eval_df, by, evaluation_rows(eval_df))
+    order, starts, labels = _group_order(keys, position)
+    stops = np.r_[starts[1:], len(order)]
+    matrix = np.column_stack([rows[name][order].astype('float64') for name in BOOTSTRAP_METRICS])
+    invalid = rows['invalid'][order]
+    tail = (1 - confidence) / 2
+
+    bounds = np.zeros((len(starts), 2, len(BOOTSTRAP_METRICS)))
+    for i, (start, stop) in enumerate(zip(starts, stops)):
+        if stop == start or invalid[start:stop].any():
+            # make_evaluation_report reports zeros for these groups, so do the intervals
+            continue
+        # Seeded from the group label rather than its position so adding a season leaves the others unchanged
+        label = '|'.join(str(k[i]) for k in labels)
+        rng = np.random.default_rng([seed, zlib.crc32(label.encode())])
+        means = _bootstrap_means(matrix[start:stop], n_resamples, rng)
+        bounds[i] = np.quantile(means, [tail, 1 - tail], axis=0)
+
+    report = pd.DataFrame({'games': np.diff(np.r_[starts, len(order)]).astype('int64')})
+    for j, name in enumerate(BOOTSTRAP_METRICS):
+        report[f'{name}_low'] = np.round(bounds[:, 0, j], 4)
+        report[f'{name}_high'] = np.round(bounds[:, 1, j], 4)
+    if labels:
+        report.index = pd.MultiIndex.from_arrays(labels, names=GROUPINGS[by]) if len(labels) > 1 else pd.Index(labels[0], name=GROUPINGS[by][0])
+    return report
+
+
+def bootstrap_metrics(dataset_df, by='season', n_resamples=10_000, confidence=0.95, seed=0):
+    """
+    Percentile bootstrap intervals of every make_evaluation_report metric per group (see evaluation_metrics for by).
+    Games are resampled with replacement inside each group from np.random.default_rng seeded with (seed, group label),
+    so the intervals are reproducible. Columns are games plus {metric}_low / {metric}_high for BOOTSTRAP_METRICS.
+    Memoized per data_version and arguments for loader frames.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown evaluation grouping {by!r}, expected one of {list(GROUPINGS)}")
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+    key = ('bootstrap', by, int(n_resamples), float(confidence), seed)
+    return memoize_per_version(dataset_df, key, lambda: _bootstrap(dataset_df, by, int(n_resamples), confidence, seed)).copy()
+
+
+def season_bootstrap_report(dataset_df, seasons, n_resamples=10_000, confidence=0.95, seed=0):
+    """bootstrap_metrics laid out like season_evaluation_report: seasons in seasons with played games, then 'Full'"""
+    by_season = bootstrap_metrics(dataset_df, 'season', n_resamples, confidence, seed)
+    full = bootstrap_metrics(dataset_df, None, n_resamples, confidence, seed)
+    report = by_season.loc[[s for s in seasons if s in by_season.index]]
+    report.index = report.index.astype(str)
+    full.index = ['Full']
+    report = pd.concat([report, full])
+    report.index.name = 'season'
+    return report
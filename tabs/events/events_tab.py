@@ -1,7 +1,7 @@
 # events_tab.py
 import streamlit as st
 import pandas as pd
-from utils import transform_teams_for_current_week
+from utils import transform_teams_for_current_week, build_key, get_partition
 from st_aggrid import AgGrid, JsCode, GridUpdateMode
 
 # ===================== CSS (center everything, sane widths) =====================
@@ -351,7 +351,8 @@ def _render_games_with_detail(filtered_df: pd.DataFrame, folded_df: pd.DataFrame
     df = _ensure_game_id(filtered_df).copy()
 
     # Team display
-    df['matchup_display'] = df.apply(lambda r: f"{r.get('away_team','')} @ {r.get('home_team','')}".strip(' @'), axis=1)
+    teams = df.reindex(columns=['away_team', 'home_team'], fill_value='')
+    df['matchup_display'] = build_key(teams, ['away_team', 'home_team'], sep=' @ ').str.strip(' @')
     if 'team_record' not in df.columns:
         df['team_record'] = ""
 
@@ -493,9 +494,10 @@ def display_event_tab(dataset_df: pd.DataFrame, folded_df: pd.DataFrame):
     default_season_idx = season_options.index(max(season_options))
     season = st.selectbox('Select Season:', season_options, index=default_season_idx, key='event_season')
 
-    week_options = sorted(dataset_df[dataset_df['season'] == season]['week'].unique())
+    season_df = get_partition(dataset_df, season)
+    week_options = sorted(season_df['week'].unique())
     if season == max(season_options):
-        s_df = dataset_df[((dataset_df['season'] == season) & (dataset_df['actual_away_points'].isnull()))].copy()
+        s_df = season_df[season_df['actual_away_points'].isnull()]
         if s_df.shape[0] == 0:
             default_week_idx = week_options.index(max(week_options))
         else:
@@ -504,7 +506,7 @@ def display_event_tab(dataset_df: pd.DataFrame, folded_df: pd.DataFrame):
         default_week_idx = week_options.index(max(week_options))
     week = st.selectbox('Select Week:', week_options, index=default_week_idx, key='event_week')
 
-    filtered_df = dataset_df[((dataset_df['season'] == season) & (dataset_df['week'] == week))].copy()
+    filtered_df = get_partition(dataset_df, season, week).copy()
 
     for col in ['away_offensive_rank','away_defensive_rank','home_offensive_rank','home_defensive_rank']:
         if col in filtered_df.columns:
@@ -1,31 +1,63 @@
 import streamlit as st
 import os
 
-from sklearn.metrics import accuracy_score, mean_absolute_error
-from consts import GLOSSARY
-from loaders import load_feature_store
-from streamlit_controller import STYLE
-import pandas as pd
-import nbformat
-from nbconvert import HTMLExporter
-import datetime
-
-def load_notebook_as_html(notebook_path):
-    # Read the notebook
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        notebook = nbformat.read(f, as_version=4)
-
-    # Convert the notebook to markdown using nbconvert
-    exporter = HTMLExporter()
-    html_body, _ = exporter.from_notebook_node(notebook)
-    return html_body
+from notebook_cache import load_rendered, list_notebooks, page_options, cell_count, styled, NotebookRenderer, CELLS_PER_PAGE
+
+
+def load_notebook_as_html(notebook_path, options=None):
+    # Served from the on-disk render cache, nbconvert only runs when the notebook, nbconvert or the options changed
+    return load_rendered(notebook_path, options=options)
+
+
+@st.cache_resource
+def notebook_renderer(notebook_folder):
+    """One background renderer per folder for the whole process, started by the first session"""
+    # The background render is the first page, which is what opening a notebook shows
+    renderer = NotebookRenderer(notebook_folder, options=page_options())
+    renderer.sync()
+    renderer.watch()
+    return renderer
+
+
+@st.fragment(run_every=2)
+def _wait_for_render(renderer, notebook_path, options):
+    # Polls without blocking the rest of the page, then reruns the app once the render is on disk
+    if renderer.status(notebook_path, options) != 'rendering':
+        st.rerun()
+    rendered, total = renderer.progress()
+    st.info(f"Rendering {os.path.basename(notebook_path)}… ({rendered} of {total} notebooks ready)")
 
 
 def display_experiments_tab(NOTEBOOK_FOLDER):
     st.subheader("Experiments", anchor=False)
-    notebook_files = [f for f in os.listdir(NOTEBOOK_FOLDER) if f.endswith('.ipynb')]
+    renderer = notebook_renderer(NOTEBOOK_FOLDER)
+    notebook_files = list_notebooks(NOTEBOOK_FOLDER)
     selected_notebook = st.selectbox("Select an experiment:", notebook_files)
     if selected_notebook:
         notebook_path = os.path.join(NOTEBOOK_FOLDER, selected_notebook)
-        notebook_html = load_notebook_as_html(notebook_path)
-        st.components.v1.html(notebook_html, height=1000, scrolling=True)
+        n_cells = cell_count(notebook_path)
+        page_col, code_col = st.columns([3, 1])
+        with code_col:
+            hide_code = st.toggle("Hide code", key='experiments_hide_code')
+        start = 0
+        if n_cells > CELLS_PER_PAGE:
+            with page_col:
+                start = st.selectbox(
+                    "Cells:", range(0, n_cells, CELLS_PER_PAGE),
+                    format_func=lambda first: f"{first + 1}-{min(first + CELLS_PER_PAGE, n_cells)} of {n_cells}",
+                    key=f'experiments_page_{selected_notebook}',
+                )
+        options = page_options(start, exclude_input=hide_code)
+
+        status = renderer.status(notebook_path, options)
+        if status == 'rendered':
+            notebook_html = load_notebook_as_html(notebook_path, options)
+            st.components.v1.html(styled(notebook_html), height=1000, scrolling=True)
+        elif status == 'failed':
+            st.error(f"Could not render {selected_notebook}: {renderer.error(notebook_path, options)}")
+            # Editing the notebook retries on its own; this is for failures of the render itself, e.g. a killed worker
+            if st.button("Retry", key=f'experiments_retry_{selected_notebook}'):
+                renderer.retry(notebook_path, options)
+                st.rerun()
+        else:
+            _wait_for_render(renderer, notebook_path, options)
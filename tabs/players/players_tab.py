@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 
+from utils import get_partition
+
 POSITION_STAT_MAP = {
     "QB": [
         'projected_passing_completions',
@@ -73,15 +75,12 @@ def display_event_player_tab(dataset_df, event_player_df):
     default_season_idx = season_options.index(max(season_options))
     season = st.selectbox('Select Season:', season_options, index=default_season_idx, key='event_player_season')
     
-    week_options = sorted(dataset_df[dataset_df['season'] == season]['week'].unique())
+    week_options = sorted(get_partition(dataset_df, season)['week'].unique())
     default_week_idx = week_options.index(max(week_options))
     week = st.selectbox('Select Week:', week_options, index=default_week_idx, key='event_player_week')
     
     # Filter events for selected season and week
-    filtered_events = dataset_df[
-        (dataset_df['season'] == season) & 
-        (dataset_df['week'] == week)
-    ].copy()
+    filtered_events = get_partition(dataset_df, season, week).copy()
     
     # Create game selection options
     game_options = [f"{row['away_team']} @ {row['home_team']}" for _, row in filtered_events.iterrows()]
@@ -91,17 +90,9 @@ def display_event_player_tab(dataset_df, event_player_df):
         away_team, home_team = selected_game.split(' @ ')
         
         # Filter player data for selected teams
-        away_players = event_player_df[
-            (event_player_df['season'] == season) & 
-            (event_player_df['week'] == week) & 
-            (event_player_df['team'] == away_team)
-        ].copy()
-        
-        home_players = event_player_df[
-            (event_player_df['season'] == season) & 
-            (event_player_df['week'] == week) & 
-            (event_player_df['team'] == home_team)
-        ].copy()
+        week_players = get_partition(event_player_df, season, week)
+        away_players = week_players[week_players['team'] == away_team].copy()
+        home_players = week_players[week_players['team'] == home_team].copy()
 
         # --- Aggregation helpers ---
         def safe_sum(df, col):
@@ -206,7 +197,8 @@ def display_player_tab(player_df):
     default_season_idx = season_options.index(max(season_options))
     season = st.selectbox('Select Season:', season_options, index=default_season_idx, key='player_season')
     
-    week_options = sorted(player_df[player_df['season'] == season]['week'].unique())
+    season_players = get_partition(player_df, season)
+    week_options = sorted(season_players['week'].unique())
     col1, col2 = st.columns([3, 1])
     
     with col1:
@@ -227,10 +219,7 @@ def display_player_tab(player_df):
     filter_type = st.radio("Filter by:", ["Team", "Position"])
 
     # Filter data for selected season and weeks
-    filtered_df = player_df[
-        (player_df['season'] == season) & 
-        (player_df['week'].isin(selected_weeks))
-    ].copy()
+    filtered_df = season_players[season_players['week'].isin(selected_weeks)].copy()
     
     # Aggregate data if multiple weeks selected
     if len(selected_weeks) > 1:
@@ -250,7 +239,7 @@ def display_player_tab(player_df):
             agg_dict[col] = 'first'
         
         # Perform aggregation
-        filtered_df = filtered_df.groupby(['team', 'position', 'name'], as_index=False).agg(agg_dict)
+        filtered_df = filtered_df.groupby(['team', 'position', 'name'], as_index=False, observed=True).agg(agg_dict)
 
     # Sort the dataframe by projected points
     filtered_df = filtered_df.sort_values('projected_points', ascending=False)
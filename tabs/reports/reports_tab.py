@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import altair as alt
 from nfl_data_loader.utils.utils import find_year_for_season, find_week_for_season
 
+from utils import get_partition
+
 # Report tab for boom/bust analysis
 
 
@@ -14,10 +15,8 @@ def generate_weekly_boom_bust_candidates(df, season, week, n=10, positions=None)
     Positions: optional list of positions to include (e.g. ['RB','WR']). If None, include all.
     Returns (boom_df, bust_df) or (empty, empty) if insufficient data.
     """
-    # Work on a copy
-    dfw = df.copy()
-    # Filter to season/week
-    dfw = dfw[(dfw.get('season') == season) & (dfw.get('week') == week)].copy()
+    # Filter to season/week on a copy
+    dfw = get_partition(df, season, week).copy()
 
     # Column fallbacks
     ecr_col = 'ecr' if 'ecr' in dfw.columns else ('ECR' if 'ECR' in dfw.columns else None)
@@ -92,6 +91,8 @@ def generate_weekly_boom_bust_candidates(df, season, week, n=10, positions=None)
 
 
 def display_reports_tab(player_df, dataset_df, seasons):
+    import altair as alt
+
     st.subheader("Reports")
 
     # Subtabs inside Reports
@@ -106,7 +107,7 @@ def display_reports_tab(player_df, dataset_df, seasons):
 
         week = None
         if view_mode == "Single Week":
-            week_options = sorted(dataset_df[dataset_df['season'] == season]['week'].unique())
+            week_options = sorted(get_partition(dataset_df, season)['week'].unique())
             if week_options:
                 week = st.selectbox("Select Week:", week_options, index=len(week_options)-1)
 
@@ -145,7 +146,7 @@ def display_reports_tab(player_df, dataset_df, seasons):
             positions_selected.append('D/ST')
 
         # season filtered df
-        df = player_df[player_df['season'] == season].copy()
+        df = get_partition(player_df, season).copy()
         df_season = df.copy()
 
 
@@ -156,8 +157,8 @@ def display_reports_tab(player_df, dataset_df, seasons):
         else:
             use_col = 'projected_points_standard'
 
-        agg_total = df_season.groupby(['player_id','name','team','position'], as_index=False)[use_col].sum().rename(columns={use_col:'projected_points_total'})
-        agg_avg = df_season.groupby(['player_id','name','team','position'], as_index=False)[use_col].mean().rename(columns={use_col:'projected_points_avg'})
+        agg_total = df_season.groupby(['player_id','name','team','position'], as_index=False, observed=True)[use_col].sum().rename(columns={use_col:'projected_points_total'})
+        agg_avg = df_season.groupby(['player_id','name','team','position'], as_index=False, observed=True)[use_col].mean().rename(columns={use_col:'projected_points_avg'})
 
         if 'ECR' in df_season.columns:
             ecr = df_season[['player_id','ECR']].drop_duplicates(subset=['player_id'])
@@ -168,7 +169,7 @@ def display_reports_tab(player_df, dataset_df, seasons):
 
         if view_mode == 'Single Week' and week is not None:
             df_week = df_season[df_season['week'] == week].copy()
-            merged = df_week.groupby(['player_id','name','team','position'], as_index=False)[use_col].first().rename(columns={use_col:'projected_points_avg'})
+            merged = df_week.groupby(['player_id','name','team','position'], as_index=False, observed=True)[use_col].first().rename(columns={use_col:'projected_points_avg'})
             merged['projected_points_total'] = merged['projected_points_avg']
             merged = pd.merge(merged, ecr, on='player_id', how='left')
         else:
@@ -252,7 +253,7 @@ def display_reports_tab(player_df, dataset_df, seasons):
         bb_season = st.selectbox('Boom/Bust Season', all_seasons, index=all_seasons.index(default_season))
 
         # Weeks in dataset for the selected season
-        bb_week_options = sorted(dataset_df[dataset_df['season'] == bb_season]['week'].unique())
+        bb_week_options = sorted(get_partition(dataset_df, bb_season)['week'].unique())
         # default week: try to use find_week_for_season, otherwise last available
         default_week = None
         try:
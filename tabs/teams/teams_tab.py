@@ -1,16 +1,16 @@
 import streamlit as st
-import pandas as pd
 
-from utils import transform_teams_for_current_week
+from utils import transform_teams_for_current_week, get_partition, precompute_team_context, team_context_cached
 
 def display_team_tab(folded_df):
     st.subheader("Teams", anchor=False)
     season_options = sorted(folded_df['season'].unique())
     default_season_idx = season_options.index(max(season_options))
     season = st.selectbox('Select Season:', season_options, index=default_season_idx, key='team_season')
-    week_options = sorted(folded_df[folded_df['season'] == season]['week'].unique())
+    season_df = get_partition(folded_df, season)
+    week_options = sorted(season_df['week'].unique())
     if season == max(season_options):
-        s_df = folded_df[((folded_df['season'] == season)&(folded_df['actual_points'].isnull()))].copy()
+        s_df = season_df[season_df['actual_points'].isnull()]
         if s_df.shape[0] == 0:
             default_week_idx = week_options.index(max(week_options))
         else:
@@ -29,5 +29,18 @@ def display_team_tab(folded_df):
         'actual_over_covered',
     ]
     st.write(f"Team Ratings Week {week} in the {season} Season")
+    # Warm every week of the season in one pass so paging through weeks is a memo hit
+    if not team_context_cached(folded_df, season, week):
+        precompute_team_context(folded_df, season)
     filtered_folded_df = transform_teams_for_current_week(folded_df, season, week)
     selected_team = st.dataframe(filtered_folded_df[top_table_cols])
+
+    # Season-to-date trend straight from the to_date_* columns on folded_df
+    if 'to_date_avg_points_over_expected' in season_df.columns:
+        st.write(f"Points Over Expected Trend in the {season} Season")
+        trend_teams = st.multiselect('Select Teams:', sorted(season_df['team'].unique()),
+                                     default=list(filtered_folded_df.sort_values('avg_points_over_expected', ascending=False)['team'].head(4)),
+                                     key='team_trend_teams')
+        trend_df = season_df[season_df['team'].isin(trend_teams)].pivot_table(
+            index='week', columns='team', values='to_date_avg_points_over_expected', observed=True)
+        st.line_chart(trend_df)
@@ -1,17 +1,31 @@
-import streamlit as st
-import folium
-from folium import Popup, Icon
-from folium.features import CustomIcon
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-from streamlit_folium import folium_static
+import streamlit as st
 import requests
-from espn_api_orm.league.api import ESPNLeagueAPI
-from espn_api_orm.consts import ESPNSportLeagueTypes, ESPNSportTypes
 
-_BASE_URL = 'https://raw.githubusercontent.com/theedgepredictor'
+from consts import DATA_PUMP_URL
+from http_client import get_json
+from season_catalog import get_seasons
+
+_BASE_URL = DATA_PUMP_URL
+# In memory for an hour, after that the on-disk copy is revalidated (a 304 when the data pump has not changed)
+FETCH_TTL_SECONDS = 3600
 geocoded_url = f'{_BASE_URL}/venue-data-pump/main/data/geocoding.json'
 
+# The data pump files of a render are independent of each other and fetched side by side on the shared session;
+# the season files of the selected league are prefetched on their own pool so they never queue ahead of a render
+_FETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='venues-fetch')
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='venues-prefetch')
+# season teams.json url -> (future, submitted_at) of its background fetch
+_PREFETCHED = {}
+_PREFETCH_LOCK = threading.Lock()
+
 def create_sports_leagues_dict():
+    from espn_api_orm.consts import ESPNSportLeagueTypes
+
     sports_leagues = {}
     for attr in ESPNSportLeagueTypes:
         value = attr.value
@@ -21,22 +35,66 @@ def create_sports_leagues_dict():
         sports_leagues[sport].append(league)
     return sports_leagues
 
-sports_leagues = create_sports_leagues_dict()
 sports_leagues = {
     "football": ["nfl", "college-football"]
 }
 
-@st.cache_data(ttl=3600)
-def fetch_data(url, cache_key=None):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
+def venues_url(sport, league):
+    return f'{_BASE_URL}/venue-data-pump/main/data/{sport}/{league}/venues.json'
+
+def teams_info_url(sport, league):
+    return f'{_BASE_URL}/team-data-pump/main/data/{sport}/{league}/teams.json'
+
+def season_data_url(sport, league, season):
+    return f'{_BASE_URL}/team-data-pump/main/data/{sport}/{league}/{season}/teams.json'
+
+def _get_json_or_empty(url):
+    try:
+        return get_json(url, max_age=FETCH_TTL_SECONDS)
+    except requests.HTTPError:
+        # Not every league / season has a data pump file
         return []
 
+@st.cache_data(ttl=FETCH_TTL_SECONDS)
+def fetch_data(url, cache_key=None):
+    with _PREFETCH_LOCK:
+        prefetched = _PREFETCHED.get(url)
+    # A prefetch still queued behind other seasons is dropped for a direct fetch, one already running is waited on
+    if prefetched is not None and not prefetched[0].cancel() and not prefetched[0].done():
+        return prefetched[0].result()
+    return _get_json_or_empty(url)
+
+@st.cache_data(ttl=FETCH_TTL_SECONDS)
+def fetch_all(urls):
+    """Several data pump files at once, in the order of urls"""
+    return list(_FETCH_POOL.map(_get_json_or_empty, urls))
+
+def league_seasons(sport, league, calls=None):
+    # Season catalog: ESPN is only asked once a week per league, calls counts the asks of this session
+    return [str(i) for i in get_seasons(sport, league, calls=calls) if i >= 2002]
+
+def _prefetch(url):
+    try:
+        return _get_json_or_empty(url)
+    except requests.RequestException as e:
+        print(f"--prefetch_season_data-- {url}: {e}")
+        raise
+
+def prefetch_season_data(sport, league, seasons):
+    """Warm the on-disk cache with the teams.json of every season of the league in the background, newest first"""
+    now = time.time()
+    for season in sorted(seasons, reverse=True):
+        url = season_data_url(sport, league, season)
+        with _PREFETCH_LOCK:
+            future, submitted_at = _PREFETCHED.get(url, (None, 0))
+            # In flight, or landed on disk recently enough that a fetch would be served from there anyway
+            if future is not None and (not future.done() or now - submitted_at < FETCH_TTL_SECONDS):
+                continue
+            _PREFETCHED[url] = (_PREFETCH_POOL.submit(_prefetch, url), now)
+
 class TeamVenueUI:
     def __init__(self):
-        self.geocoded_locations = fetch_data(geocoded_url, cache_key='geocoded_locations')
+        self.geocoded_locations = {}
         self.venues = {}
         self.teams_info = []
         self.seasons = []
@@ -47,17 +105,17 @@ class TeamVenueUI:
         if 'selected_sport' in st.session_state:
             st.session_state['selected_league'] = st.selectbox("Select League", sports_leagues[st.session_state['selected_sport']], key='league_select', on_change=self.on_league_change)
         if 'selected_league' in st.session_state:
-            venues_url = f'{_BASE_URL}/venue-data-pump/main/data/{st.session_state["selected_sport"]}/{st.session_state["selected_league"]}/venues.json'
-            teams_info_url = f'{_BASE_URL}/team-data-pump/main/data/{st.session_state["selected_sport"]}/{st.session_state["selected_league"]}/teams.json'
-            self.venues = fetch_data(venues_url, cache_key='venues')
-            self.teams_info = fetch_data(teams_info_url, cache_key='teams_info')
-            sport = ESPNSportTypes(st.session_state['selected_sport'])
-            league_api = ESPNLeagueAPI(sport, st.session_state["selected_league"])
-            self.seasons = [str(i) for i in league_api.get_seasons() if i >= 2002]
+            sport, league = st.session_state['selected_sport'], st.session_state['selected_league']
+            # The ESPN season list and the data pump files do not depend on each other: fetch them all at once
+            # Created on the script thread, the pool thread only increments it
+            calls = st.session_state.setdefault('espn_upstream_calls', Counter())
+            seasons = _FETCH_POOL.submit(league_seasons, sport, league, calls)
+            self.geocoded_locations, self.venues, self.teams_info = fetch_all((geocoded_url, venues_url(sport, league), teams_info_url(sport, league)))
+            self.seasons = seasons.result()
+            prefetch_season_data(sport, league, self.seasons)
             st.session_state['selected_season'] = st.selectbox("Select Season", self.seasons, key='season_select', on_change=self.on_season_change)
             if 'selected_season' in st.session_state:
-                season_data_url = f'{_BASE_URL}/team-data-pump/main/data/{st.session_state["selected_sport"]}/{st.session_state["selected_league"]}/{st.session_state["selected_season"]}/teams.json'
-                self.season_data = fetch_data(season_data_url, cache_key='season_data')
+                self.season_data = fetch_data(season_data_url(sport, league, st.session_state['selected_season']), cache_key='season_data')
 
     def on_sport_change(self):
         if 'selected_sport' in st.session_state and st.session_state['selected_sport'] != st.session_state['sport_select']:
@@ -87,6 +145,11 @@ class TeamVenueUI:
         return None
 
     def render_map(self):
+        import folium
+        from folium import Popup, Icon
+        from folium.features import CustomIcon
+        from streamlit_folium import folium_static
+
         if self.season_data:
             lat_lon_pairs = []
             m = folium.Map(location=[37.0902, -95.7129], zoom_start=4)
@@ -133,5 +196,10 @@ class TeamVenueUI:
 
 def display_venues_tab():
     st.subheader("Venues", anchor=False)
-    app = TeamVenueUI()
-    app.run()
+    try:
+        app = TeamVenueUI()
+        app.run()
+    except requests.RequestException as e:
+        # ESPN and data pump failures (season_catalog wraps whatever ESPN raises) surface as RequestException;
+        # keep them in this tab instead of ending the script run
+        st.error(f"Venue data is unavailable right now: {e}")
@@ -0,0 +1,107 @@
+import os
+import tempfile
+
+# consts reads these once at import: keep the mirror, snapshot, http and notebook caches of a test run out of the
+# working tree (and away from a real snapshot) before any module of the app is imported
+os.environ['NFL_STREAMLIT_CACHE_DIR'] = tempfile.mkdtemp(prefix='nfl-streamlit-tests-')
+os.environ['NFL_STREAMLIT_OFFLINE'] = '0'
+# The app tests render the Experiments tab without the repo's notebooks (and without starting render workers)
+os.environ['NFL_STREAMLIT_NOTEBOOK_FOLDER'] = tempfile.mkdtemp(prefix='nfl-streamlit-notebooks-')
+
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubServer:
+    '''
+    Local HTTP stand-in for the upstream hosts: serves the files under root with an ETag / Last-Modified,
+    answers conditional requests with 304, and replies with queued error statuses per path first.
+    Every request is recorded as (path, request headers).
+    '''
+    def __init__(self, root):
+        self.root = root
+        self.requests = []
+        self.failures = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def fail(self, path, *statuses):
+        """Answer the next requests for path with statuses, in order, before serving the file"""
+        self.failures.setdefault(path, []).extend(statuses)
+
+    def hits(self, path):
+        return sum(request_path == path for request_path, _ in self.requests)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append((self.path, dict(self.headers)))
+                    queued = stub.failures.get(self.path)
+                    status = queued.pop(0) if queued else None
+                if status is not None:
+                    return self._reply(status)
+                path = os.path.join(stub.root, self.path.lstrip('/'))
+                if not os.path.isfile(path):
+                    return self._reply(404)
+                with open(path, 'rb') as f:
+                    body = f.read()
+                headers = {
+                    'ETag': f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+                    'Last-Modified': formatdate(os.path.getmtime(path), usegmt=True),
+                }
+                if self.headers.get('If-None-Match') == headers['ETag']:
+                    return self._reply(304, headers=headers)
+                self._reply(200, body, headers)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server(tmp_path):
+    root = tmp_path / 'upstream'
+    root.mkdir()
+    with StubServer(str(root)) as server:
+        yield server
+
+
+@pytest.fixture
+def mirror_dir(tmp_path, monkeypatch):
+    """An empty feature store mirror for the test"""
+    import mirror
+
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setattr(mirror, 'CACHE_DIR', cache_dir)
+    return cache_dir
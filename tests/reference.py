@@ -0,0 +1,156 @@
+import pandas as pd
+from pandas.core.dtypes.common import is_numeric_dtype
+from sklearn.metrics import accuracy_score, mean_absolute_error
+
+# The column-by-column reshapes and the week-by-week team context from utils.py before they were vectorized,
+# and the per-season evaluation report of the Evaluation tab, verbatim, so tests and benchmarks can hold the
+# new versions to the exact frames these produced.
+
+
+def df_rename_fold(df, t1_prefix, t2_prefix):
+    '''
+    The reverse of a df_rename_pivot
+    Fold two prefixed column types into one generic type
+    Ex: away_team_id and home_team_id -> team_id
+    '''
+    try:
+        t1_all_cols = [i for i in df.columns if t2_prefix not in i]
+        t2_all_cols = [i for i in df.columns if t1_prefix not in i]
+
+        t1_cols = [i for i in df.columns if t1_prefix in i]
+        t2_cols = [i for i in df.columns if t2_prefix in i]
+        t1_new_cols = [i.replace(t1_prefix, '') for i in df.columns if t1_prefix in i]
+        t2_new_cols = [i.replace(t2_prefix, '') for i in df.columns if t2_prefix in i]
+
+        t1_df = df[t1_all_cols].rename(columns=dict(zip(t1_cols, t1_new_cols)))
+        t2_df = df[t2_all_cols].rename(columns=dict(zip(t2_cols, t2_new_cols)))
+
+        df_out = pd.concat([t1_df, t2_df]).reset_index().drop(columns='index')
+        return df_out
+    except Exception as e:
+        print("--df_rename_fold-- " + str(e))
+        print(f"columns in: {df.columns}")
+        print(f"shape: {df.shape}")
+        return df
+
+
+def df_rename_exavg(df, t1_prefix=None, t2_prefix=None, t1_cols=None, t2_cols=None, sub_prefix=''):
+    '''
+    An extension of the df_rename_pivot
+    Take the average of two prefixed column types to get the exavg (expected average)
+    Ex: (away_team_turnovers + home_team_turnovers)/2 -> team_turnovers_df_rename_exavg
+    Note: This method applies the exavg to the columns and removes the two prefixed column types
+    '''
+    if t1_cols is None and t2_cols is None:
+        if t1_prefix is None or t2_prefix is None:
+            raise Exception('You must specify either prefix or cols')
+        t1_cols = [i for i in df.columns if t1_prefix in i]
+        t2_cols = [i for i in df.columns if t2_prefix in i]
+    for t1_col, t2_col in zip(t1_cols, t2_cols):
+        if is_numeric_dtype(df[t1_col]) and is_numeric_dtype(df[t2_col]):
+            df[f"exavg_{t1_col.replace(t1_prefix, sub_prefix)}"] = (df[t1_col] + df[t2_col]) / 2
+    df_out = df.drop(columns=t1_cols + t2_cols)
+    return df_out
+
+def df_rename_shift(df, drop_cols=None):
+    if drop_cols is not None:
+        df = df.drop(columns=drop_cols)
+
+    root_cols = [col for col in df.columns if '_offense' not in col and '_defense' not in col and 'away_' not in col and 'home_' not in col]
+
+    away_cols = [col for col in df.columns if '_offense' not in col and '_defense' not in col and 'away_' in col and 'home_' not in col]
+    away_rename_dict = {col: col.replace('away_', '') for col in away_cols}
+    home_cols = [col for col in df.columns if '_offense' not in col and '_defense' not in col and 'away_' not in col and 'home_' in col]
+    home_rename_dict = {col: col.replace('home_', '') for col in home_cols}
+
+    off_away_cols = [col for col in df.columns if '_offense' in col and 'away_' in col]
+    off_away_rename_dict = {col: col.replace('away_', '') for col in off_away_cols}
+    def_away_cols = [col for col in df.columns if '_defense' in col and 'away_' in col]
+    def_away_rename_dict = {col: col.replace('away_', '') for col in def_away_cols}
+
+    off_home_cols = [col for col in df.columns if '_offense' in col and 'home_' in col]
+    off_home_rename_dict = {col: col.replace('home_', '') for col in off_home_cols}
+    def_home_cols = [col for col in df.columns if '_defense' in col and 'home_' in col]
+    def_home_rename_dict = {col: col.replace('home_', '') for col in def_home_cols}
+
+    away_df = df[root_cols + away_cols + off_away_cols + def_home_cols].rename(columns={**away_rename_dict, **off_away_rename_dict, **def_home_rename_dict})
+    away_df['is_home'] = 0
+    home_df = df[root_cols + home_cols + off_home_cols + def_away_cols].rename(columns={**home_rename_dict, **off_home_rename_dict, **def_away_rename_dict})
+    home_df['is_home'] = 1
+    del df
+    out_df = pd.concat([away_df, home_df])
+    return out_df
+
+def transform_teams_for_current_week(folded_df, season, week):
+    filtered_df = folded_df[((folded_df['season'] == season) & (folded_df['week'] == week))].copy()
+    if week == 1:
+        s = folded_df[((folded_df['season'] == season-1) & (folded_df['week'] < 18 if season > 2021 else 17))].copy()
+    else:
+        s = folded_df[((folded_df['season'] == season) & (folded_df['week'] < week))].copy()
+    s['avg_points_over_expected'] = s['actual_points'] - s['expected_points']
+    s['actual_over_covered'] = s['actual_under_covered'] == 0
+    points_over_expected = s.groupby(['team'])['avg_points_over_expected'].mean().sort_values(ascending=False).reset_index()
+    covered_spread = s.groupby(['team'])['actual_team_covered_spread'].sum().sort_values(ascending=False).reset_index()
+    went_under = s.groupby(['team'])['actual_over_covered'].sum().sort_values(ascending=False).reset_index()
+
+    joiners = [
+        points_over_expected,
+        covered_spread,
+        went_under
+    ]
+    filtered_df = filtered_df.drop(columns=['actual_under_covered', 'actual_team_covered_spread'])
+    for j in joiners:
+        filtered_df = pd.merge(filtered_df, j, on=['team'], how='left')
+    return filtered_df
+
+def make_evaluation_report(eval_df):
+    try:
+        # Actual values
+        actual_wp = eval_df['actual_away_team_win'].values
+        actual_spread = eval_df['actual_away_spread'].values
+        actual_total = eval_df['actual_point_total'].values
+
+        # --- Vegas Baseline ---
+        vegas_wp = eval_df['spread_line'].apply(lambda x: 1 if x < 0 else 0).values
+        vegas_spread = eval_df['spread_line'].values
+        vegas_total = eval_df['total_line'].values
+
+        # --- Expected Points Averages ---
+        exp_avg_wp = eval_df['expected_spread'].apply(lambda x: 1 if x < 0 else 0).values
+        exp_avg_spread = eval_df['expected_spread'].values
+        exp_avg_total = eval_df['away_expected_points'].values + eval_df['home_expected_points'].values
+
+        # --- Spread and Total Coverage ---
+        eval_df['expected_system_covered_spread'] = (eval_df['away_expected_points'] + eval_df['spread_line'] >= eval_df['home_expected_points'])
+        eval_df['expected_system_covered_spread'] = eval_df['expected_system_covered_spread'] == eval_df['actual_away_team_covered_spread']
+
+        eval_df['expected_system_under_covered_total'] = (eval_df['home_expected_points'] + eval_df['away_expected_points'] <= eval_df['total_line'])
+        eval_df['expected_system_under_covered_total'] = eval_df['expected_system_under_covered_total'] == eval_df['actual_under_covered']
+
+        return {
+            'games': eval_df.shape[0],
+            'vegas_wp_accuracy': round(accuracy_score(actual_wp, vegas_wp),4),
+            'vegas_spread_mae': round(mean_absolute_error(actual_spread, vegas_spread),4),
+            'vegas_total_mae': round(mean_absolute_error(actual_total, vegas_total),4),
+            'expected_wp_accuracy': round(accuracy_score(actual_wp, exp_avg_wp),4),
+            'expected_spread_mae': round(mean_absolute_error(actual_spread, exp_avg_spread),4),
+            'expected_total_mae': round(mean_absolute_error(actual_total, exp_avg_total),4),
+            'expected_away_points_mae': round(mean_absolute_error(eval_df['actual_away_points'], eval_df['away_expected_points']),4),
+            'expected_home_points_mae': round(mean_absolute_error(eval_df['actual_home_points'], eval_df['home_expected_points']),4),
+            'expected_system_correct_spread_percent': round(eval_df['expected_system_covered_spread'].sum() / len(eval_df),4),
+            'expected_system_correct_total_percent': round(eval_df['expected_system_under_covered_total'].sum() / len(eval_df), 4)
+        }
+    except Exception as e:
+        return {
+            'games': eval_df.shape[0],
+            'vegas_wp_accuracy': 0,
+            'vegas_spread_mae': 0,
+            'vegas_total_mae': 0,
+            'expected_wp_accuracy': 0,
+            'expected_spread_mae': 0,
+            'expected_total_mae': 0,
+            'expected_away_points_mae': 0,
+            'expected_home_points_mae':0,
+            'expected_system_correct_spread_percent':0,
+            'expected_system_correct_total_percent': 0,
+        }
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from consts import (
+    FEATURE_STORE_KINDS, TARGETS, POINT_FEATURES, JUST_SIMPLE_FEATURES, COMMON_FEATURES, COMMON_PASSING_FEATURES,
+    KICKING_FEATURES, RANKING_FEATURES,
+)
+
+# Small synthetic stand-ins for the upstream feature store files: same columns the loaders and tabs read,
+# random values, one file per (kind, season) laid out like FEATURE_STORE_URL.
+
+TEAMS = [
+    'ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB', 'HOU', 'IND', 'JAX', 'KC',
+    'LV', 'LAC', 'LA', 'MIA', 'MIN', 'NE', 'NO', 'NYG', 'NYJ', 'PHI', 'PIT', 'SF', 'SEA', 'TB', 'TEN', 'WAS',
+]
+POSITIONS = ['QB', 'RB', 'RB', 'WR', 'WR', 'WR', 'TE', 'K', 'D/ST']
+SIDE_FEATURES = sorted(set(POINT_FEATURES + JUST_SIMPLE_FEATURES + COMMON_FEATURES + COMMON_PASSING_FEATURES + KICKING_FEATURES))
+
+
+def event_season(season, rng, weeks=None, unplayed_from=None):
+    """One season of the event feature store: 16 games a week (14 on bye weeks), targets missing from unplayed_from on"""
+    weeks = weeks or (18 if season > 2020 else 17)
+    rows = []
+    for week in range(1, weeks + 1):
+        order = rng.permutation(TEAMS)
+        for game in range(16 if week % 5 else 14):
+            rows.append({'season': season, 'week': week, 'away_team': order[2 * game], 'home_team': order[2 * game + 1]})
+    df = pd.DataFrame(rows)
+    n = len(df)
+    df['home_elo_pre'] = rng.normal(1500, 80, n)
+    df['away_elo_pre'] = rng.normal(1500, 80, n)
+    # A few games without a rating are dropped by build_event_frames
+    df.loc[rng.random(n) < 0.01, 'away_elo_pre'] = np.nan
+    df['spread_line'] = np.round(rng.normal(0, 6, n) * 2) / 2
+    df['total_line'] = np.round(rng.normal(45, 4, n) * 2) / 2
+    home = rng.integers(0, 45, n).astype(float)
+    away = rng.integers(0, 45, n).astype(float)
+    df['actual_home_score'] = home
+    df['actual_away_score'] = away
+    df['actual_away_team_win'] = (away > home).astype(float)
+    df['actual_away_spread'] = home - away
+    df['actual_point_total'] = home + away
+    df['actual_away_team_covered_spread'] = (df['actual_away_spread'] < df['spread_line']).astype(float)
+    df['actual_under_covered'] = (df['actual_point_total'] < df['total_line']).astype(float)
+    if unplayed_from is not None:
+        df.loc[df['week'] >= unplayed_from, TARGETS] = np.nan
+    features = {}
+    for side in ['home', 'away']:
+        for col in ['offensive_rank', 'defensive_rank'] + [c for c in RANKING_FEATURES if c not in ('offensive_rank', 'defensive_rank')]:
+            features[f'{side}_{col}'] = rng.integers(1, 33, n).astype(float)
+        for col in SIDE_FEATURES:
+            features[f'{side}_{col}'] = rng.normal(20, 5, n)
+    return pd.concat([df, pd.DataFrame(features)], axis=1)
+
+
+def player_season(season, rng, weeks=17):
+    """One season of the player fantasy feature store: every position group of every team, every week"""
+    from tabs.players.players_tab import POSITION_STAT_MAP
+
+    rows = []
+    for week in range(1, weeks + 1):
+        for team in TEAMS:
+            for i, position in enumerate(POSITIONS):
+                rows.append({
+                    'season': season, 'week': week, 'team': team, 'position': position, 'name': f'{team}_{position}_{i}',
+                    'player_id': f'{team}{i}', 'espn_id': i,
+                })
+    df = pd.DataFrame(rows)
+    n = len(df)
+    features = {'ecr': rng.integers(1, 300, n).astype(float)}
+    for col in ['projected_points', 'projected_receiving_targets', 'breakout_likelihood', 'bust_likelihood',
+                'player_owned_avg', 'projection_high_score', 'projection_low_score', 'opposition_rank']:
+        features[col] = rng.random(n) * 20
+    for col in sorted({col for cols in POSITION_STAT_MAP.values() for col in cols}):
+        features.setdefault(col, rng.random(n) * 5)
+    return pd.concat([df, pd.DataFrame(features)], axis=1)
+
+
+def write_feature_store(root, seasons, current_season=None, seed=0):
+    """Write event and player parquet files for seasons under root the way FEATURE_STORE_URL lays them out"""
+    rng = np.random.default_rng(seed)
+    for season in seasons:
+        frames = {
+            'event': event_season(season, rng, unplayed_from=8 if season == current_season else None),
+            'player': player_season(season, rng),
+        }
+        for kind, df in frames.items():
+            kind_dir = os.path.join(root, FEATURE_STORE_KINDS[kind])
+            os.makedirs(kind_dir, exist_ok=True)
+            df.to_parquet(os.path.join(kind_dir, f'{season}.parquet'))
+    return root
@@ -0,0 +1,161 @@
+import io
+import json
+import math
+import os
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+import streamlit as st
+from nfl_data_loader.utils.utils import find_year_for_season
+from streamlit.testing.v1 import AppTest
+
+import loaders
+import mirror
+import season_catalog
+import utils
+import tabs.venues.venues_tab as venues_tab
+from tabs.evaluation import metrics
+from tests.synthetic import write_feature_store
+
+# float32 keeps ~7 significant digits; sums of point scale values that cancel to ~0 keep fewer
+RTOL, ATOL = 1e-5, 1e-4
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(REPO_DIR, 'app.py')
+# app.SEASONS
+SEASONS = list(range(2019, find_year_for_season() + 1))
+
+
+@pytest.fixture
+def app_upstream(stub_server, mirror_dir, monkeypatch):
+    '''Every upstream of the app on the local stub: synthetic feature store, no venue data, a fixed ESPN season list'''
+    write_feature_store(stub_server.root, SEASONS, current_season=SEASONS[-1])
+    monkeypatch.setattr(mirror, 'FEATURE_STORE_URL', stub_server.url)
+    monkeypatch.setattr(venues_tab, '_BASE_URL', stub_server.url)
+    monkeypatch.setattr(venues_tab, 'geocoded_url', f'{stub_server.url}/geocoding.json')
+    monkeypatch.setattr(season_catalog, '_fetch_seasons', lambda sport, league: SEASONS[::-1])
+    monkeypatch.chdir(REPO_DIR)
+    return stub_server
+
+
+def _fresh_caches(monkeypatch):
+    # Frames and every memo keyed on data_version start empty, the version does not change with the dtypes
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    monkeypatch.setattr(loaders, '_SEASON_FRAMES', {})
+    monkeypatch.setattr(utils, '_TEAM_CONTEXT_CACHE', OrderedDict())
+    monkeypatch.setattr(metrics, '_EVALUATION_CACHE', OrderedDict())
+
+
+def _arrow_frame(data):
+    return pa.ipc.open_stream(io.BytesIO(data)).read_all().to_pandas()
+
+
+def _vega_values(proto):
+    spec = json.loads(proto.spec)
+    # Dataset names are hashes of the data; compare the data itself
+    spec.pop('datasets', None)
+    spec.pop('data', None)
+    for layer in spec.get('layer', []):
+        layer.pop('data', None)
+        layer.pop('name', None)
+    for param in spec.get('params', []):
+        param.pop('views', None)
+    return {'spec': spec, 'datasets': [_arrow_frame(dataset.data.data) for dataset in proto.datasets]}
+
+
+def _component_values(proto):
+    args = json.loads(proto.json_args)
+    # The hash and the dtype listing describe the frame, not what the grid shows
+    args.pop('data_hash', None)
+    args.pop('frame_dtypes', None)
+    return {'component': proto.component_name, 'args': args}
+
+
+def rendered_values(at):
+    '''Everything the app put on the page, in page order, as plain values'''
+    values = []
+
+    def walk(node):
+        for element in getattr(node, 'children', {}).values():
+            kind = element.type
+            if kind == 'dataframe':
+                values.append((kind, element.value))
+            elif kind in ('markdown', 'subheader', 'title', 'caption', 'info', 'error', 'warning'):
+                values.append((kind, element.value))
+            elif kind in ('selectbox', 'multiselect', 'radio', 'select_slider'):
+                values.append((kind, (list(element.options), element.value)))
+            elif kind in ('slider', 'number_input', 'checkbox', 'toggle'):
+                values.append((kind, element.value))
+            elif kind == 'vega_lite_chart':
+                values.append((kind, _vega_values(element.proto)))
+            elif kind == 'component_instance':
+                values.append((kind, _component_values(element.proto)))
+            walk(element)
+
+    walk(at.main)
+    return values
+
+
+def assert_same_values(a, b, path='page'):
+    '''Equal up to float32 rounding, categorical vs object columns and numeric dtype widths'''
+    if isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(
+            a, b, check_dtype=False, check_categorical=False, check_index_type=False, check_column_type=False,
+            check_exact=False, rtol=RTOL, atol=ATOL, obj=path,
+        )
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys(), path
+        for key in a:
+            assert_same_values(a[key], b[key], f'{path}.{key}')
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b), path
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_same_values(x, y, f'{path}[{i}]')
+    elif isinstance(a, float) or isinstance(b, float):
+        assert (math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=RTOL, abs_tol=ATOL), f'{path}: {a} != {b}'
+    else:
+        assert a == b, f'{path}: {a!r} != {b!r}'
+
+
+def render(monkeypatch, compact):
+    monkeypatch.setattr(loaders, 'COMPACT_DTYPES', compact)
+    _fresh_caches(monkeypatch)
+    at = AppTest.from_file(APP, default_timeout=300)
+    at.run()
+    assert not at.exception, [exception.value for exception in at.exception]
+    return rendered_values(at)
+
+
+def test_every_tab_renders_the_same_values_with_compact_dtypes(app_upstream, monkeypatch):
+    compact = render(monkeypatch, compact=True)
+    default = render(monkeypatch, compact=False)
+
+    assert [kind for kind, _ in compact] == [kind for kind, _ in default]
+    assert sum(kind == 'dataframe' for kind, _ in compact) >= 10
+    for i, ((kind, a), (_, b)) in enumerate(zip(compact, default)):
+        assert_same_values(a, b, f'{kind}#{i}')
+
+
+def test_a_venues_failure_stays_in_the_venues_tab(app_upstream, tmp_path, monkeypatch):
+    def espn_down(sport, league):
+        # espn_api_orm raises bare Exception when ESPN answers with an error
+        raise Exception('ESPN answered 500')
+
+    monkeypatch.setattr(season_catalog, '_fetch_seasons', espn_down)
+    monkeypatch.setattr(season_catalog, '_CATALOG', {})
+    monkeypatch.setattr(season_catalog, '_RETRY_AT', {})
+    monkeypatch.setattr(season_catalog, '_LAST_ERRORS', {})
+    monkeypatch.setattr(season_catalog, 'CACHE_DIR', str(tmp_path / 'no-catalog'))
+    _fresh_caches(monkeypatch)
+
+    at = AppTest.from_file(APP, default_timeout=300)
+    at.run()
+
+    assert not at.exception
+    venues = [tab for tab in at.tabs if tab.label == 'Venues']
+    assert [error.value for error in venues[0].error] == ['Venue data is unavailable right now: ESPN seasons of football/nfl failed: ESPN answered 500']
+    # The data tabs rendered in full
+    assert len(at.dataframe) >= 10
@@ -0,0 +1,345 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import loaders
+import mirror
+from tabs.evaluation import backtest, metrics
+from tabs.evaluation.metrics import REPORT_COLUMNS, evaluation_rows, played_games, season_evaluation_report
+from tests.reference import make_evaluation_report
+from tests.synthetic import write_feature_store
+
+SEASONS = [2020, 2021, 2022, 2023]
+
+
+@pytest.fixture
+def dataset_df(stub_server, mirror_dir, monkeypatch):
+    '''The loader's dataset_df (compact dtypes, PartitionIndex, data_version) of a synthetic store, 2023 in progress'''
+    write_feature_store(stub_server.root, SEASONS, current_season=2023)
+    monkeypatch.setattr(mirror, 'FEATURE_STORE_URL', stub_server.url)
+    monkeypatch.setattr(loaders, '_SEASON_FRAMES', {})
+    monkeypatch.setattr(metrics, '_EVALUATION_CACHE', type(metrics._EVALUATION_CACHE)())
+    return loaders.build_feature_store(SEASONS)[0]
+
+
+def per_season_report(dataset_df, seasons):
+    # The Evaluation tab table as it was built before season_evaluation_report: one make_evaluation_report per season
+    evals = []
+    for season in seasons:
+        eval_df = dataset_df[(dataset_df['season'] == season) & (dataset_df['actual_away_points'].notnull())].copy()
+        if eval_df.shape[0] == 0:
+            continue
+        eval_report = make_evaluation_report(eval_df)
+        eval_report['season'] = str(season)
+        evals.append(eval_report)
+    full = make_evaluation_report(dataset_df[(dataset_df['actual_away_points'].notnull())].copy())
+    full['season'] = 'Full'
+    evals.append(full)
+    evals = pd.DataFrame(evals)
+    evals.index = evals.season
+    return evals.drop(columns='season')
+
+
+def assert_same_report(report, expected):
+    assert list(report.index) == list(expected.index)
+    assert list(report.columns) == REPORT_COLUMNS == list(expected.columns)
+    for column in REPORT_COLUMNS:
+        for season, value, expected_value in zip(report.index, report[column], expected[column]):
+            # Exactly the rounded numbers, not just close
+            assert value == expected_value, (column, season, value, expected_value)
+
+
+def test_season_evaluation_report_matches_make_evaluation_report(dataset_df):
+    seasons = SEASONS + [2024]
+    expected = per_season_report(dataset_df, seasons)
+    assert list(expected.index) == ['2020', '2021', '2022', '2023', 'Full']
+
+    assert_same_report(season_evaluation_report(dataset_df, seasons), expected)
+    # Second call is the memoized frame
+    assert_same_report(season_evaluation_report(dataset_df, seasons), expected)
+    # A filtered copy is not memoized and goes through the same reduction
+    assert_same_report(season_evaluation_report(dataset_df.iloc[:-1], seasons), per_season_report(dataset_df.iloc[:-1], seasons))
+
+
+def test_season_evaluation_report_matches_where_sklearn_rejects_a_season(dataset_df):
+    bad = dataset_df.copy()
+    seasons = bad['season']
+    bad['actual_away_team_win'] = bad['actual_away_team_win'].astype('float32')
+    # Non-integral win label, missing line, infinite expectation: make_evaluation_report returns zeros for the season
+    bad.loc[bad.index[seasons == 2020][:1], 'actual_away_team_win'] = 0.5
+    bad.loc[bad.index[seasons == 2021][:1], 'spread_line'] = np.nan
+    bad.loc[bad.index[seasons == 2022][:1], 'home_expected_points'] = np.inf
+    bad.loc[bad.index[seasons == 2023][:3], 'actual_away_team_covered_spread'] = pd.NA
+
+    expected = per_season_report(bad, SEASONS)
+    assert (expected.loc[['2020', '2021', '2022', 'Full'], REPORT_COLUMNS[1:]] == 0).all().all()
+    assert_same_report(season_evaluation_report(bad, SEASONS), expected)
+
+
+def test_evaluation_rows_sum_to_make_evaluation_report(dataset_df):
+    for season in SEASONS + ['Full']:
+        eval_df = played_games(dataset_df if season == 'Full' else dataset_df[dataset_df['season'] == season])
+        rows = evaluation_rows(eval_df)
+        expected = make_evaluation_report(eval_df.copy())
+        assert rows['invalid'].sum() == 0
+        for name in ['vegas_wp_accuracy', 'expected_wp_accuracy']:
+            assert round(float(rows[name].mean()), 4) == expected[name], (season, name)
+        for name in metrics.MAE_COLUMNS + metrics.PERCENT_COLUMNS:
+            # Errors keep sklearn's dtype: float32 columns average in float32
+            values = rows[name]
+            n = values.dtype.type(len(eval_df)) if values.dtype.kind == 'f' else len(eval_df)
+            assert np.round(values.sum() / n, 4) == expected[name], (season, name)
+
+
+def test_bootstrap_metrics_are_reproducible_from_the_seed(dataset_df):
+    # Copies are not memoized, so every call resamples
+    first = metrics.bootstrap_metrics(dataset_df.copy(), 'season', n_resamples=2_000, seed=7)
+    again = metrics.bootstrap_metrics(dataset_df.copy(), 'season', n_resamples=2_000, seed=7)
+    other = metrics.bootstrap_metrics(dataset_df.copy(), 'season', n_resamples=2_000, seed=8)
+
+    pd.testing.assert_frame_equal(first, again, check_exact=True)
+    assert not first.equals(other)
+    # Seeded per group label: a season's intervals do not depend on the other seasons in the frame
+    alone = metrics.bootstrap_metrics(dataset_df[dataset_df['season'] == 2022], 'season', n_resamples=2_000, seed=7)
+    pd.testing.assert_frame_equal(alone, first.loc[[2022]], check_exact=True)
+
+
+@pytest.mark.parametrize('by', ['season', None])
+def test_bootstrap_intervals_contain_the_point_estimate(dataset_df, by):
+    intervals = metrics.bootstrap_metrics(dataset_df, by, n_resamples=2_000)
+    point = metrics.evaluation_metrics(dataset_df, by)
+
+    assert (intervals['games'] == point['games']).all()
+    for name in metrics.BOOTSTRAP_METRICS:
+        low, high = intervals[f'{name}_low'].to_numpy(), intervals[f'{name}_high'].to_numpy()
+        estimate = point[name].to_numpy()
+        assert (low <= estimate).all() and (estimate <= high).all(), name
+        assert (low < high).all(), name
+
+
+def test_bootstrap_chunking_keeps_the_report_shape(dataset_df, monkeypatch):
+    whole = metrics.bootstrap_metrics(dataset_df.copy(), 'season', n_resamples=1_000)
+    # A few hundred games per season: batches of a handful of resamples, the last one partial
+    monkeypatch.setattr(metrics, 'BOOTSTRAP_CHUNK_SIZE', 3_001)
+    chunked = metrics.bootstrap_metrics(dataset_df.copy(), 'season', n_resamples=1_000)
+
+    assert chunked.shape == whole.shape
+    assert list(chunked.columns) == list(whole.columns)
+    assert list(chunked.index) == list(whole.index)
+    assert (chunked['games'] == whole['games']).all()
+    point = metrics.evaluation_metrics(dataset_df, 'season')
+    for name in metrics.BOOTSTRAP_METRICS:
+        assert (chunked[f'{name}_low'] <= point[name]).all() and (point[name] <= chunked[f'{name}_high']).all(), name
+
+
+def brute_force_metrics(groups):
+    '''CUBE_COLUMNS per group from make_evaluation_report on each group's rows, groups is {label: eval_df}'''
+    report = {}
+    for label, eval_df in groups.items():
+        row = make_evaluation_report(eval_df.copy())
+        row['away_cover_percent'] = round(float((eval_df['actual_away_team_covered_spread'] == 1).mean()), 4)
+        row['under_percent'] = round(float((eval_df['actual_under_covered'] == 1).mean()), 4)
+        report[label] = row
+    return pd.DataFrame.from_dict(report, orient='index')[metrics.CUBE_COLUMNS]
+
+
+def assert_same_metrics(cube_frame, expected):
+    assert list(cube_frame.index) == list(expected.index)
+    # Window sums run in float64, one rounded digit of slack
+    pd.testing.assert_frame_equal(cube_frame.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False, rtol=0, atol=1.01e-4)
+
+
+def week_slices(eval_df):
+    return {key: rows for key, rows in eval_df.groupby(['season', 'week'], sort=True)}
+
+
+@pytest.mark.parametrize('weeks, within_season', [(1, True), (4, True), (4, False), (20, False)])
+def test_cube_rolling_matches_a_groupby_over_the_window(dataset_df, weeks, within_season):
+    eval_df = played_games(dataset_df)
+    by_week = week_slices(eval_df)
+    order = list(by_week)
+    windows = {}
+    for end, (season, week) in enumerate(order, start=1):
+        window = order[max(0, end - weeks):end]
+        if within_season:
+            window = [key for key in window if key[0] == season]
+        windows[(season, week)] = pd.concat([by_week[key] for key in window])
+
+    rolling = metrics.EvaluationCube(dataset_df).rolling(weeks, within_season=within_season)
+
+    assert_same_metrics(rolling, brute_force_metrics(windows))
+
+
+def test_cube_window_spans_the_season_boundary(dataset_df):
+    eval_df = played_games(dataset_df)
+    cube = metrics.EvaluationCube(dataset_df)
+    last_2021 = int(eval_df.loc[eval_df['season'] == 2021, 'week'].max())
+    across = eval_df[((eval_df['season'] == 2021) & (eval_df['week'] > last_2021 - 2)) | ((eval_df['season'] == 2022) & (eval_df['week'] <= 2))]
+    inside = eval_df[(eval_df['season'] == 2022) & (eval_df['week'] <= 2)]
+    expected = brute_force_metrics({'across': across, 'inside': inside})
+
+    window = pd.DataFrame([cube.window(2022, 2, 4, within_season=False), cube.window(2022, 2, 4)], index=['across', 'inside'])
+    assert window['games'].tolist() == [len(across), len(inside)]
+    assert_same_metrics(window, expected)
+    pd.testing.assert_series_equal(cube.window(2022, 2, 4, within_season=False), cube.rolling(4, within_season=False).loc[(2022, 2)])
+    with pytest.raises(ValueError):
+        cube.window(2022, 2, 0)
+
+
+def test_cube_breakdowns_match_a_groupby_over_the_games(dataset_df):
+    eval_df = played_games(dataset_df)
+    away, home = eval_df['away_team'].astype(str), eval_df['home_team'].astype(str)
+    spread_line = eval_df['spread_line']
+    cube = metrics.EvaluationCube(dataset_df)
+
+    teams = {team: eval_df[(away == team) | (home == team)] for team in sorted(set(away) | set(home))}
+    assert_same_metrics(cube.teams, brute_force_metrics(teams))
+
+    favourites = {
+        'away favourite': eval_df[spread_line < 0],
+        'home favourite': eval_df[spread_line > 0],
+        "pick'em": eval_df[spread_line == 0],
+    }
+    favourites = {label: rows for label, rows in sorted(favourites.items()) if len(rows)}
+    assert_same_metrics(cube.favourites, brute_force_metrics(favourites))
+
+    team_favourites = {}
+    for team in teams:
+        favoured = ((away == team) & (spread_line < 0)) | ((home == team) & (spread_line > 0))
+        underdog = ((away == team) & (spread_line > 0)) | ((home == team) & (spread_line < 0))
+        pickem = ((away == team) | (home == team)) & (spread_line == 0)
+        for label, mask in [('favourite', favoured), ("pick'em", pickem), ('underdog', underdog)]:
+            if mask.any():
+                team_favourites[(team, label)] = eval_df[mask]
+    assert_same_metrics(cube.team_favourites, brute_force_metrics(team_favourites))
+
+
+def brute_force_backtest(dataset_df, thresholds):
+    '''One bet at a time per market and threshold, the bankroll restarting at 0 units for every season'''
+    eval_df = played_games(dataset_df).sort_values(['season', 'week'], kind='stable')
+    overall, by_season = {}, {}
+    for market, (line_col, expected_col, actual_col) in backtest.MARKETS.items():
+        for threshold in thresholds:
+            totals = {}
+            for season, line, expected, actual in zip(eval_df['season'], eval_df[line_col], eval_df[expected_col], eval_df[actual_col]):
+                if pd.isna(line) or pd.isna(expected) or pd.isna(actual):
+                    continue
+                if market == 'spread':
+                    # Home minus away points: the model likes the away side when it expects less than the line
+                    side = 'away' if expected < line else 'home' if expected > line else None
+                    won = actual < line if side == 'away' else actual > line
+                else:
+                    side = 'over' if expected > line else 'under' if expected < line else None
+                    won = actual > line if side == 'over' else actual < line
+                if side is None or abs(expected - line) < threshold:
+                    continue
+                for key in [('overall',), ('season', season)]:
+                    t = totals.setdefault(key, {'bets': 0, 'wins': 0, 'losses': 0, 'pushes': 0, 'units': 0.0, 'peak': 0.0, 'max_drawdown': 0.0})
+                    t['bets'] += 1
+                    if actual == line:
+                        t['pushes'] += 1
+                    elif won:
+                        t['wins'] += 1
+                        t['units'] += 100 / 110
+                    else:
+                        t['losses'] += 1
+                        t['units'] -= 1
+                    t['peak'] = max(t['peak'], t['units'])
+                    t['max_drawdown'] = max(t['max_drawdown'], t['peak'] - t['units'])
+            for key, t in totals.items():
+                t.pop('peak')
+                t['roi'] = t['units'] / t['bets']
+                decided = t['wins'] + t['losses']
+                t['hit_rate'] = t['wins'] / decided if decided else np.nan
+            empty = {'bets': 0, 'wins': 0, 'losses': 0, 'pushes': 0, 'units': 0.0, 'roi': np.nan, 'hit_rate': np.nan, 'max_drawdown': 0.0}
+            overall[(market, threshold)] = totals.get(('overall',), empty)
+            for season in eval_df['season'].unique():
+                by_season[(market, season, threshold)] = totals.get(('season', season), empty)
+    frame = lambda rows: pd.DataFrame.from_dict(rows, orient='index')[backtest.BACKTEST_COLUMNS]
+    # Season major inside each market, like the backtest index
+    markets = list(backtest.MARKETS)
+    by_season = {key: by_season[key] for key in sorted(by_season, key=lambda key: (markets.index(key[0]), key[1], key[2]))}
+    return {'overall': frame(overall), 'seasons': frame(by_season)}
+
+
+def assert_same_backtest(results, expected):
+    for name in ['overall', 'seasons']:
+        assert list(results[name].index) == list(expected[name].index), name
+        pd.testing.assert_frame_equal(
+            results[name].reset_index(drop=True), expected[name].reset_index(drop=True), check_dtype=False, rtol=0, atol=1e-4,
+        )
+
+
+def test_backtest_matches_a_bet_by_bet_replay(dataset_df):
+    thresholds = [0.0, 0.5, 1.0, 2.5, 5.0]
+    expected = brute_force_backtest(dataset_df, thresholds)
+    assert expected['overall'].loc[('spread', 0.0), 'bets'] > 0
+
+    assert_same_backtest(backtest.backtest(dataset_df, thresholds), expected)
+    # Rows out of order are settled in (season, week) order, keeping their order inside a week
+    reversed_df = dataset_df.iloc[::-1]
+    assert_same_backtest(backtest.backtest(reversed_df, thresholds), brute_force_backtest(reversed_df, thresholds))
+
+
+def hand_built_games():
+    '''Six played 2021-2022 games plus an unplayed one, rows out of order'''
+    games = pd.DataFrame([
+        # season, week, spread_line, expected_spread, actual_away_spread, total_line, expected_total, actual_point_total
+        (2022, 1, 1.0, 5.0, -3.0, 50.0, 47.0, 55.0),
+        (2021, 1, -3.0, -7.0, -10.0, 45.0, 48.0, 50.0),
+        (2021, 3, 0.0, 2.0, -5.0, 44.0, 46.0, 44.0),
+        (2021, 2, 3.0, 0.0, 3.0, 40.0, 38.0, 35.0),
+        (2022, 2, -2.0, -1.0, 0.0, 41.0, np.nan, 47.0),
+        (2022, 3, 6.0, 6.0, 1.0, 42.0, 42.0, 40.0),
+        (2022, 4, -1.0, -9.0, np.nan, 40.0, 50.0, np.nan),
+    ], columns=['season', 'week', 'spread_line', 'expected_spread', 'actual_away_spread', 'total_line', 'expected_total', 'actual_point_total'])
+    games['actual_away_points'] = np.where(games['actual_point_total'].notna(), 20.0, np.nan)
+    return games
+
+
+def test_bet_outcomes_sign_conventions():
+    games = played_games(hand_built_games()).sort_values(['season', 'week'])
+    # Spread: away backed when the model expects less than the (home minus away) line, covers below it
+    edge, result = backtest.bet_outcomes(games, 'spread')
+    assert edge.tolist() == [4.0, 3.0, -2.0, -4.0, -1.0, 0.0]
+    assert result.tolist() == [1.0, 0.0, -1.0, -1.0, 1.0, 0.0]
+    # Total: over backed when the model expects more than the line; the missing expectation places no bet
+    edge, result = backtest.bet_outcomes(games, 'total')
+    assert edge.tolist() == [3.0, -2.0, 2.0, -3.0, 0.0, 0.0]
+    assert result.tolist() == [1.0, 1.0, 0.0, -1.0, 0.0, 0.0]
+
+
+def test_backtest_pushes_and_a_drawdown_across_seasons():
+    win = 100 / 110
+    results = backtest.backtest(hand_built_games(), [0.0, 2.0, 5.0])
+    overall, seasons = results['overall'], results['seasons']
+
+    # Spread: win, push, loss in 2021, then loss, win in 2022
+    spread = overall.loc[('spread', 0.0)]
+    assert (spread['bets'], spread['wins'], spread['losses'], spread['pushes']) == (5, 2, 2, 1)
+    assert spread['units'] == round(2 * win - 2, 4)
+    # The 2021 peak of one win down to the 2022 trough two losses later
+    assert spread['max_drawdown'] == 2.0
+    assert overall.loc[('spread', 2.0), 'bets'] == 4
+    assert overall.loc[('spread', 2.0), 'units'] == round(win - 2, 4)
+    assert overall.loc[('spread', 5.0), 'bets'] == 0
+    assert np.isnan(overall.loc[('spread', 5.0), 'roi']) and overall.loc[('spread', 5.0), 'max_drawdown'] == 0
+
+    # Every season starts its own bankroll at 0: 2022 opens with a loss, a drawdown of one stake rather than two
+    assert seasons.loc[('spread', 2021, 0.0), ['bets', 'pushes', 'hit_rate', 'max_drawdown']].tolist() == [3, 1, 0.5, 1.0]
+    assert seasons.loc[('spread', 2022, 0.0), ['bets', 'units', 'max_drawdown']].tolist() == [2, round(win - 1, 4), 1.0]
+
+    # Total: win, win, push in 2021, loss in 2022
+    total = overall.loc[('total', 0.0)]
+    assert (total['bets'], total['wins'], total['losses'], total['pushes']) == (4, 2, 1, 1)
+    assert total['max_drawdown'] == 1.0
+    assert seasons.loc[('total', 2021, 0.0), ['units', 'max_drawdown']].tolist() == [round(2 * win, 4), 0.0]
+    assert seasons.loc[('total', 2022, 0.0), ['units', 'max_drawdown']].tolist() == [-1.0, 1.0]
+
+
+def test_max_drawdown_restarts_at_every_segment():
+    cumulative = np.array([[1.0, 3.0, 0.0, -2.0, 1.0, -4.0]])
+    # One segment: 3 down to -4
+    assert backtest._max_drawdown(cumulative, np.array([0]))[0].tolist() == [7.0]
+    # Segments [0, 3) and [3, 6) run 1, 3, 0 and -2, 1, -4 from 0 units: 3 to 0, then 1 to -4
+    assert backtest._max_drawdown(cumulative, np.array([0, 3]))[0].tolist() == [3.0, 5.0]
@@ -0,0 +1,53 @@
+import hashlib
+import os
+
+import pytest
+import requests
+
+import loaders
+import mirror
+from consts import FEATURE_STORE_KINDS
+from tests.synthetic import write_feature_store
+
+SEASONS = [2019, 2020, 2021]
+
+
+def upstream_path(kind, season):
+    return f"/{FEATURE_STORE_KINDS[kind]}/{season}.parquet"
+
+
+@pytest.fixture
+def upstream(stub_server, mirror_dir, monkeypatch):
+    write_feature_store(stub_server.root, SEASONS)
+    monkeypatch.setattr(mirror, 'FEATURE_STORE_URL', stub_server.url)
+    return stub_server
+
+
+def test_fetch_seasons_retries_a_failing_season_on_its_own(upstream):
+    upstream.fail(upstream_path('event', 2020), 503, 503)
+
+    files = loaders.fetch_seasons(SEASONS)
+
+    # Deterministic order: kinds, then seasons as given
+    assert list(files) == [(kind, season) for kind in ('event', 'player') for season in SEASONS]
+    assert upstream.hits(upstream_path('event', 2020)) == 3
+    for kind, season in files:
+        if (kind, season) != ('event', 2020):
+            assert upstream.hits(upstream_path(kind, season)) == 1
+    for (kind, season), (path, version) in files.items():
+        with open(path, 'rb') as f:
+            assert hashlib.sha256(f.read()).hexdigest() == version
+        assert loaders.FETCH_TIMINGS[(kind, season)] >= 0
+
+    # Past seasons are served from the mirror without another request
+    requests_before = len(upstream.requests)
+    assert loaders.fetch_seasons(SEASONS) == files
+    assert len(upstream.requests) == requests_before
+
+
+def test_fetch_seasons_raises_for_a_missing_season(upstream):
+    with pytest.raises(requests.HTTPError):
+        loaders.fetch_seasons([2019, 2030], kinds=('event',))
+    # A 404 is not retried
+    assert upstream.hits(upstream_path('event', 2030)) == 1
+    assert not os.path.exists(os.path.join(mirror.CACHE_DIR, 'feature_store', 'event', '2030'))
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+import requests
+
+import http_client
+from http_client import get_json, read_cached
+
+
+@pytest.fixture
+def upstream(stub_server):
+    for name, body in [('teams.json', {'teams': ['KC', 'SF']}), ('flaky.json', {'ok': True})]:
+        with open(f"{stub_server.root}/{name}", 'w', encoding='utf-8') as f:
+            json.dump(body, f)
+    return stub_server
+
+
+def test_get_json_caches_a_200(upstream, tmp_path):
+    url = f"{upstream.url}/teams.json"
+
+    assert get_json(url, cache_dir=str(tmp_path)) == {'teams': ['KC', 'SF']}
+    entry = read_cached(url, str(tmp_path))
+    assert entry['body'] == {'teams': ['KC', 'SF']} and entry['etag'] and entry['last_modified']
+
+    # Younger than max_age: served from disk without a request
+    assert get_json(url, cache_dir=str(tmp_path)) == {'teams': ['KC', 'SF']}
+    assert upstream.hits('/teams.json') == 1
+
+
+def test_get_json_serves_the_cached_body_on_a_304(upstream, tmp_path):
+    url = f"{upstream.url}/teams.json"
+    get_json(url, cache_dir=str(tmp_path))
+    checked_at = read_cached(url, str(tmp_path))['checked_at']
+
+    assert get_json(url, max_age=0, cache_dir=str(tmp_path)) == {'teams': ['KC', 'SF']}
+
+    path, headers = upstream.requests[-1]
+    assert path == '/teams.json'
+    assert headers['If-None-Match'] == read_cached(url, str(tmp_path))['etag']
+    assert 'If-Modified-Since' in headers
+    # The 304 only refreshed the entry
+    assert read_cached(url, str(tmp_path))['checked_at'] >= checked_at
+    assert upstream.hits('/teams.json') == 2
+
+
+def test_get_json_retries_a_5xx(upstream, tmp_path):
+    upstream.fail('/flaky.json', 503, 502)
+
+    assert get_json(f"{upstream.url}/flaky.json", cache_dir=str(tmp_path)) == {'ok': True}
+    assert upstream.hits('/flaky.json') == 3
+
+
+def test_get_json_gives_up_after_the_session_retries(upstream, tmp_path):
+    upstream.fail('/flaky.json', *[500] * (http_client.HTTP_RETRIES + 1))
+
+    with pytest.raises(requests.RequestException):
+        get_json(f"{upstream.url}/flaky.json", cache_dir=str(tmp_path))
+    assert upstream.hits('/flaky.json') == http_client.HTTP_RETRIES + 1
+    assert read_cached(f"{upstream.url}/flaky.json", str(tmp_path)) is None
+
+
+def test_get_json_raises_on_a_404_without_retrying(upstream, tmp_path):
+    url = f"{upstream.url}/missing.json"
+
+    with pytest.raises(requests.HTTPError) as error:
+        get_json(url, cache_dir=str(tmp_path))
+    assert error.value.response.status_code == 404
+    assert upstream.hits('/missing.json') == 1
+    assert read_cached(url, str(tmp_path)) is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import loaders
+from tests.synthetic import event_season
+
+
+def games():
+    return pd.DataFrame({
+        'away_team': ['DET', 'LV', 'NYG', 'SF'],
+        'season': [2024, 2024, 2024, 2024],
+        'week': [1, 1, 2, 2],
+    })
+
+
+def features(df):
+    return df.rename(columns={'away_team': 'team'}).assign(exavg_avg_points=[20.5, 17.0, 23.5, 30.0])
+
+
+def test_check_aligned_accepts_matching_keys():
+    df = games()
+    loaders.check_aligned(df, features(df), ['away_team', 'season', 'week'], 'away exavg')
+    # Keys compare by value across dtypes, as with the compacted frames
+    compact = df.astype({'away_team': 'category', 'season': 'int16', 'week': 'int16'})
+    loaders.check_aligned(compact, features(df), ['away_team', 'season', 'week'], 'away exavg')
+
+
+@pytest.mark.parametrize('misorder, positions', [
+    # Two games of the same week swapped
+    (lambda f: f.iloc[[1, 0, 2, 3]], [0, 1]),
+    # Same teams a week off
+    (lambda f: f.assign(week=[1, 1, 3, 3]), [2, 3]),
+    (lambda f: f.assign(season=[2023, 2024, 2024, 2024]), [0]),
+])
+def test_check_aligned_rejects_misordered_keys(misorder, positions):
+    df = games()
+    with pytest.raises(ValueError, match=rf"away exavg: {len(positions)} rows out of alignment, first at positions \{positions}"):
+        loaders.check_aligned(df, misorder(features(df)), ['away_team', 'season', 'week'], 'away exavg')
+
+
+@pytest.mark.parametrize('rows', [3, 5])
+def test_check_aligned_rejects_a_different_length(rows):
+    df = games()
+    feature_df = pd.concat([features(df)] * 2, ignore_index=True).iloc[:rows]
+    with pytest.raises(ValueError, match=f"away exavg: 4 rows but {rows} feature rows"):
+        loaders.check_aligned(df, feature_df, ['away_team', 'season', 'week'], 'away exavg')
+
+
+def test_build_event_frames_refuses_features_out_of_event_order(monkeypatch):
+    events = event_season(2024, np.random.default_rng(0))
+    shift = loaders.df_rename_shift
+
+    def home_rows_reversed(df):
+        shifted = shift(df)
+        n_games = len(df)
+        return pd.concat([shifted.iloc[:n_games], shifted.iloc[n_games:].iloc[::-1]])
+
+    loaders.build_event_frames(events)
+    monkeypatch.setattr(loaders, 'df_rename_shift', home_rows_reversed)
+    with pytest.raises(ValueError, match='home exavg'):
+        loaders.build_event_frames(events)
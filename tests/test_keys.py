@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import build_key, make_game_id
+
+
+def row_wise_game_id(df):
+    # The DataFrame.apply that built game_id before build_key
+    return df.apply(lambda x: f"{x['season']}_{x['week']}_{x['away_team']}_{x['home_team']}", axis=1)
+
+
+def row_wise_matchup(df):
+    # The DataFrame.apply that built matchup_display in the events tab
+    return df.apply(lambda r: f"{r.get('away_team','')} @ {r.get('home_team','')}".strip(' @'), axis=1)
+
+
+def games(**overrides):
+    df = pd.DataFrame({
+        'season': [2023, 2023, 2024, 2024],
+        'week': [1, 10, 9, 18],
+        'away_team': ['DET', 'LV', 'NYG', 'SF'],
+        'home_team': ['KC', 'LAC', 'PHI', 'LA'],
+        'spread_line': [4.5, -3.0, 1.5, 0.0],
+    })
+    for col, values in overrides.items():
+        df[col] = values
+    return df
+
+
+@pytest.mark.parametrize('df', [
+    games(),
+    # Zero padded week labels are kept as they are
+    games(week=['01', '10', '09', '18']),
+    # Compact loader dtypes
+    games().astype({'season': 'int16', 'week': 'int16', 'away_team': 'category', 'home_team': 'category'}),
+    # Missing values: float week with NaN, None / NaN / categorical NaN teams, nullable integer NA
+    games(week=[1.0, np.nan, 9.0, 18.0]),
+    games(away_team=['DET', None, np.nan, 'SF']),
+    games(home_team=pd.Categorical(['KC', None, 'PHI', 'LA'])),
+    games(week=pd.array([1, None, 9, 18], dtype='Int16')),
+], ids=['int', 'padded-week', 'compact-dtypes', 'nan-week', 'missing-team', 'categorical-nan', 'nullable-week'])
+def test_make_game_id_matches_row_wise_f_string(df):
+    expected = row_wise_game_id(df)
+    result = make_game_id(df)
+    assert result.tolist() == expected.tolist()
+    assert result.index.equals(df.index)
+
+
+def test_make_game_id_text():
+    assert make_game_id(games()).tolist() == ['2023_1_DET_KC', '2023_10_LV_LAC', '2024_9_NYG_PHI', '2024_18_SF_LA']
+
+
+@pytest.mark.parametrize('df', [
+    games(),
+    games(away_team=['DET', None, np.nan, 'SF']),
+    games().drop(columns=['home_team']),
+    games().drop(columns=['away_team', 'home_team']),
+], ids=['both', 'missing-team', 'no-home', 'no-teams'])
+def test_matchup_display_matches_row_wise_f_string(df):
+    # Same expression as _render_games_with_detail
+    teams = df.reindex(columns=['away_team', 'home_team'], fill_value='')
+    result = build_key(teams, ['away_team', 'home_team'], sep=' @ ').str.strip(' @')
+    assert result.tolist() == row_wise_matchup(df).tolist()
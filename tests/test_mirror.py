@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+import pandas as pd
+from nfl_data_loader.utils.utils import find_year_for_season
+
+import mirror
+from consts import FEATURE_STORE_KINDS
+
+CURRENT = find_year_for_season()
+
+
+def publish(root, season, value):
+    path = os.path.join(root, FEATURE_STORE_KINDS['event'], f'{season}.parquet')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({'season': [season], 'value': [value]}).to_parquet(path)
+
+
+def blobs(season):
+    season_dir = os.path.join(mirror.CACHE_DIR, 'feature_store', 'event', str(season))
+    return sorted(name for name in os.listdir(season_dir) if name.endswith('.parquet'))
+
+
+def test_an_offline_seed_is_read_in_place(mirror_dir, monkeypatch):
+    monkeypatch.setattr(mirror, 'OFFLINE', True)
+    seed = os.path.join(mirror_dir, 'feature_store', 'event', '2019.parquet')
+    os.makedirs(os.path.dirname(seed))
+    pd.DataFrame({'season': [2019]}).to_parquet(seed)
+    with open(seed, 'rb') as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    assert mirror.fetch_feature_store_file('event', 2019) == (seed, sha256)
+    # Nothing written next to the seed: a read-only seed directory works
+    assert os.listdir(os.path.dirname(seed)) == ['2019.parquet']
+
+
+def test_the_replaced_blob_outlives_the_manifest_swap(stub_server, mirror_dir, monkeypatch):
+    monkeypatch.setattr(mirror, 'FEATURE_STORE_URL', stub_server.url)
+    monkeypatch.setattr(mirror, 'CURRENT_SEASON_REVALIDATE_SECONDS', 0)
+
+    publish(stub_server.root, CURRENT, 1)
+    first, _ = mirror.fetch_feature_store_file('event', CURRENT)
+    publish(stub_server.root, CURRENT, 2)
+    second, _ = mirror.fetch_feature_store_file('event', CURRENT)
+
+    # A session holding the first manifest can still read its file
+    assert second != first and os.path.exists(first)
+    assert pd.read_parquet(first)['value'].tolist() == [1]
+    assert blobs(CURRENT) == sorted([os.path.basename(first), os.path.basename(second)])
+
+    publish(stub_server.root, CURRENT, 3)
+    third, _ = mirror.fetch_feature_store_file('event', CURRENT)
+    assert blobs(CURRENT) == sorted([os.path.basename(second), os.path.basename(third)])
+    assert mirror.local_path('event', CURRENT, mirror.read_manifest('event', CURRENT)) == third
@@ -0,0 +1,145 @@
+import math
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import notebook_cache
+from notebook_cache import CELLS_PER_PAGE, cell_count, list_notebooks, load_rendered, page_options, render_path, styled
+
+EXPERIMENTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'experiments')
+# What a page of the Experiments tab may ship, stylesheet included; the 'lab' template alone inlines ~280KB of CSS
+PAGE_BUDGET_CHARS = 60_000
+
+
+@pytest.mark.parametrize('name', sorted(list_notebooks(EXPERIMENTS)))
+def test_every_page_of_the_repo_notebooks_fits_the_budget(name, tmp_path):
+    notebook_path = os.path.join(EXPERIMENTS, name)
+    starts = range(0, cell_count(notebook_path), CELLS_PER_PAGE)
+    assert len(starts) == math.ceil(cell_count(notebook_path) / CELLS_PER_PAGE)
+
+    for start in starts:
+        for hide_code in (False, True):
+            page = styled(load_rendered(notebook_path, str(tmp_path), page_options(start, exclude_input=hide_code)))
+            assert len(page) < PAGE_BUDGET_CHARS, (start, hide_code, len(page))
+            # One stylesheet per page, the render itself carries no theme
+            assert page.count(notebook_cache.NOTEBOOK_STYLE) == 1
+            assert '--jp-' not in page
+
+
+def test_the_long_repo_notebook_is_paged():
+    assert cell_count(os.path.join(EXPERIMENTS, 'expected_features.ipynb')) > CELLS_PER_PAGE
+
+
+def test_renders_are_cached_per_template(tmp_path, monkeypatch):
+    notebook_path = os.path.join(EXPERIMENTS, 'weekly_matchups.ipynb')
+    options = page_options()
+    html = load_rendered(notebook_path, str(tmp_path), options)
+    path = render_path(notebook_path, str(tmp_path), options)
+    assert f"-{notebook_cache.TEMPLATE}-" in os.path.basename(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read() == html
+
+    # A render of another template is a different file, and replaces the old one once written
+    monkeypatch.setattr(notebook_cache, 'TEMPLATE', 'lab')
+    assert render_path(notebook_path, str(tmp_path), options) != path
+    load_rendered(notebook_path, str(tmp_path), options)
+    assert not os.path.exists(path)
+
+
+def write_notebook(path, text='# Notes'):
+    import nbformat
+
+    notebook = nbformat.v4.new_notebook(cells=[nbformat.v4.new_markdown_cell(text), nbformat.v4.new_code_cell('1 + 1')])
+    with open(path, 'w', encoding='utf-8') as f:
+        nbformat.write(notebook, f)
+    return str(path)
+
+
+def break_notebook(path):
+    """Drop the closing brace of the notebook json, returns the valid text"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text[:text.rindex('}')])
+    return text
+
+
+def wait_for(renderer, notebook_path, *statuses, timeout=60):
+    deadline = time.time() + timeout
+    while (status := renderer.status(notebook_path)) not in statuses:
+        assert time.time() < deadline, f"{notebook_path} still {status}"
+        time.sleep(0.1)
+    return status
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    folder = tmp_path / 'notebooks'
+    folder.mkdir()
+    renderer = notebook_cache.NotebookRenderer(str(folder), str(tmp_path / 'cache'), max_workers=1, options=page_options())
+    yield renderer
+    renderer.close()
+
+
+def test_the_renderer_renders_the_folder_and_reports_a_failure(renderer):
+    good = write_notebook(os.path.join(renderer.notebook_folder, 'good.ipynb'))
+    broken = write_notebook(os.path.join(renderer.notebook_folder, 'broken.ipynb'))
+    text = break_notebook(broken)
+    renderer.sync()
+
+    assert wait_for(renderer, good, 'rendered', 'failed') == 'rendered'
+    assert wait_for(renderer, broken, 'rendered', 'failed') == 'failed'
+    assert renderer.error(broken) is not None and renderer.error(good) is None
+    assert renderer.progress() == (1, 2)
+    # Asking again does not resubmit a failure of the same contents
+    assert renderer.status(broken) == 'failed'
+
+    # Fixing the notebook changes its (mtime, size): status() queues it again without a sync()
+    with open(broken, 'w', encoding='utf-8') as f:
+        f.write(text.replace('# Notes', '# Fixed notes'))
+    assert renderer.error(broken) is None
+    assert wait_for(renderer, broken, 'rendered', 'failed') == 'rendered'
+    assert renderer.progress() == (2, 2)
+
+
+def test_retry_renders_a_failed_notebook_again(renderer):
+    notebook_path = write_notebook(os.path.join(renderer.notebook_folder, 'unlucky.ipynb'))
+    # The worker dies before it gets to the render queued behind it, the notebook itself is fine
+    crash = renderer._pool.submit(os._exit, 1)
+    renderer.sync()
+    assert wait_for(renderer, notebook_path, 'rendered', 'failed') == 'failed'
+    assert isinstance(renderer.error(notebook_path), BrokenProcessPool)
+    with pytest.raises(BrokenProcessPool):
+        crash.result()
+
+    # Nothing changed on disk, so only retry() queues it again
+    renderer.sync()
+    assert renderer.status(notebook_path) == 'failed'
+    renderer.retry(notebook_path)
+    assert wait_for(renderer, notebook_path, 'rendered', 'failed') == 'rendered'
+
+
+def test_a_dead_pool_is_replaced(renderer):
+    notebook_path = write_notebook(os.path.join(renderer.notebook_folder, 'after.ipynb'))
+    dead = renderer._pool
+    # A worker that exits mid task breaks the whole pool, like one killed for memory
+    with pytest.raises(BrokenProcessPool):
+        dead.submit(os._exit, 1).result(timeout=60)
+
+    assert wait_for(renderer, notebook_path, 'rendered', 'failed') == 'rendered'
+    assert renderer._pool is not dead
+
+
+def test_watch_renders_notebooks_added_to_the_folder(renderer):
+    renderer.sync()
+    renderer.watch(interval=0.05)
+    notebook_path = write_notebook(os.path.join(renderer.notebook_folder, 'new.ipynb'))
+
+    deadline = time.time() + 60
+    # Only the watcher submits: progress() and is_rendered() never queue anything
+    while renderer.progress() != (1, 1):
+        assert time.time() < deadline, 'the watcher did not render the new notebook'
+        time.sleep(0.1)
+    assert notebook_cache.is_rendered(notebook_path, renderer.cache_dir, renderer.options)
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from utils import sort_partitions, get_partition
+
+
+def weeks_frame():
+    df = pd.DataFrame({
+        'season': [2024, 2023, 2024, 2023, 2023, 2024],
+        'week': [1, 2, 2, 1, 2, 1],
+        'game': ['c', 'b', 'f', 'a', 'e', 'd'],
+    })
+    return sort_partitions(df)
+
+
+def scan(df, season, week=None):
+    mask = df['season'] == season
+    if week is not None:
+        mask &= df['week'] == week
+    return df[mask]
+
+
+def test_get_partition_slices_the_indexed_frame():
+    df = weeks_frame()
+    assert df['game'].tolist() == ['a', 'b', 'e', 'c', 'd', 'f']
+    for season, week in [(2023, 1), (2023, 2), (2024, 1), (2024, 2), (2023, None), (2025, 1), (2025, None)]:
+        pd.testing.assert_frame_equal(get_partition(df, season, week), scan(df, season, week))
+    # A column subset shares the rows (and the index) of the indexed frame
+    assert df.attrs['partitions'].matches(df[['season', 'week']])
+
+
+def test_get_partition_scans_a_reordered_frame_of_the_same_length():
+    df = weeks_frame()
+    for reordered in [df.iloc[::-1], df.iloc[::-1].reset_index(drop=True), df.sort_values('game')]:
+        # attrs (and the PartitionIndex in them) follow the frame, the row ranges do not
+        assert reordered.attrs['partitions'] is df.attrs['partitions']
+        assert not reordered.attrs['partitions'].matches(reordered)
+        for season, week in [(2023, 1), (2024, 2), (2024, None)]:
+            pd.testing.assert_frame_equal(get_partition(reordered, season, week), scan(reordered, season, week))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import loaders
+import utils
+from consts import META, TARGETS, POINT_FEATURES, JUST_SIMPLE_FEATURES
+from tests import reference
+from tests.synthetic import event_season
+
+SEASONS = list(range(2015, 2025))
+COLUMNS_FOR_SHIFT = ['team', 'season', 'week', 'is_home'] + POINT_FEATURES + JUST_SIMPLE_FEATURES
+
+
+def assert_same(new, old):
+    pd.testing.assert_frame_equal(new, old, check_exact=True)
+
+
+@pytest.fixture(scope='module')
+def events():
+    """Ten synthetic seasons of the event feature store, rated games only (as build_event_frames keeps them)"""
+    rng = np.random.default_rng(0)
+    df = pd.concat([event_season(season, rng) for season in SEASONS], ignore_index=True)
+    return df[df['away_elo_pre'].notnull()]
+
+
+def exavg_cols(shifted):
+    t1_cols = [i for i in shifted.columns if '_offense' in i and (i not in TARGETS + META) and i.replace('home_', '') in COLUMNS_FOR_SHIFT]
+    t2_cols = [i for i in shifted.columns if '_defense' in i and (i not in TARGETS + META) and i.replace('away_', '') in COLUMNS_FOR_SHIFT]
+    return t1_cols, t2_cols
+
+
+def test_df_rename_shift_matches_the_column_by_column_version(events):
+    assert_same(utils.df_rename_shift(events), reference.df_rename_shift(events))
+    drop_cols = ['total_line', 'home_elo_pre']
+    assert_same(utils.df_rename_shift(events, drop_cols=drop_cols), reference.df_rename_shift(events, drop_cols=drop_cols))
+
+
+def test_df_rename_shift_matches_with_mismatched_side_dtypes(events):
+    mixed = events.copy()
+    mixed['away_elo_pre'] = mixed['away_elo_pre'].astype('float32')
+    mixed['home_offensive_rank'] = mixed['home_offensive_rank'].astype('Int8')
+    assert_same(utils.df_rename_shift(mixed), reference.df_rename_shift(mixed))
+
+
+def test_df_rename_exavg_matches_the_column_by_column_version(events):
+    shifted = reference.df_rename_shift(events)[COLUMNS_FOR_SHIFT]
+    t1_cols, t2_cols = exavg_cols(shifted)
+    assert t1_cols and len(t1_cols) == len(t2_cols)
+    assert_same(
+        utils.df_rename_exavg(shifted.copy(), '_offense', '_defense', t1_cols=t1_cols, t2_cols=t2_cols),
+        reference.df_rename_exavg(shifted.copy(), '_offense', '_defense', t1_cols=t1_cols, t2_cols=t2_cols),
+    )
+    # Columns picked by prefix
+    assert_same(
+        utils.df_rename_exavg(shifted.copy(), '_offense', '_defense'),
+        reference.df_rename_exavg(shifted.copy(), '_offense', '_defense'),
+    )
+
+
+def test_df_rename_exavg_matches_with_mixed_dtypes(events):
+    shifted = reference.df_rename_shift(events)[COLUMNS_FOR_SHIFT]
+    t1_cols, t2_cols = exavg_cols(shifted)
+    mixed = shifted.copy()
+    mixed[t1_cols[0]] = mixed[t1_cols[0]].astype('float32')
+    mixed[t2_cols[1]] = (mixed[t2_cols[1]] * 10).astype('int64')
+    # Non numeric pairs are dropped without an exavg column
+    mixed[t1_cols[2]] = mixed[t1_cols[2]].astype(str)
+    assert_same(
+        utils.df_rename_exavg(mixed.copy(), '_offense', '_defense', t1_cols=t1_cols, t2_cols=t2_cols),
+        reference.df_rename_exavg(mixed.copy(), '_offense', '_defense', t1_cols=t1_cols, t2_cols=t2_cols),
+    )
+
+
+def test_df_rename_fold_matches_the_column_by_column_version(events):
+    base = events[META + ['home_elo_pre', 'away_elo_pre', 'spread_line', 'total_line'] + TARGETS + loaders.RANK_COLUMNS].copy()
+    base['game_id'] = utils.make_game_id(base).values
+    base = base.rename(columns={'spread_line': 'away_spread_line'})
+    base['home_spread_line'] = -base['away_spread_line']
+    base['actual_home_team_win'] = base['actual_away_team_win'] == 0
+    assert_same(utils.df_rename_fold(base, 'away_', 'home_'), reference.df_rename_fold(base, 'away_', 'home_'))
@@ -0,0 +1,71 @@
+from collections import Counter
+
+import pytest
+import requests
+
+import season_catalog
+from season_catalog import get_seasons
+
+
+class FakeESPN:
+    '''Stands in for espn_api_orm: answers with queued results (a list, None or an exception to raise)'''
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, sport, league):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    '''An empty season catalog: nothing in memory or on disk, no backoff running'''
+    monkeypatch.setattr(season_catalog, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(season_catalog, '_CATALOG', {})
+    monkeypatch.setattr(season_catalog, '_RETRY_AT', {})
+    monkeypatch.setattr(season_catalog, '_LAST_ERRORS', {})
+
+    def espn(*results):
+        fake = FakeESPN(*results)
+        monkeypatch.setattr(season_catalog, '_fetch_seasons', fake)
+        return fake
+    return espn
+
+
+@pytest.mark.parametrize('failure', [Exception('Flooded'), None, [], ValueError('bad json')])
+def test_espn_failures_surface_as_request_exceptions(catalog, failure):
+    catalog(failure)
+
+    with pytest.raises(requests.RequestException):
+        get_seasons('football', 'nfl')
+
+
+def test_a_failure_without_a_stored_list_is_not_retried_during_the_backoff(catalog):
+    espn = catalog(Exception('Flooded'), [2025, 2024])
+    calls = Counter()
+
+    with pytest.raises(requests.RequestException, match='Flooded'):
+        get_seasons('football', 'nfl', calls=calls)
+    with pytest.raises(requests.RequestException, match='Flooded'):
+        get_seasons('football', 'nfl', calls=calls)
+    assert espn.calls == 1 and calls[('football', 'nfl')] == 1
+
+    # Once the backoff is over ESPN is asked again
+    season_catalog._RETRY_AT[('football', 'nfl')] -= season_catalog.FAILED_REFRESH_RETRY_SECONDS
+    assert get_seasons('football', 'nfl', calls=calls) == [2025, 2024]
+    assert espn.calls == 2
+    assert ('football', 'nfl') not in season_catalog._RETRY_AT
+
+
+def test_a_failed_refresh_serves_the_stored_list(catalog):
+    espn = catalog([2024, 2023], None)
+    assert get_seasons('football', 'nfl') == [2024, 2023]
+
+    # Expired, ESPN answers nothing: the stored list, and no second try during the backoff
+    assert get_seasons('football', 'nfl', max_age=0) == [2024, 2023]
+    assert get_seasons('football', 'nfl', max_age=0) == [2024, 2023]
+    assert espn.calls == 2
@@ -0,0 +1,143 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+from nfl_data_loader.utils.utils import find_year_for_season
+
+import loaders
+import mirror
+import snapshot
+from consts import FEATURE_STORE_KINDS
+from tests.synthetic import event_season, player_season, write_feature_store
+
+CURRENT = find_year_for_season()
+SEASONS = [CURRENT - 1, CURRENT]
+
+
+@pytest.fixture
+def snapshot_upstream(stub_server, mirror_dir, tmp_path, monkeypatch):
+    '''Synthetic store on the stub, a snapshot built from it, and the loaders reading that snapshot'''
+    write_feature_store(stub_server.root, SEASONS, current_season=CURRENT)
+    monkeypatch.setattr(mirror, 'FEATURE_STORE_URL', stub_server.url)
+    # Every load revalidates the current season with the stub
+    monkeypatch.setattr(mirror, 'CURRENT_SEASON_REVALIDATE_SECONDS', 0)
+    snapshot_dir = str(tmp_path / 'snapshot')
+    monkeypatch.setattr(loaders, 'read_snapshot', functools.partial(snapshot.read_snapshot, snapshot_dir=snapshot_dir))
+    monkeypatch.setattr(loaders, '_SEASON_FRAMES', {})
+    dataset_df, folded_df = loaders.build_feature_store(SEASONS)
+    player_df = loaders.build_player_data(SEASONS)
+    snapshot.write_snapshot({'dataset': dataset_df, 'folded': folded_df, 'player': player_df}, SEASONS, snapshot_dir)
+    loaders.load_feature_store.clear()
+    loaders.load_player_data.clear()
+    yield stub_server
+    loaders.load_feature_store.clear()
+    loaders.load_player_data.clear()
+
+
+def publish_current_season(root, seed):
+    '''Upstream replaces the current season's files'''
+    rng = np.random.default_rng(seed)
+    for kind, df in [('event', event_season(CURRENT, rng, unplayed_from=9)), ('player', player_season(CURRENT, rng))]:
+        df.to_parquet(f"{root}/{FEATURE_STORE_KINDS[kind]}/{CURRENT}.parquet")
+
+
+def refuse_live_build(*args, **kwargs):
+    raise AssertionError('built live although the snapshot matches the mirror')
+
+
+def test_snapshot_is_served_while_the_mirror_has_the_same_files(snapshot_upstream, monkeypatch):
+    expected_dataset, expected_folded = loaders.build_feature_store(SEASONS)
+    monkeypatch.setattr(loaders, 'build_feature_store', refuse_live_build)
+    monkeypatch.setattr(loaders, 'build_player_data', refuse_live_build)
+
+    dataset_df, folded_df = loaders.load_feature_store(SEASONS)
+    player_df = loaders.load_player_data(SEASONS)
+
+    assert dataset_df.attrs['data_version'] == expected_dataset.attrs['data_version']
+    pd.testing.assert_frame_equal(dataset_df, expected_dataset)
+    pd.testing.assert_frame_equal(folded_df, expected_folded)
+    assert len(player_df) > 0
+
+
+def test_snapshot_is_skipped_once_upstream_changes(snapshot_upstream):
+    stale_version = loaders.load_feature_store(SEASONS)[0].attrs['data_version']
+    stale_player_version = loaders.load_player_data(SEASONS).attrs['data_version']
+    loaders.load_feature_store.clear()
+    loaders.load_player_data.clear()
+
+    publish_current_season(snapshot_upstream.root, seed=1)
+    dataset_df, folded_df = loaders.load_feature_store(SEASONS)
+    player_df = loaders.load_player_data(SEASONS)
+
+    files = loaders.fetch_seasons(SEASONS)
+    assert dataset_df.attrs['data_version'] == loaders.data_version(files, 'event', SEASONS) != stale_version
+    assert player_df.attrs['data_version'] == loaders.data_version(files, 'player', SEASONS) != stale_player_version
+    # Live frames of the new files: week 8 of the current season is now played
+    current = dataset_df[(dataset_df['season'] == CURRENT) & (dataset_df['week'] == 8)]
+    assert current['actual_away_points'].notna().all()
+
+
+def count_builds(monkeypatch):
+    '''Record the (kind, season) of every live season build'''
+    builds = []
+    build_event_frames, transform_player_frame = loaders.build_event_frames, loaders._transform_player_frame
+
+    def counted_event_frames(event_fs):
+        builds.append(('event', int(event_fs['season'].iloc[0])))
+        return build_event_frames(event_fs)
+
+    def counted_player_frame(df):
+        builds.append(('player', int(df['season'].iloc[0])))
+        return transform_player_frame(df)
+
+    monkeypatch.setattr(loaders, 'build_event_frames', counted_event_frames)
+    monkeypatch.setattr(loaders, '_transform_player_frame', counted_player_frame)
+    return builds
+
+
+def full_rebuild(monkeypatch):
+    monkeypatch.setattr(loaders, '_SEASON_FRAMES', {})
+    return loaders.build_feature_store(SEASONS), loaders.build_player_data(SEASONS)
+
+
+def assert_same_frames(actual, expected):
+    (dataset_df, folded_df), player_df = actual
+    (expected_dataset, expected_folded), expected_player = expected
+    pd.testing.assert_frame_equal(dataset_df, expected_dataset)
+    pd.testing.assert_frame_equal(folded_df, expected_folded)
+    pd.testing.assert_frame_equal(player_df, expected_player)
+
+
+def test_a_refresh_rebuilds_only_the_season_that_changed(snapshot_upstream, monkeypatch):
+    builds = count_builds(monkeypatch)
+    publish_current_season(snapshot_upstream.root, seed=1)
+
+    refreshed = loaders.build_feature_store(SEASONS), loaders.build_player_data(SEASONS)
+
+    assert builds == [('event', CURRENT), ('player', CURRENT)]
+    assert_same_frames(refreshed, full_rebuild(monkeypatch))
+
+
+def test_a_snapshot_startup_seeds_the_frozen_seasons(snapshot_upstream, monkeypatch):
+    monkeypatch.setattr(loaders, '_SEASON_FRAMES', {})
+    builds = count_builds(monkeypatch)
+    loaders.load_feature_store(SEASONS)
+    loaders.load_player_data(SEASONS)
+    assert builds == []
+    assert set(loaders._SEASON_FRAMES) == {(kind, season) for kind in ['event', 'player'] for season in SEASONS}
+
+    loaders.load_feature_store.clear()
+    loaders.load_player_data.clear()
+    publish_current_season(snapshot_upstream.root, seed=1)
+    refreshed = loaders.load_feature_store(SEASONS), loaders.load_player_data(SEASONS)
+
+    assert builds == [('event', CURRENT), ('player', CURRENT)]
+    assert_same_frames(refreshed, full_rebuild(monkeypatch))
+
+
+def test_seasons_no_longer_requested_are_dropped(snapshot_upstream):
+    loaders.build_feature_store([CURRENT])
+    loaders.build_player_data([CURRENT])
+
+    assert set(loaders._SEASON_FRAMES) == {('event', CURRENT), ('player', CURRENT)}
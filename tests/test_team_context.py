@@ -0,0 +1,128 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import loaders
+import utils
+from tests import reference
+from tests.synthetic import event_season
+
+SEASONS = [2021, 2022]
+
+
+def loader_folded_df(seasons, seed=0):
+    '''folded_df the way build_feature_store serves it: compacted, sorted, team context attached, published'''
+    rng = np.random.default_rng(seed)
+    parts = [loaders._compact_event_frames(season, loaders.build_event_frames(event_season(season, rng)))[1] for season in seasons]
+    folded_df = utils.attach_team_context(utils.sort_partitions(utils.concat_compacted(parts, ignore_index=True)))
+    folded_df.attrs['partitions'] = utils.PartitionIndex(folded_df)
+    folded_df.attrs['data_version'] = f'v{seed}'
+    return folded_df
+
+
+@pytest.fixture
+def folded_df():
+    return loader_folded_df(SEASONS)
+
+
+@pytest.fixture
+def computes(monkeypatch):
+    '''Empty memo, and the (season, week) of every transform it had to compute'''
+    monkeypatch.setattr(utils, '_TEAM_CONTEXT_CACHE', OrderedDict())
+    computed = []
+    compute = utils._transform_teams_for_current_week
+
+    def counted(folded_df, season, week):
+        computed.append((season, week))
+        return compute(folded_df, season, week)
+
+    monkeypatch.setattr(utils, '_transform_teams_for_current_week', counted)
+    return computed
+
+
+def test_the_same_version_season_and_week_is_a_hit(folded_df, computes):
+    assert not utils.team_context_cached(folded_df, 2022, 3)
+    first = utils.transform_teams_for_current_week(folded_df, 2022, 3)
+    assert utils.team_context_cached(folded_df, 2022, 3)
+    second = utils.transform_teams_for_current_week(folded_df, 2022, 3)
+
+    assert computes == [(2022, 3)]
+    pd.testing.assert_frame_equal(first, second)
+    # Callers get their own copy to modify
+    assert first is not second
+
+    # A new data_version is a new key
+    republished = loader_folded_df(SEASONS, seed=1)
+    utils.transform_teams_for_current_week(republished, 2022, 3)
+    assert computes == [(2022, 3), (2022, 3)]
+
+
+def test_the_memo_evicts_the_least_recently_used_week(folded_df, computes, monkeypatch):
+    monkeypatch.setattr(utils, 'TEAM_CONTEXT_CACHE_SIZE', 3)
+    for week in [1, 2, 3, 1, 4]:
+        utils.transform_teams_for_current_week(folded_df, 2022, week)
+
+    assert list(utils._TEAM_CONTEXT_CACHE) == [('v0', 2022, 3), ('v0', 2022, 1), ('v0', 2022, 4)]
+    assert not utils.team_context_cached(folded_df, 2022, 2)
+    utils.transform_teams_for_current_week(folded_df, 2022, 2)
+    assert computes == [(2022, 1), (2022, 2), (2022, 3), (2022, 4), (2022, 2)]
+    assert len(utils._TEAM_CONTEXT_CACHE) == 3
+
+
+def test_a_filtered_frame_skips_the_memo(folded_df, computes):
+    filtered = folded_df[folded_df['team'] != 'ARI']
+    # pandas hands the attrs (version and PartitionIndex) to the filtered frame
+    assert filtered.attrs['data_version'] == folded_df.attrs['data_version']
+
+    week_df = utils.transform_teams_for_current_week(filtered, 2022, 3)
+
+    assert not utils.team_context_cached(filtered, 2022, 3)
+    assert len(utils._TEAM_CONTEXT_CACHE) == 0
+    assert 'ARI' not in set(week_df['team'])
+    # and the unfiltered frame does not pick up the filtered rows
+    assert 'ARI' in set(utils.transform_teams_for_current_week(folded_df, 2022, 3)['team'])
+
+
+@pytest.mark.parametrize('with_context', [True, False])
+def test_precompute_matches_the_week_by_week_transform(folded_df, computes, with_context):
+    if not with_context:
+        folded_df = folded_df.drop(columns=utils.TO_DATE_COLUMNS)
+        folded_df.attrs['partitions'] = utils.PartitionIndex(folded_df)
+
+    weeks = utils.precompute_team_context(folded_df, 2022)
+
+    assert sorted(weeks) == list(range(1, 19))
+    assert all(utils.team_context_cached(folded_df, 2022, week) for week in weeks)
+    # Fresh transforms on a frame outside the memo
+    unmemoized = folded_df.copy()
+    for week, week_df in weeks.items():
+        expected = utils.transform_teams_for_current_week(unmemoized, 2022, week)
+        pd.testing.assert_frame_equal(week_df, expected)
+    assert computes == [(2022, week) for week in weeks]
+
+
+def season_frames(events, compact, monkeypatch):
+    monkeypatch.setattr(loaders, 'COMPACT_DTYPES', compact)
+    parts = [loaders._compact_event_frames(season, loaders.build_event_frames(df))[1] for season, df in events.items()]
+    return utils.sort_partitions(utils.concat_compacted(parts, ignore_index=True))
+
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_attach_team_context_matches_the_week_by_week_baseline(compact, monkeypatch):
+    rng = np.random.default_rng(0)
+    # 2020 gets an 18th week: week 1 of 2021 takes every 2020 week, week 1 of 2022 only 2021's weeks < 18
+    events = {2020: event_season(2020, rng, weeks=18), 2021: event_season(2021, rng), 2022: event_season(2022, rng)}
+    # The baseline ran on the float64 / object frames, before the compact dtypes
+    baseline_df = season_frames(events, False, monkeypatch)
+    folded_df = season_frames(events, compact, monkeypatch)
+
+    attached = utils.attach_team_context(folded_df)
+    attached.attrs['partitions'] = utils.PartitionIndex(attached)
+
+    for season, week in sorted(set(zip(folded_df['season'], folded_df['week']))):
+        expected = reference.transform_teams_for_current_week(baseline_df, season, week)
+        actual = utils._team_context_week(attached, season, week)
+        # float32 points differ from the float64 sums in the last digits
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_categorical=False, rtol=1e-5, atol=1e-4, obj=f'{season} week {week}')
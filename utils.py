@@ -1,6 +1,31 @@
+import numpy as np
 import pandas as pd
-from pandas.core.dtypes.common import is_numeric_dtype
+from pandas.core.dtypes.common import is_numeric_dtype, is_float_dtype, is_integer_dtype
 import datetime
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+def atomic_write(path, content=None, write=None):
+    '''
+    Write content (str or bytes), or call write(tmp_path), on a temporary file next to path and os.replace it in,
+    so other threads and processes read the old file or the new one, never a partial write.
+    The on-disk caches (mirror, http, ESPN seasons, notebook renders) catch the OSError of a read-only
+    directory and carry on: it only costs the next reader another download or render.
+    '''
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if write is not None:
+            write(tmp_path)
+        else:
+            with open(tmp_path, 'wb' if isinstance(content, bytes) else 'w', encoding=None if isinstance(content, bytes) else 'utf-8') as f:
+                f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 def did_away_team_cover(spread_line, away_team_spread):
     """Returns True if away team covered the spread"""
@@ -9,28 +34,268 @@ def did_away_team_cover(spread_line, away_team_spread):
     else:  # Home team is favored
         return away_team_spread < spread_line
 
-def transform_teams_for_current_week(folded_df, season, week):
-    filtered_df = folded_df[((folded_df['season'] == season) & (folded_df['week'] == week))].copy()
-    if week == 1:
-        s = folded_df[((folded_df['season'] == season-1) & (folded_df['week'] < 18 if season > 2021 else 17))].copy()
-    else:
-        s = folded_df[((folded_df['season'] == season) & (folded_df['week'] < week))].copy()
+def build_key(df, cols, sep='_'):
+    '''
+    Vectorized string key over columns, the same text as f"{a}{sep}{b}..." applied row by row
+    Ex: season, week, away_team, home_team -> 2023_1_DET_KC
+    '''
+    key = df[cols[0]].astype(str)
+    for col in cols[1:]:
+        key = key + sep + df[col].astype(str)
+    return key
+
+def make_game_id(df):
+    return build_key(df, ['season', 'week', 'away_team', 'home_team'])
+
+def _is_integral(series):
+    values = pd.to_numeric(series.dropna(), errors='coerce').astype(float)
+    return bool(np.isfinite(values).all() and (values == np.round(values)).all())
+
+def apply_dtype_schema(df, schema, downcast_floats=True):
+    '''
+    Cast columns to the compact dtypes declared in schema ({dtype: [columns]}), skipping columns the frame lacks.
+    Integer casts only happen when every non-null value is integral, otherwise the column is left as float.
+    With downcast_floats every remaining float64 column becomes float32.
+    Returns (df, bytes_before, bytes_after)
+    '''
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    casts = {}
+    for dtype, cols in schema.items():
+        for col in cols:
+            if col not in df.columns:
+                continue
+            target = pd.api.types.pandas_dtype(dtype)
+            if is_integer_dtype(target) and not is_integer_dtype(df[col]):
+                # Nullable (Int8) targets accept missing values, numpy ints do not
+                if not _is_integral(df[col]) or (isinstance(target, np.dtype) and df[col].isna().any()):
+                    continue
+            casts[col] = dtype
+    if downcast_floats:
+        for col in df.columns:
+            if col not in casts and is_float_dtype(df[col]) and df[col].dtype == np.float64:
+                casts[col] = 'float32'
+    df = df.astype(casts)
+    bytes_after = int(df.memory_usage(deep=True).sum())
+    return df, bytes_before, bytes_after
+
+def concat_compacted(frames, ignore_index=False):
+    '''
+    pd.concat of frames compacted one at a time with apply_dtype_schema.
+    Categorical columns get the sorted union of their categories first (what astype('category') over the whole
+    would give) so they stay categorical; a numeric column compacted to different dtypes in different frames
+    (an integer cast skipped for one of them) is concatenated as float32, as a skipped cast over the whole would be.
+    '''
+    frames = list(frames)
+    casts = {}
+    for col in frames[0].columns:
+        dtypes = [frame[col].dtype for frame in frames if col in frame.columns]
+        if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            categories = sorted(set().union(*[dtype.categories for dtype in dtypes]))
+            casts[col] = pd.CategoricalDtype(categories)
+        elif len(set(map(str, dtypes))) > 1 and all(is_numeric_dtype(dtype) for dtype in dtypes):
+            casts[col] = 'float32'
+    if casts:
+        frames = [frame.astype({col: dtype for col, dtype in casts.items() if col in frame.columns}) for frame in frames]
+    return pd.concat(frames, ignore_index=ignore_index)
+
+class PartitionIndex:
+    '''
+    Row ranges of a frame sorted by (season, week), built once by the loaders.
+    Kept in df.attrs['partitions']; pandas deep copies attrs on every derived frame so it hands itself back instead,
+    and matches() tells the frame it was built on (or a column subset of it) from a derived one.
+    '''
+    def __init__(self, df):
+        season = df['season'].to_numpy()
+        week = df['week'].to_numpy()
+        keys = season.astype('int64') * 100 + week.astype('int64')
+        if (keys[1:] < keys[:-1]).any():
+            raise ValueError('PartitionIndex needs a frame sorted by season, week')
+        starts = np.r_[0, np.flatnonzero(np.diff(keys)) + 1] if len(keys) else np.array([], dtype='int64')
+        stops = np.r_[starts[1:], len(keys)] if len(keys) else np.array([], dtype='int64')
+        # Indexes are immutable, so the same index object means the same rows in the same order
+        self.index = df.index
+        self.weeks = {(int(season[a]), int(week[a])): (int(a), int(b)) for a, b in zip(starts, stops)}
+        self.seasons = {}
+        for (s, _), (a, b) in self.weeks.items():
+            lo, hi = self.seasons.get(s, (a, b))
+            self.seasons[s] = (min(lo, a), max(hi, b))
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def matches(self, df):
+        # Filtered, reordered or copied frames get a new index, even when the length is unchanged
+        return df.index is self.index
+
+def sort_partitions(df, reset_index=True):
+    '''Stable sort by (season, week), keeping the existing row order inside each week, and attach a PartitionIndex'''
+    df = df.sort_values(['season', 'week'], kind='stable')
+    if reset_index:
+        df = df.reset_index(drop=True)
+    df.attrs['partitions'] = PartitionIndex(df)
+    return df
+
+def get_partition(df, season, week=None):
+    '''
+    Rows for a season (or a single week of it) as a positional slice of a loader frame.
+    Frames without a matching PartitionIndex (e.g. already filtered, reordered or copied) fall back to a boolean scan.
+    The slice shares memory with the cached frame, .copy() it before modifying.
+    '''
+    partitions = df.attrs.get('partitions')
+    if partitions is None or not partitions.matches(df):
+        mask = df['season'] == season
+        if week is not None:
+            mask &= df['week'] == week
+        return df[mask]
+    start, stop = partitions.seasons.get(season, (0, 0)) if week is None else partitions.weeks.get((season, week), (0, 0))
+    return df.iloc[start:stop]
+
+# Bounded LRU of transform_teams_for_current_week results keyed by (data_version, season, week)
+TEAM_CONTEXT_CACHE_SIZE = 128
+_TEAM_CONTEXT_CACHE = OrderedDict()
+_TEAM_CONTEXT_LOCK = threading.Lock()
+
+def frame_version(df):
+    '''data_version of a full loader frame, None for anything else: filtered frames inherit attrs but not the rows'''
+    version = df.attrs.get('data_version')
+    partitions = df.attrs.get('partitions')
+    if version is None or partitions is None or not partitions.matches(df):
+        return None
+    return version
+
+def _team_context_key(folded_df, season, week):
+    # Only full loader frames are memoized
+    version = frame_version(folded_df)
+    if version is None:
+        return None
+    return (version, int(season), int(week))
+
+def _remember_team_context(key, df):
+    with _TEAM_CONTEXT_LOCK:
+        _TEAM_CONTEXT_CACHE[key] = df
+        _TEAM_CONTEXT_CACHE.move_to_end(key)
+        while len(_TEAM_CONTEXT_CACHE) > TEAM_CONTEXT_CACHE_SIZE:
+            _TEAM_CONTEXT_CACHE.popitem(last=False)
+
+def _team_context_aggregates(s):
+    s = s.copy()
     s['avg_points_over_expected'] = s['actual_points'] - s['expected_points']
     s['actual_over_covered'] = s['actual_under_covered'] == 0
-    points_over_expected = s.groupby(['team'])['avg_points_over_expected'].mean().sort_values(ascending=False).reset_index()
-    covered_spread = s.groupby(['team'])['actual_team_covered_spread'].sum().sort_values(ascending=False).reset_index()
-    went_under = s.groupby(['team'])['actual_over_covered'].sum().sort_values(ascending=False).reset_index()
-
-    joiners = [
+    points_over_expected = s.groupby(['team'], observed=True)['avg_points_over_expected'].mean().sort_values(ascending=False).reset_index()
+    covered_spread = s.groupby(['team'], observed=True)['actual_team_covered_spread'].sum().sort_values(ascending=False).reset_index()
+    went_under = s.groupby(['team'], observed=True)['actual_over_covered'].sum().sort_values(ascending=False).reset_index()
+    return [
         points_over_expected,
         covered_spread,
         went_under
     ]
+
+# Season-to-date team context attached to folded_df by attach_team_context
+TEAM_CONTEXT_COLUMNS = ['avg_points_over_expected', 'actual_team_covered_spread', 'actual_over_covered']
+TO_DATE_COLUMNS = [f'to_date_{c}' for c in TEAM_CONTEXT_COLUMNS]
+
+def attach_team_context(folded_df):
+    '''
+    Season-to-date team aggregates for every (team, season, week) row in one cumulative pass.
+    Running sums per (team, season) shifted by one game give "all games before week W"; week 1 takes the
+    prior season's totals (weeks < 18 from 2022 on, every week before that) to match transform_teams_for_current_week.
+    Expects rows ordered by season, week (sort_partitions) and returns a copy with the to_date_* columns added.
+    '''
+    dtypes = {j.columns[1]: j[j.columns[1]].dtype for j in _team_context_aggregates(folded_df.iloc[:0])}
+    # Teams without a prior game get NaN: plain int64 sums (uncompacted flags) become float64 like the left merge made them
+    dtypes = {c: 'float64' if pd.api.types.is_integer_dtype(d) and not pd.api.types.is_extension_array_dtype(d) else d for c, d in dtypes.items()}
+    poe = folded_df['actual_points'] - folded_df['expected_points']
+    history = pd.DataFrame({
+        'team': folded_df['team'],
+        'season': folded_df['season'],
+        'games': 1,
+        'poe_sum': poe.astype('float64').fillna(0),
+        'poe_count': poe.notna().astype('int64'),
+        'covered': folded_df['actual_team_covered_spread'].astype('float64').fillna(0),
+        'over': (folded_df['actual_under_covered'] == 0).fillna(False).astype('int64'),
+    }, index=folded_df.index)
+    totals = ['games', 'poe_sum', 'poe_count', 'covered', 'over']
+    keys = ['team', 'season']
+    prior = history.groupby(keys, observed=True, sort=False)[totals].cumsum() - history[totals]
+
+    # Week 1 falls back to the whole prior season, so swap in prior season totals per team
+    in_prior = (folded_df['week'] < 18) | (folded_df['season'] < 2021)
+    season_totals = history[in_prior.values].groupby(keys, observed=True)[totals].sum().reset_index()
+    season_totals['season'] = season_totals['season'] + 1
+    week_one = (folded_df['week'] == 1).values
+    fallback = pd.merge(history.loc[week_one, keys], season_totals, on=keys, how='left')
+    prior.loc[week_one, totals] = fallback[totals].fillna(0).values
+
+    played = prior['games'] > 0
+    context = pd.DataFrame({
+        'to_date_avg_points_over_expected': (prior['poe_sum'] / prior['poe_count'].where(prior['poe_count'] > 0)).where(played),
+        'to_date_actual_team_covered_spread': prior['covered'].where(played),
+        'to_date_actual_over_covered': prior['over'].where(played),
+    }, index=folded_df.index)
+    context = context.astype({f'to_date_{c}': dtype for c, dtype in dtypes.items()})
+    folded_df = folded_df.drop(columns=TO_DATE_COLUMNS, errors='ignore').copy()
+    folded_df[TO_DATE_COLUMNS] = context
+    return folded_df
+
+def _team_context_week(folded_df, season, week):
+    rows = get_partition(folded_df, season, week)
+    week_df = rows.drop(columns=['actual_under_covered', 'actual_team_covered_spread'] + TO_DATE_COLUMNS)
+    context = rows[TO_DATE_COLUMNS].rename(columns=dict(zip(TO_DATE_COLUMNS, TEAM_CONTEXT_COLUMNS)))
+    return pd.concat([week_df, context], axis=1).reset_index(drop=True)
+
+def _transform_teams_for_current_week(folded_df, season, week):
+    if all(c in folded_df.columns for c in TO_DATE_COLUMNS):
+        return _team_context_week(folded_df, season, week)
+    filtered_df = get_partition(folded_df, season, week).copy()
+    if week == 1:
+        prior = get_partition(folded_df, season-1)
+        # Prior season weeks < 18 from 2022 on; earlier seasons keep every week
+        s = prior[prior['week'] < 18] if season > 2021 else prior
+    else:
+        current = get_partition(folded_df, season)
+        s = current[current['week'] < week]
+    joiners = _team_context_aggregates(s)
     filtered_df = filtered_df.drop(columns=['actual_under_covered', 'actual_team_covered_spread'])
     for j in joiners:
         filtered_df = pd.merge(filtered_df, j, on=['team'], how='left')
     return filtered_df
 
+def team_context_cached(folded_df, season, week):
+    key = _team_context_key(folded_df, season, week)
+    with _TEAM_CONTEXT_LOCK:
+        return key is not None and key in _TEAM_CONTEXT_CACHE
+
+def transform_teams_for_current_week(folded_df, season, week):
+    key = _team_context_key(folded_df, season, week)
+    if key is None:
+        return _transform_teams_for_current_week(folded_df, season, week)
+    with _TEAM_CONTEXT_LOCK:
+        cached = _TEAM_CONTEXT_CACHE.get(key)
+        if cached is not None:
+            _TEAM_CONTEXT_CACHE.move_to_end(key)
+    if cached is None:
+        cached = _transform_teams_for_current_week(folded_df, season, week)
+        _remember_team_context(key, cached)
+    return cached.copy()
+
+def precompute_team_context(folded_df, season):
+    '''
+    Batch mode of transform_teams_for_current_week for every week of a season.
+    Frames without the to_date_* columns get them from attach_team_context over the season and the one before it.
+    Results are stored in the memo and returned as {week: frame}.
+    '''
+    source = folded_df
+    if not all(c in folded_df.columns for c in TO_DATE_COLUMNS):
+        source = attach_team_context(pd.concat([get_partition(folded_df, season-1), get_partition(folded_df, season)]))
+    results = {}
+    for week in sorted(get_partition(folded_df, season)['week'].unique()):
+        week_df = _team_context_week(source, season, week)
+        key = _team_context_key(folded_df, season, week)
+        if key is not None:
+            _remember_team_context(key, week_df)
+        results[week] = week_df.copy()
+    return results
+
 def df_rename_pivot(df, all_cols, pivot_cols, t1_prefix, t2_prefix, sub_merge_df=None):
     '''
     The reverse of a df_rename_fold
@@ -61,6 +326,56 @@ def df_rename_pivot(df, all_cols, pivot_cols, t1_prefix, t2_prefix, sub_merge_df
         return df
 
 
+# Column plans for the fold / shift / exavg reshapes. Plans depend only on column names so they are
+# compiled once per schema instead of rescanning df.columns with substring tests on every call.
+def _stack_columns(df, t1_cols, t2_cols, t1_out, t2_out, t1_values=None, t2_values=None, ignore_index=False):
+    '''
+    df[t1_cols] renamed to t1_out stacked over df[t2_cols] renamed to t2_out, with optional constant columns per half.
+    set_axis relabels the selections in place of rename, which would copy every block a second time.
+    '''
+    t1_df = df[list(t1_cols)].set_axis(list(t1_out), axis=1, copy=False)
+    t2_df = df[list(t2_cols)].set_axis(list(t2_out), axis=1, copy=False)
+    for col, value in (t1_values or {}).items():
+        t1_df[col] = value
+    for col, value in (t2_values or {}).items():
+        t2_df[col] = value
+    return pd.concat([t1_df, t2_df], ignore_index=ignore_index)
+
+@lru_cache(maxsize=64)
+def _fold_plan(columns, t1_prefix, t2_prefix):
+    t1_all_cols = [i for i in columns if t2_prefix not in i]
+    t2_all_cols = [i for i in columns if t1_prefix not in i]
+    t1_new_cols = [i.replace(t1_prefix, '') if t1_prefix in i else i for i in t1_all_cols]
+    t2_new_cols = [i.replace(t2_prefix, '') if t2_prefix in i else i for i in t2_all_cols]
+    return tuple(t1_all_cols), tuple(t2_all_cols), tuple(t1_new_cols), tuple(t2_new_cols)
+
+@lru_cache(maxsize=64)
+def _shift_plan(columns):
+    is_side = lambda col: '_offense' in col or '_defense' in col
+    root_cols = [col for col in columns if not is_side(col) and 'away_' not in col and 'home_' not in col]
+    away_cols = [col for col in columns if not is_side(col) and 'away_' in col and 'home_' not in col]
+    home_cols = [col for col in columns if not is_side(col) and 'away_' not in col and 'home_' in col]
+    off_away_cols = [col for col in columns if '_offense' in col and 'away_' in col]
+    def_away_cols = [col for col in columns if '_defense' in col and 'away_' in col]
+    off_home_cols = [col for col in columns if '_offense' in col and 'home_' in col]
+    def_home_cols = [col for col in columns if '_defense' in col and 'home_' in col]
+
+    away_src = root_cols + away_cols + off_away_cols + def_home_cols
+    away_out = root_cols + [col.replace('away_', '') for col in away_cols + off_away_cols] + [col.replace('home_', '') for col in def_home_cols]
+    home_src = root_cols + home_cols + off_home_cols + def_away_cols
+    home_out = root_cols + [col.replace('home_', '') for col in home_cols + off_home_cols] + [col.replace('away_', '') for col in def_away_cols]
+    return tuple(away_src), tuple(home_src), tuple(away_out), tuple(home_out)
+
+@lru_cache(maxsize=64)
+def _exavg_plan(columns, t1_cols, t2_cols, t1_prefix, sub_prefix):
+    pairs = [(t1_col, t2_col, f"exavg_{t1_col.replace(t1_prefix, sub_prefix)}") for t1_col, t2_col in zip(t1_cols, t2_cols)]
+    dropped = set(t1_cols + t2_cols)
+    new_cols = [pair[2] for pair in pairs]
+    # New names that already exist would be overwritten in place by the column loop
+    if len(set(new_cols)) != len(new_cols) or set(new_cols) & set(columns) or len(set(columns)) != len(columns):
+        return None
+    return tuple(i for i in columns if i not in dropped), tuple(pairs)
+
 def df_rename_fold(df, t1_prefix, t2_prefix):
     '''
     The reverse of a df_rename_pivot
@@ -68,18 +383,11 @@ def df_rename_fold(df, t1_prefix, t2_prefix):
     Ex: away_team_id and home_team_id -> team_id
     '''
     try:
-        t1_all_cols = [i for i in df.columns if t2_prefix not in i]
-        t2_all_cols = [i for i in df.columns if t1_prefix not in i]
-
-        t1_cols = [i for i in df.columns if t1_prefix in i]
-        t2_cols = [i for i in df.columns if t2_prefix in i]
-        t1_new_cols = [i.replace(t1_prefix, '') for i in df.columns if t1_prefix in i]
-        t2_new_cols = [i.replace(t2_prefix, '') for i in df.columns if t2_prefix in i]
-
-        t1_df = df[t1_all_cols].rename(columns=dict(zip(t1_cols, t1_new_cols)))
-        t2_df = df[t2_all_cols].rename(columns=dict(zip(t2_cols, t2_new_cols)))
-
-        df_out = pd.concat([t1_df, t2_df]).reset_index().drop(columns='index')
+        plan = _fold_plan(tuple(df.columns), t1_prefix, t2_prefix)
+        # reset_index().drop(columns='index') is a plain RangeIndex unless the index is named or 'index' is a column
+        if df.index.nlevels == 1 and df.index.name is None and 'index' not in df.columns:
+            return _stack_columns(df, *plan, ignore_index=True)
+        df_out = _stack_columns(df, *plan).reset_index().drop(columns='index')
         return df_out
     except Exception as e:
         print("--df_rename_fold-- " + str(e))
@@ -106,6 +414,32 @@ def df_rename_dif(df, t1_prefix=None, t2_prefix=None, t1_cols=None, t2_cols=None
     df_out = df.drop(columns=t1_cols + t2_cols)
     return df_out
 
+def _exavg_block(df, keep_cols, pairs):
+    '''
+    All exavg pairs of the same dtypes averaged as one 2D NumPy operation and joined in a single concat,
+    instead of inserting the columns one at a time. Returns None for dtypes left to the column loop.
+    '''
+    dtypes = df.dtypes.to_dict()
+    groups = {}
+    for t1_col, t2_col, new_col in pairs:
+        t1_dtype, t2_dtype = dtypes[t1_col], dtypes[t2_col]
+        # Extension and bool dtypes keep pandas' own arithmetic
+        if not isinstance(t1_dtype, np.dtype) or not isinstance(t2_dtype, np.dtype) or 'b' in t1_dtype.kind + t2_dtype.kind:
+            return None
+        if is_numeric_dtype(t1_dtype) and is_numeric_dtype(t2_dtype):
+            groups.setdefault((t1_dtype, t2_dtype), []).append((t1_col, t2_col, new_col))
+    blocks = [df[list(keep_cols)]]
+    for group in groups.values():
+        group_t1, group_t2, group_new = zip(*group)
+        values = (df[list(group_t1)].to_numpy() + df[list(group_t2)].to_numpy()) / 2
+        blocks.append(pd.DataFrame(values, columns=list(group_new), index=df.index, copy=False))
+    # Non numeric pairs are dropped without an exavg, same as the column loop
+    averaged = {new_col for group in groups.values() for _, _, new_col in group}
+    new_cols = [new_col for _, _, new_col in pairs if new_col in averaged]
+    df_out = pd.concat(blocks, axis=1)
+    out_cols = list(keep_cols) + new_cols
+    return df_out if list(df_out.columns) == out_cols else df_out[out_cols]
+
 def df_rename_exavg(df, t1_prefix=None, t2_prefix=None, t1_cols=None, t2_cols=None, sub_prefix=''):
     '''
     An extension of the df_rename_pivot
@@ -118,6 +452,11 @@ def df_rename_exavg(df, t1_prefix=None, t2_prefix=None, t1_cols=None, t2_cols=No
             raise Exception('You must specify either prefix or cols')
         t1_cols = [i for i in df.columns if t1_prefix in i]
         t2_cols = [i for i in df.columns if t2_prefix in i]
+    plan = _exavg_plan(tuple(df.columns), tuple(t1_cols), tuple(t2_cols), t1_prefix, sub_prefix) if t1_prefix is not None else None
+    if plan is not None:
+        df_out = _exavg_block(df, *plan)
+        if df_out is not None:
+            return df_out
     for t1_col, t2_col in zip(t1_cols, t2_cols):
         if is_numeric_dtype(df[t1_col]) and is_numeric_dtype(df[t2_col]):
             df[f"exavg_{t1_col.replace(t1_prefix, sub_prefix)}"] = (df[t1_col] + df[t2_col]) / 2
@@ -128,27 +467,4 @@ def df_rename_shift(df, drop_cols=None):
     if drop_cols is not None:
         df = df.drop(columns=drop_cols)
 
-    root_cols = [col for col in df.columns if '_offense' not in col and '_defense' not in col and 'away_' not in col and 'home_' not in col]
-
-    away_cols = [col for col in df.columns if '_offense' not in col and '_defense' not in col and 'away_' in col and 'home_' not in col]
-    away_rename_dict = {col: col.replace('away_', '') for col in away_cols}
-    home_cols = [col for col in df.columns if '_offense' not in col and '_defense' not in col and 'away_' not in col and 'home_' in col]
-    home_rename_dict = {col: col.replace('home_', '') for col in home_cols}
-
-    off_away_cols = [col for col in df.columns if '_offense' in col and 'away_' in col]
-    off_away_rename_dict = {col: col.replace('away_', '') for col in off_away_cols}
-    def_away_cols = [col for col in df.columns if '_defense' in col and 'away_' in col]
-    def_away_rename_dict = {col: col.replace('away_', '') for col in def_away_cols}
-
-    off_home_cols = [col for col in df.columns if '_offense' in col and 'home_' in col]
-    off_home_rename_dict = {col: col.replace('home_', '') for col in off_home_cols}
-    def_home_cols = [col for col in df.columns if '_defense' in col and 'home_' in col]
-    def_home_rename_dict = {col: col.replace('home_', '') for col in def_home_cols}
-
-    away_df = df[root_cols + away_cols + off_away_cols + def_home_cols].rename(columns={**away_rename_dict, **off_away_rename_dict, **def_home_rename_dict})
-    away_df['is_home'] = 0
-    home_df = df[root_cols + home_cols + off_home_cols + def_away_cols].rename(columns={**home_rename_dict, **off_home_rename_dict, **def_away_rename_dict})
-    home_df['is_home'] = 1
-    del df
-    out_df = pd.concat([away_df, home_df])
-    return out_df
+    return _stack_columns(df, *_shift_plan(tuple(df.columns)), t1_values={'is_home': 0}, t2_values={'is_home': 1})